@@ -0,0 +1,162 @@
+"""
+    This file contains the CommandQueueCore sub-class as part of the Framework Class
+    This class handles passing commands from any thread to a worker thread, and letting the sender wait for its own
+    command to finish
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+from PyQt4 import QtCore
+from collections import deque
+import time
+
+# Custom imports
+
+#####################################
+# Global Variables
+#####################################
+
+
+#####################################
+# CommandCompletion Class Definition
+#####################################
+class CommandCompletion(object):
+    """
+        Handed back to whoever queued a command. The worker thread calls set_complete() once the command has been
+        run, or set_cancelled() if it never will be, and the sender can wait() on it with a timeout.
+    """
+
+    def __init__(self):
+        self.mutex = QtCore.QMutex()
+        self.condition = QtCore.QWaitCondition()
+
+        self.complete = False
+        self.cancelled = False
+
+    def set_complete(self):
+        self.mutex.lock()
+        self.complete = True
+        self.condition.wakeAll()
+        self.mutex.unlock()
+
+    def set_cancelled(self):
+        self.mutex.lock()
+        self.cancelled = True
+        self.complete = True
+        self.condition.wakeAll()
+        self.mutex.unlock()
+
+    def is_complete(self):
+        self.mutex.lock()
+        complete = self.complete
+        self.mutex.unlock()
+
+        return complete
+
+    def wait(self, timeout_ms):
+        # Returns True once the command has been run, False on a timeout or if it was cancelled
+        deadline = time.time() + (timeout_ms / 1000.0)
+
+        self.mutex.lock()
+        try:
+            while not self.complete:
+                remaining_ms = int((deadline - time.time()) * 1000)
+                if remaining_ms <= 0:
+                    return False
+                self.condition.wait(self.mutex, remaining_ms)
+
+            return not self.cancelled
+        finally:
+            self.mutex.unlock()
+
+
+#####################################
+# CommandQueue Class Definition
+#####################################
+class CommandQueue(object):
+    """
+        First in, first out queue that any thread can put() commands into. The worker thread blocks in get() until
+        there is a command to run, so it isn't woken up at all while idle. close() wakes the worker up for good, and
+        drain() hands back whatever was still queued so it can be cancelled.
+    """
+
+    def __init__(self):
+        self.mutex = QtCore.QMutex()
+        self.not_empty_condition = QtCore.QWaitCondition()
+
+        self.commands = deque()
+        self.closed = False
+
+    def put(self, command):
+        # Returns False if the queue has already been closed, in which case the command will never be run
+        self.mutex.lock()
+
+        if not self.closed:
+            self.commands.append(command)
+            self.not_empty_condition.wakeOne()
+
+        accepted = not self.closed
+        self.mutex.unlock()
+
+        return accepted
+
+    def get(self):
+        # Returns None once the queue has been closed
+        self.mutex.lock()
+        try:
+            while not self.commands and not self.closed:
+                self.not_empty_condition.wait(self.mutex)
+
+            if self.closed:
+                return None
+
+            return self.commands.popleft()
+        finally:
+            self.mutex.unlock()
+
+    def close(self):
+        self.mutex.lock()
+        self.closed = True
+        self.not_empty_condition.wakeAll()
+        self.mutex.unlock()
+
+    def drain(self):
+        self.mutex.lock()
+        remaining_commands = list(self.commands)
+        self.commands.clear()
+        self.mutex.unlock()
+
+        return remaining_commands
+
+    def __len__(self):
+        self.mutex.lock()
+        length = len(self.commands)
+        self.mutex.unlock()
+
+        return length
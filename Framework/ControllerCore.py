@@ -27,30 +27,30 @@ __status__ = "Development"
 # You should have received a copy of the GNU General Public License
 # along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
 
-# self.serial_out_queue.append(self.convert_to_json({'ajd':0.01}))
+# self.queue_line(self.convert_to_json({'ajd':0.01}))
 # self.msleep(30)  # Required for config changes
-# self.serial_out_queue.append(self.convert_to_json({'ajh':10000}))
+# self.queue_line(self.convert_to_json({'ajh':10000}))
 # self.msleep(30)  # Required for config changes
-# self.serial_out_queue.append(self.convert_to_json({'atm':100}))
+# self.queue_line(self.convert_to_json({'atm':100}))
 # self.msleep(50)  # Required for config changes
-# self.serial_out_queue.append(self.convert_to_json({'ajm':5000}))
+# self.queue_line(self.convert_to_json({'ajm':5000}))
 # self.msleep(30)  # Required for config changes
-# self.serial_out_queue.append(self.convert_to_json({'atn':-100}))
+# self.queue_line(self.convert_to_json({'atn':-100}))
 # self.msleep(30)  # Required for config changes
-# self.serial_out_queue.append(self.convert_to_json({'asv':500}))
+# self.queue_line(self.convert_to_json({'asv':500}))
 # self.msleep(30)  # Required for config changes
-# self.serial_out_queue.append(self.convert_to_json({'ajm':2500}))
+# self.queue_line(self.convert_to_json({'ajm':2500}))
 # self.msleep(50)  # Required for config changes
-# self.serial_out_queue.append(self.convert_to_json({'avm':5000}))
+# self.queue_line(self.convert_to_json({'avm':5000}))
 # self.msleep(30)  # Required for config changes
-# self.serial_out_queue.append(self.convert_to_json({'afr':5000}))
+# self.queue_line(self.convert_to_json({'afr':5000}))
 # self.msleep(30)  # Required for config changes
-# self.serial_out_queue.append(self.convert_to_json({'aam':1}))
+# self.queue_line(self.convert_to_json({'aam':1}))
 # self.msleep(30)  # Required for config changes
-# self.serial_out_queue.append(self.convert_to_json({'afr':16000}))
+# self.queue_line(self.convert_to_json({'afr':16000}))
 # self.msleep(50)  # Required for config changes
-# self.serial_out_queue.append(self.convert_to_json({'x':None}))
-# self.serial_out_queue.append(self.convert_to_json({'a':None}))
+# self.queue_line(self.convert_to_json({'x':None}))
+# self.queue_line(self.convert_to_json({'a':None}))
 
 # 8.73125mm from center of precision to tangential edge of x_y rods
 
@@ -64,14 +64,33 @@ import logging
 import serial
 import json
 import time
+import os
+import select
+import fcntl
 
 # Custom imports
+from Framework.WaitCore import ConditionWaiter
+from Framework.CommandQueueCore import CommandQueue, CommandCompletion
+from Framework.WakeupCore import WakeupCounter
 
 #####################################
 # Global Variables
 #####################################
-SERIAL_PORT = '/dev/ttyUSB0'
+SERIAL_PORT = os.environ.get("PICK_AND_PLATE_TINYG_PORT", '/dev/ttyUSB0')  # Override to use Tools/TinyGSimulator.py
 SERIAL_BAUD = 115200
+SERIAL_READ_TIMEOUT = 0.02  # Reads are only made once select says data is waiting, so this should never be reached
+SERIAL_READ_SIZE = 1024
+SERIAL_IDLE_WAIT = 10.0  # Seconds to sleep with nothing in flight, anything queued or received wakes it right away
+
+TINYG_PLANNER_BUFFERS = 28  # What qr reports as available when the planner is empty
+TINYG_RX_BUFFER_SIZE = 254  # Bytes the TinyG can hold before it has parsed them
+PLANNER_LOW_WATER_MARK = 4  # Stop sending gcode when the planner might have this few buffers free
+MAX_LINES_IN_FLIGHT = 4  # Lines sent that the TinyG hasn't answered with an r yet
+LINE_RESPONSE_TIMEOUT = 2.0  # Seconds to wait on an r before assuming it was lost and sending again
+
+MOTION_COMPLETE_TIMEOUT_MS = 120000  # Long enough for the slowest homing cycle
+COMMAND_PROCESSED_TIMEOUT_MS = 10000
+CONTROLLER_IDLE_WAIT_MS = 60000  # State changes notify, this only bounds how long a missed one could go unnoticed
 
 INITIALIZING_STATE = 0
 READY_FOR_USE_STATE = 1
@@ -96,6 +115,102 @@ MM_PER_UL = 0.1215
 
 IGNORE_VALUE = 1000
 
+SYSTEM_INITIALIZATION_COMMAND = 0
+INITIAL_HOMING_COMMAND = 1
+FULL_HOMING_COMMAND = 2
+Z_MOVE_ABSOLUTE_COMMAND = 3
+Z_MOVE_ABSOLUTE_WITH_FEEDRATE_COMMAND = 4
+Z_MOVE_RELATIVE_COMMAND = 5
+Z_HOME_COMMAND = 6
+X_Y_MOVE_ABSOLUTE_COMMAND = 7
+X_Y_MOVE_ABSOLUTE_WITH_FEEDRATE_COMMAND = 8
+X_Y_MOVE_RELATIVE_COMMAND = 9
+X_Y_HOME_COMMAND = 10
+X_Y_PRECISION_HOME_COMMAND = 11
+A_MOVE_RELATIVE_COMMAND = 12
+A_HOME_COMMAND = 13
+LIGHT_CHANGE_COMMAND = 14
+MOTOR_STATE_CHANGE_COMMAND = 15
+MOTION_PROGRAM_COMMAND = 16
+
+COMMAND_NAMES = ["System Initialization", "Initial Homing", "Full Homing", "Z Move ABS", "Z Move ABS w/Feedrate",
+                 "Z Move REL", "Z Home", "X/Y Move ABS", "X/Y Move ABS w/Feedrate", "X/Y Move REL", "X/Y Home",
+                 "X/Y Precision Home", "A Move REL", "A Home", "Light Change", "Motor State Change", "Motion Program"]
+
+
+#####################################
+# ControllerCommand Class Definition
+#####################################
+class ControllerCommand(object):
+    """
+        One request for the controller thread. The arguments are passed straight to the handler registered for the
+        command type, and completion is set once that handler returns.
+    """
+    __slots__ = ["command_type", "arguments", "completion"]
+
+    def __init__(self, command_type, arguments):
+        self.command_type = command_type
+        self.arguments = arguments
+        self.completion = CommandCompletion()
+
+
+#####################################
+# MotionProgram Class Definition
+#####################################
+class MotionProgram(object):
+    """
+        An ordered list of moves, dwells, and named sync points that gets queued to the TinyG all at once, so its
+        planner can run the whole sequence back to back instead of waiting on a round trip between every move. The
+        controller emits motion_program_sync_point_signal with a sync point's name once every move before it has
+        finished, while the moves after it keep running.
+    """
+
+    def __init__(self):
+        self.gcode_lines = []
+        self.sync_points = []  # (name, number of gcode lines before it)
+
+        self.first_line_number = None  # Filled in by the SerialHandler when the program is queued
+
+        # Filled in by the controller as each sync point is reached, keyed by name. Locations are (x, y, z, a in uL).
+        self.sync_point_times = {}
+        self.sync_point_locations = {}
+
+    def move_x_y(self, x, y, feedrate=IGNORE_VALUE):
+        self.move_absolute(x, y, IGNORE_VALUE, feedrate)
+
+    def move_z(self, z, feedrate=IGNORE_VALUE):
+        self.move_absolute(IGNORE_VALUE, IGNORE_VALUE, z, feedrate)
+
+    def move_absolute(self, x, y, z, feedrate=IGNORE_VALUE):
+        out_string = 'G90 G0' if feedrate == IGNORE_VALUE else 'G90 G1'
+
+        if x != IGNORE_VALUE:
+            out_string += ' X' + str(x)
+
+        if y != IGNORE_VALUE:
+            out_string += ' Y' + str(y)
+
+        if z != IGNORE_VALUE:
+            out_string += ' Z' + str(z)
+
+        if feedrate != IGNORE_VALUE:
+            out_string += ' F' + str(feedrate)
+
+        self.gcode_lines.append(out_string)
+
+    def move_a(self, micro_liters):
+        self.gcode_lines.append('G91 G0 A' + str(MM_PER_UL * micro_liters))
+
+    def dwell(self, milliseconds):
+        if milliseconds > 0:
+            self.gcode_lines.append('G4 P' + str(milliseconds / 1000.0))  # TinyG dwells are in seconds
+
+    def sync_point(self, name):
+        self.sync_points.append((name, len(self.gcode_lines)))
+
+    def get_line_number_before(self, number_of_lines):
+        return self.first_line_number + number_of_lines - 1
+
 
 #####################################
 # PickAndPlateController Definition
@@ -123,7 +238,7 @@ class SerialHandler(QtCore.QThread):
         self.serial = serial.Serial()
         self.serial_connected = False
 
-        self.serial_in_buffer = ""
+        self.serial_in_buffer = bytearray()
         self.serial_out_queue = []
 
         # TinyG Returned Information Storage
@@ -134,7 +249,28 @@ class SerialHandler(QtCore.QThread):
 
         self.tinyg_velocity = 0
         self.tinyg_machine_state = 0
-        self.tinyg_serial_buffer_remaining = 32
+        self.tinyg_planner_buffers_available = TINYG_PLANNER_BUFFERS
+
+        self.lines_in_flight = []  # Lengths of the lines sent but not yet answered, oldest first
+        self.last_line_sent_time = 0
+
+        # Motion completion tracking. Every motion line is sent with an N line number, which TinyG echoes back in its
+        # r response when it's planned and in the line field of status reports once it's running.
+        self.next_line_number = 1
+        self.last_motion_line_number = 0
+        self.motion_requests_queued = 0
+
+        self.tinyg_line_number = 0
+        self.tinyg_acknowledged_line_number = 0
+
+        self.state_waiter = ConditionWaiter()
+
+        # Anything queued from another thread writes a byte here, so select can sleep on it and the port together
+        self.wake_read_fd, self.wake_write_fd = os.pipe()
+        for wake_fd in [self.wake_read_fd, self.wake_write_fd]:
+            fcntl.fcntl(wake_fd, fcntl.F_SETFL, fcntl.fcntl(wake_fd, fcntl.F_GETFL) | os.O_NONBLOCK)
+
+        self.wakeup_counter = WakeupCounter("Serial Handler")
 
         self.start()
 
@@ -143,21 +279,24 @@ class SerialHandler(QtCore.QThread):
             if self.reconnect_to_tinyg_flag:
                 self.reconnect_to_tinyg()
             else:
-                if self.serial.inWaiting() > 0:
-                    self.read_from_tinyg()
-                else:
-                    if self.serial_out_queue:
-                        self.send_one_line_from_queue()
-            self.msleep(50)
+                self.wait_for_serial_activity()
+                self.wakeup_counter.count()
+
+                self.read_from_tinyg()
+
+                if self.serial_out_queue:
+                    self.send_lines_from_queue()
 
         # Block to turn off lights when program closes properly
         self.serial_out_queue = []
+        self.clear_lines_in_flight()
         self.on_light_change_requested_slot(0)
-        self.send_one_line_from_queue()
+        self.send_lines_from_queue()
 
     def reconnect_to_tinyg(self):
         try:
-            self.serial = serial.Serial(SERIAL_PORT, SERIAL_BAUD)  # Should never change unless you do bad things....
+            # Should never change unless you do bad things....
+            self.serial = serial.Serial(SERIAL_PORT, SERIAL_BAUD, timeout=SERIAL_READ_TIMEOUT)
             if self.serial.isOpen():
                 self.reconnect_to_tinyg_flag = False
                 self.clear_hardware_and_software_buffers()
@@ -167,27 +306,101 @@ class SerialHandler(QtCore.QThread):
             self.logger.error("Unable to connect to TinyG. Trying again.")
             self.msleep(1000)
 
-    def send_one_line_from_queue(self):
-        if self.tinyg_serial_buffer_remaining > 10:
-            self.serial.write(self.serial_out_queue[0])
-            # self.logger.info("Command: " + str(self.serial_out_queue[0]))
+    def queue_line(self, line):
+        self.serial_out_queue.append(line)
+        self.wake()
+
+    def wake(self):
+        try:
+            os.write(self.wake_write_fd, b"\0")
+        except OSError:
+            pass  # The pipe is already full of wakeups, which wakes the thread just the same
+
+    def wait_for_serial_activity(self):
+        # Sleeps until the TinyG sends something or another thread queues a line, instead of waking to poll the port.
+        # With lines in flight it also wakes in time to notice one that never got an answer.
+        if self.lines_in_flight:
+            timeout = max(0.0, LINE_RESPONSE_TIMEOUT - (time.time() - self.last_line_sent_time)) + 0.01
+        else:
+            timeout = SERIAL_IDLE_WAIT
+
+        readable, _, _ = select.select([self.serial.fileno(), self.wake_read_fd], [], [], timeout)
+
+        if self.wake_read_fd in readable:
+            try:
+                os.read(self.wake_read_fd, SERIAL_READ_SIZE)
+            except OSError:
+                pass
+
+    def send_lines_from_queue(self):
+        # Sends as many lines as the TinyG can take right now so the planner stays fed and moves can blend together
+        if self.lines_in_flight and ((time.time() - self.last_line_sent_time) > LINE_RESPONSE_TIMEOUT):
+            self.logger.debug("No response from TinyG for " + str(len(self.lines_in_flight)) + " lines. Continuing.")
+            self.clear_lines_in_flight()
+
+        while self.serial_out_queue and self.can_send_line(self.serial_out_queue[0]):
+            line = self.serial_out_queue[0]
             del self.serial_out_queue[0]
 
+            self.serial.write(line)
+            # self.logger.info("Command: " + str(line))
+
+            if line == "^x\n":
+                self.clear_lines_in_flight()  # Resets throw away anything the TinyG had buffered
+            else:
+                self.lines_in_flight.append(len(line))
+                self.last_line_sent_time = time.time()
+
+    def can_send_line(self, line):
+        if len(self.lines_in_flight) >= MAX_LINES_IN_FLIGHT:
+            return False
+
+        if (sum(self.lines_in_flight) + len(line)) > TINYG_RX_BUFFER_SIZE:
+            return False
+
+        if '"gc"' in line:
+            # Every line in flight could still turn into a planner buffer once the TinyG gets to it
+            return (self.tinyg_planner_buffers_available - len(self.lines_in_flight)) > PLANNER_LOW_WATER_MARK
+        else:
+            # Config changes and queries get sent by themselves so the TinyG is never mid-line when it applies them
+            return not self.lines_in_flight
+
+    def clear_lines_in_flight(self):
+        self.lines_in_flight = []
+
     def read_from_tinyg(self):
-        current_char = ''
-        while not (current_char == '\n'):
-            if self.serial.inWaiting() > 0:
-                current_char = self.serial.read(1)
-                self.serial_in_buffer += current_char
+        # Takes everything that has already arrived, without waiting on more
+        bytes_waiting = self.serial.inWaiting()
 
-        self.process_tinyg_response()
+        if not bytes_waiting:
+            return
 
-    def process_tinyg_response(self):
-        if ord(self.serial_in_buffer[0]) < 40:
-            self.serial_in_buffer = self.serial_in_buffer[1:]
+        data = self.serial.read(min(bytes_waiting, SERIAL_READ_SIZE))
+        if not data:
+            return
+
+        self.serial_in_buffer.extend(data)
+
+        line_end = self.serial_in_buffer.find(b"\n")
+        while line_end >= 0:
+            line = bytes(self.serial_in_buffer[:line_end])
+            del self.serial_in_buffer[:(line_end + 1)]
+
+            self.process_tinyg_response(line)
+
+            line_end = self.serial_in_buffer.find(b"\n")
+
+    def process_tinyg_response(self, line):
+        line = line.strip()
+
+        if not line:
+            return
+
+        if ord(line[0]) < 40:
+            line = line[1:]
             self.logger.info("Buffer is corrupted.")
         try:
-            processed_json = json.loads(self.serial_in_buffer)
+            processed_json = json.loads(line)
 
             if 'sr' in processed_json:
                 system_response = processed_json['sr']
@@ -201,18 +414,27 @@ class SerialHandler(QtCore.QThread):
                     self.tinyg_z_location = float(system_response['posz'])
                 if 'posa' in system_response:
                     self.tinyg_a_location = float(system_response['posa'])
+                if 'line' in system_response:
+                    self.tinyg_line_number = int(system_response['line'])
                 if 'stat' in system_response:
                     self.tinyg_machine_state = int(system_response['stat'])
                     self.tinyg_current_machine_state_signal.emit(self.tinyg_machine_state)
 
                 self.tinyg_current_location_signal.emit(self.tinyg_x_location, self.tinyg_y_location,
                                                         self.tinyg_z_location, self.tinyg_a_location)
+                self.state_waiter.notify()
 
             elif 'qr' in processed_json:
-                self.tinyg_serial_buffer_remaining = int(processed_json['qr'])
+                self.tinyg_planner_buffers_available = int(processed_json['qr'])
+                self.state_waiter.notify()
 
             elif 'r' in processed_json:
+                if self.lines_in_flight:
+                    del self.lines_in_flight[0]
+
                 special_response = processed_json['r']
+                if 'n' in special_response:
+                    self.tinyg_acknowledged_line_number = int(special_response['n'])
                 if 'sys' in special_response:
                     self.logger.debug("Sys:" + str(special_response['sys']))
                 if '1' in special_response:
@@ -234,99 +456,101 @@ class SerialHandler(QtCore.QThread):
                 if 'p1' in special_response:
                     self.logger.debug("p1:" + str(special_response['p1']))
                 self.tinyg_command_processed_signal.emit()
+                self.state_waiter.notify()
 
                 # self.logger.info("Processed: " + str(processed_json))
         except:
             pass
 
-        self.serial_in_buffer = ""
-
     def clear_hardware_and_software_buffers(self):
         self.clear_hardware_buffers()
         self.serial_out_queue = []
-        self.serial_in_buffer = ""
+        del self.serial_in_buffer[:]
+        self.clear_lines_in_flight()
 
     def clear_hardware_buffers(self):
-        while self.serial.inWaiting() > 0:
-            self.serial.read(1)
+        self.serial.flushInput()
 
     def reset_tinyg(self):
-        self.serial_out_queue.append("^x\n")
+        self.queue_line("^x\n")
 
         # ##### Current Tune
-        self.serial_out_queue.append(self.convert_to_json({'xfr': 6000}))
-        self.serial_out_queue.append(self.convert_to_json({'xvm': 6000}))
-        self.serial_out_queue.append(self.convert_to_json({'yfr': 5000}))
-        self.serial_out_queue.append(self.convert_to_json({'yvm': 5000}))
-        self.serial_out_queue.append(self.convert_to_json({'xjm': 2000}))
-        self.serial_out_queue.append(self.convert_to_json({'yjm': 2000}))
+        self.queue_line(self.convert_to_json({'xfr': 6000}))
+        self.queue_line(self.convert_to_json({'xvm': 6000}))
+        self.queue_line(self.convert_to_json({'yfr': 5000}))
+        self.queue_line(self.convert_to_json({'yvm': 5000}))
+        self.queue_line(self.convert_to_json({'xjm': 2000}))
+        self.queue_line(self.convert_to_json({'yjm': 2000}))
         # #####
 
         # Misc for changing settings when needed
-        # self.serial_out_queue.append(self.convert_to_json({'mt':90}))
-        # self.serial_out_queue.append(self.convert_to_json({'1pm':1}))
-        # self.serial_out_queue.append(self.convert_to_json({'xfr':10000}))
-        # self.serial_out_queue.append(self.convert_to_json({'xvm':10000}))
-        # self.serial_out_queue.append(self.convert_to_json({'yjm':2000}))
-        # self.serial_out_queue.append(self.convert_to_json({'afr':8000}))
-        # self.serial_out_queue.append(self.convert_to_json({'avm':8000}))
-        # self.serial_out_queue.append(self.convert_to_json({'ajm':2000}))
+        # self.queue_line(self.convert_to_json({'mt':90}))
+        # self.queue_line(self.convert_to_json({'1pm':1}))
+        # self.queue_line(self.convert_to_json({'xfr':10000}))
+        # self.queue_line(self.convert_to_json({'xvm':10000}))
+        # self.queue_line(self.convert_to_json({'yjm':2000}))
+        # self.queue_line(self.convert_to_json({'afr':8000}))
+        # self.queue_line(self.convert_to_json({'avm':8000}))
+        # self.queue_line(self.convert_to_json({'ajm':2000}))
 
     def on_motor_state_change_requested_slot(self, state):
         if state:
-            self.serial_out_queue.append(self.convert_to_json({'me': None}))  # Keep motors on for 30 minutes
+            self.queue_line(self.convert_to_json({'me': None}))  # Keep motors on for 30 minutes
         else:
-            self.serial_out_queue.append(self.convert_to_json({'md': None}))
+            self.queue_line(self.convert_to_json({'md': None}))
 
     def on_dump_tinyg_settings_dump_slot(self):
-        self.serial_out_queue.append(self.convert_to_json({'sys': None}))
-        self.serial_out_queue.append(self.convert_to_json({'1': None}))
-        self.serial_out_queue.append(self.convert_to_json({'x': None}))
-        self.serial_out_queue.append(self.convert_to_json({'2': None}))
-        self.serial_out_queue.append(self.convert_to_json({'y': None}))
-        self.serial_out_queue.append(self.convert_to_json({'3': None}))
-        self.serial_out_queue.append(self.convert_to_json({'z': None}))
-        self.serial_out_queue.append(self.convert_to_json({'4': None}))
-        self.serial_out_queue.append(self.convert_to_json({'a': None}))
-        self.serial_out_queue.append(self.convert_to_json({'p1': None}))
+        self.queue_line(self.convert_to_json({'sys': None}))
+        self.queue_line(self.convert_to_json({'1': None}))
+        self.queue_line(self.convert_to_json({'x': None}))
+        self.queue_line(self.convert_to_json({'2': None}))
+        self.queue_line(self.convert_to_json({'y': None}))
+        self.queue_line(self.convert_to_json({'3': None}))
+        self.queue_line(self.convert_to_json({'z': None}))
+        self.queue_line(self.convert_to_json({'4': None}))
+        self.queue_line(self.convert_to_json({'a': None}))
+        self.queue_line(self.convert_to_json({'p1': None}))
 
     def on_light_change_requested_slot(self, brightness):
         if brightness > 0:
             brightness = self.constrain_to_range(brightness, 0, 1000)
-            self.serial_out_queue.append(self.convert_to_json({'gc': 'M3 S' + str(brightness)}))
+            self.queue_line(self.convert_to_json({'gc': 'M3 S' + str(brightness)}))
         else:
-            self.serial_out_queue.append(self.convert_to_json({'gc': 'M3 S0'}))
+            self.queue_line(self.convert_to_json({'gc': 'M3 S0'}))
 
     def on_z_homing_requested_slot(self, precision):
         if precision == ROUGH:
-            self.serial_out_queue.append(self.convert_to_json({'zsv': 200}))
-            self.msleep(30)
-            # self.serial_out_queue.append(self.convert_to_json({'zsn': 0}))
+            self.queue_line(self.convert_to_json({'zsv': 200}))
+            # self.queue_line(self.convert_to_json({'zsn': 0}))
             # self.msleep(30)  # Required for config changes
-            # self.serial_out_queue.append(self.convert_to_json({'zsx': 1}))
+            # self.queue_line(self.convert_to_json({'zsx': 1}))
             # self.msleep(30)  # Required for config changes
-            self.serial_out_queue.append(self.convert_to_json({'gc': 'G28.2 Z0'}))
-            self.msleep(30)  # Required for config changes
-            self.serial_out_queue.append(self.convert_to_json({'gc': 'G90 G1 Z5'}))
+            self.queue_motion_gcode('G28.2 Z0')
+            self.queue_motion_gcode('G90 G1 Z5')
         elif precision == FINE:
-            # self.serial_out_queue.append(self.convert_to_json({'zsv': 100}))
+            # self.queue_line(self.convert_to_json({'zsv': 100}))
             # self.msleep(30)
-            # self.serial_out_queue.append(self.convert_to_json({'zsn': 1}))
+            # self.queue_line(self.convert_to_json({'zsn': 1}))
             # self.msleep(30)  # Required for config changes
-            # self.serial_out_queue.append(self.convert_to_json({'zsx': 0}))
+            # self.queue_line(self.convert_to_json({'zsx': 0}))
             # self.msleep(30)  # Required for config changes
-            self.serial_out_queue.append(self.convert_to_json({'gc': 'G28.2 Z0'}))
+            self.queue_motion_gcode('G28.2 Z0')
+
+        self.on_homing_request_queued()
 
     def on_x_y_homing_requested_slot(self):
-        self.serial_out_queue.append(self.convert_to_json({'gc': 'G28.2 X0 Y0'}))
+        self.queue_motion_gcode('G28.2 X0 Y0')
+        self.on_homing_request_queued()
 
     def on_x_y_precision_homing_requested_slot(self):
-        self.serial_out_queue.append(self.convert_to_json({'gc': 'G28.2 X0'}))
-        self.on_relative_position_change_requested_slot(0, -10, 0, 0)
-        self.serial_out_queue.append(self.convert_to_json({'gc': 'G28.2 Y0'}))
+        self.queue_motion_gcode('G28.2 X0')
+        self.queue_relative_position_change(0, -10, 0, 0)
+        self.queue_motion_gcode('G28.2 Y0')
+        self.on_homing_request_queued()
 
     def on_a_homing_requested_slot(self):
-        self.serial_out_queue.append(self.convert_to_json({'gc': 'G28.2 A0'}))
+        self.queue_motion_gcode('G28.2 A0')
+        self.on_homing_request_queued()
 
     def on_absolute_position_change_requested_slot(self, x, y, z, a):
         out_string = 'G90 G0'
@@ -343,7 +567,9 @@ class SerialHandler(QtCore.QThread):
         if a != IGNORE_VALUE:
             out_string += ' A' + str(a)
 
-        self.serial_out_queue.append(self.convert_to_json({'gc': out_string}))
+        self.queue_motion_gcode(out_string)
+
+        self.on_motion_request_queued()
 
     def on_absolute_position_with_feedrate_change_requested_slot(self, x, y, z, a, f):
         out_string = 'G90 G1'
@@ -363,9 +589,23 @@ class SerialHandler(QtCore.QThread):
         if f != IGNORE_VALUE:
             out_string += ' F' + str(f)
 
-        self.serial_out_queue.append(self.convert_to_json({'gc': out_string}))
+        self.queue_motion_gcode(out_string)
+
+        self.on_motion_request_queued()
 
     def on_relative_position_change_requested_slot(self, x, y, z, a):
+        self.queue_relative_position_change(x, y, z, a)
+        self.on_motion_request_queued()
+
+    def on_motion_program_requested_slot(self, motion_program):
+        motion_program.first_line_number = self.next_line_number
+
+        for gcode in motion_program.gcode_lines:
+            self.queue_motion_gcode(gcode)
+
+        self.on_motion_request_queued()
+
+    def queue_relative_position_change(self, x, y, z, a):
         out_string = 'G91 G0'
 
         if x != 0:
@@ -380,10 +620,69 @@ class SerialHandler(QtCore.QThread):
         if a != 0:
             out_string += ' A' + str(a)
 
-        self.serial_out_queue.append(self.convert_to_json({'gc': out_string}))
+        self.queue_motion_gcode(out_string)
+
+    def queue_motion_gcode(self, gcode):
+        self.queue_line(self.convert_to_json({'gc': 'N' + str(self.next_line_number) + ' ' + gcode}))
+        self.last_motion_line_number = self.next_line_number
+        self.next_line_number += 1
+
+    def on_motion_request_queued(self):
+        # Bumped once per request, after all of its lines are queued, so waiters never see half a request
+        self.motion_requests_queued += 1
+        self.state_waiter.notify()
+
+    def on_homing_request_queued(self):
+        # The r for a homing line can come back before any status report says homing started, so don't trust the
+        # current state until the TinyG reports a new one
+        self.tinyg_machine_state = HOMING_STATE
+        self.on_motion_request_queued()
+
+    def is_motion_complete(self, motion_requests_before):
+        if self.motion_requests_queued <= motion_requests_before:
+            return False  # The request hasn't even been queued yet
+
+        if self.tinyg_machine_state not in [PROGRAM_STOP_STATE, PROGRAM_END_STATE]:
+            return False
+
+        return self.is_line_complete(self.last_motion_line_number)
+
+    def is_line_complete(self, target_line_number):
+        if self.tinyg_line_number >= target_line_number:
+            return True
+
+        # Moves that go nowhere never show up in a status report, but they'll have been planned and the queue emptied
+        return ((self.tinyg_acknowledged_line_number >= target_line_number) and
+                (self.tinyg_planner_buffers_available == TINYG_PLANNER_BUFFERS) and
+                (not self.serial_out_queue) and (not self.lines_in_flight))
+
+    def is_sync_point_reached(self, motion_requests_before, motion_program, number_of_lines):
+        if self.motion_requests_queued <= motion_requests_before:
+            return False
+
+        sync_line_number = motion_program.get_line_number_before(number_of_lines)
+
+        # Lines run in order, so once a later line is running every line up to the sync point has finished
+        if self.tinyg_line_number > sync_line_number:
+            return True
+
+        if self.tinyg_machine_state not in [PROGRAM_STOP_STATE, PROGRAM_END_STATE]:
+            return False
+
+        return self.is_line_complete(sync_line_number)
+
+    def wait_for_motion_complete(self, motion_requests_before, timeout_ms=MOTION_COMPLETE_TIMEOUT_MS):
+        return self.state_waiter.wait_for(
+            lambda: (not self.not_abort_flag) or self.is_motion_complete(motion_requests_before), timeout_ms)
+
+    def wait_for_sync_point(self, motion_requests_before, motion_program, number_of_lines,
+                            timeout_ms=MOTION_COMPLETE_TIMEOUT_MS):
+        return self.state_waiter.wait_for(
+            lambda: (not self.not_abort_flag) or self.is_sync_point_reached(motion_requests_before, motion_program,
+                                                                            number_of_lines), timeout_ms)
 
     def on_tinyg_reset_requested_slot(self):
-        self.serial_out_queue.append("^x\n")
+        self.queue_line("^x\n")
 
     @staticmethod
     def convert_to_json(to_send):
@@ -395,6 +694,8 @@ class SerialHandler(QtCore.QThread):
 
     def on_kill_threads_slot(self):
         self.not_abort_flag = False
+        self.state_waiter.notify()
+        self.wake()
 
 
 #####################################
@@ -412,9 +713,9 @@ class PickAndPlateController(QtCore.QThread):
     tinyg_dump_settings_signal = QtCore.pyqtSignal()
     tinyg_motor_state_change_signal = QtCore.pyqtSignal(int)
     tinyg_location_update_signal = QtCore.pyqtSignal(float, float, float, float)
+    tinyg_motion_program_signal = QtCore.pyqtSignal(object)
 
-    controller_command_complete_signal = QtCore.pyqtSignal()
-    controller_init_complete_signal = QtCore.pyqtSignal()
+    motion_program_sync_point_signal = QtCore.pyqtSignal(str)
 
     def __init__(self, main_window):
         QtCore.QThread.__init__(self)
@@ -422,12 +723,12 @@ class PickAndPlateController(QtCore.QThread):
         # ########## Get the Pick And Plate instance of the logger ##########
         self.logger = logging.getLogger("PickAndPlate")
 
-        # ########## Get the Pick And Plate settings instance ##########
-        self.settings = QtCore.QSettings()
-
         # ########## Reference to highest level window ##########
         self.main_window = main_window
 
+        # ########## Get the Pick And Plate settings instance, whose snapshot is read instead of QSettings ##########
+        self.settings_core = self.main_window.settings
+
         # ########## Thread flags ##########
         self.not_abort_flag = True
 
@@ -443,7 +744,29 @@ class PickAndPlateController(QtCore.QThread):
 
         self.tinyg_command_processed = False
 
-        self.command_queue = []
+        self.command_queue = CommandQueue()
+
+        self.response_waiter = ConditionWaiter()
+        self.wakeup_counter = WakeupCounter("Controller")
+        self.command_handlers = {
+            SYSTEM_INITIALIZATION_COMMAND: self.system_initialization_request,
+            INITIAL_HOMING_COMMAND: self.initial_system_homing_request,
+            FULL_HOMING_COMMAND: self.full_system_homing_request,
+            Z_MOVE_ABSOLUTE_COMMAND: self.z_axis_move_request,
+            Z_MOVE_ABSOLUTE_WITH_FEEDRATE_COMMAND: self.z_axis_move_with_feedrate_request,
+            Z_MOVE_RELATIVE_COMMAND: self.z_axis_move_relative_request,
+            Z_HOME_COMMAND: self.z_home_request,
+            X_Y_MOVE_ABSOLUTE_COMMAND: self.x_y_move_request,
+            X_Y_MOVE_ABSOLUTE_WITH_FEEDRATE_COMMAND: self.x_y_move_with_feedrate_request,
+            X_Y_MOVE_RELATIVE_COMMAND: self.x_y_move_relative_request,
+            X_Y_HOME_COMMAND: self.x_y_home_request,
+            X_Y_PRECISION_HOME_COMMAND: self.x_y_axis_precision_home_request,
+            A_MOVE_RELATIVE_COMMAND: self.a_axis_move_request,
+            A_HOME_COMMAND: self.a_axis_home_request,
+            LIGHT_CHANGE_COMMAND: self.light_change_requested,
+            MOTOR_STATE_CHANGE_COMMAND: self.motor_state_change_requested,
+            MOTION_PROGRAM_COMMAND: self.motion_program_request
+        }
 
         self.timing_start_time = 0
         self.timing_stop_time = 0
@@ -467,6 +790,7 @@ class PickAndPlateController(QtCore.QThread):
             self.serial_handler.on_absolute_position_with_feedrate_change_requested_slot)
         self.tinyg_move_relative_signal.connect(self.serial_handler.on_relative_position_change_requested_slot)
         self.tinyg_dump_settings_signal.connect(self.serial_handler.on_dump_tinyg_settings_dump_slot)
+        self.tinyg_motion_program_signal.connect(self.serial_handler.on_motion_program_requested_slot)
 
         # SerialHandler to PickAndPlateController
         self.serial_handler.tinyg_current_location_signal.connect(self.on_tinyg_location_changed_slot)
@@ -477,86 +801,74 @@ class PickAndPlateController(QtCore.QThread):
         self.logger.debug("PickAndPlate Controller Thread Starting...")
 
         self.msleep(350)
-        while not self.tinyg_machine_state == INITIALIZING_STATE:
-            self.msleep(250)
+        while not self.response_waiter.wait_for(lambda: (self.tinyg_machine_state == INITIALIZING_STATE) or
+                                                (not self.not_abort_flag), CONTROLLER_IDLE_WAIT_MS):
+            self.wakeup_counter.count()
 
-        self.command_queue.append({'Command': 'System Initialization'})
+        self.queue_command(SYSTEM_INITIALIZATION_COMMAND)
         self.msleep(1500)
 
         while self.not_abort_flag:
+            current_command = self.command_queue.get()  # Sleeps until a command is queued or the queue is closed
+            self.wakeup_counter.count()
 
-            if self.command_queue:
-                current_command = self.command_queue[0]
-                # self.logger.debug("Command Queue: " + str(self.command_queue))
-                del self.command_queue[0]
-
-                if current_command['Command'] == 'System Initialization':
-                    self.initial_system_homing_request()
-                    self.light_change_requested(0)
-                if current_command['Command'] == 'Initial Homing':
-                    self.initial_system_homing_request()
-                elif current_command['Command'] == 'Full Homing':
-                    self.full_system_homing_request()
-                elif current_command['Command'] == 'Z Move ABS':
-                    self.z_axis_move_request(current_command['Z'])
-                elif current_command['Command'] == 'Z Move ABS w/Feedrate':
-                    self.z_axis_move_with_feedrate_request(current_command['Z'], current_command['F'])
-                elif current_command['Command'] == 'Z Move REL':
-                    self.z_axis_move_relative_request(current_command['Z'])
-                elif current_command['Command'] == 'Z Home':
-                    self.z_home_request(current_command['Type'])
-                elif current_command['Command'] == 'X/Y Move ABS':
-                    self.x_y_move_request(current_command['X'], current_command['Y'])
-                elif current_command['Command'] == 'X/Y Move ABS w/Feedrate':
-                    self.x_y_move_with_feedrate_request(current_command['X'], current_command['Y'],
-                                                        current_command['F'])
-                elif current_command['Command'] == 'X/Y Move REL':
-                    self.x_y_move_relative_request(current_command['X'], current_command['Y'])
-                elif current_command['Command'] == 'X/Y Home':
-                    self.x_y_home_request()
-                elif current_command['Command'] == 'X/Y Precision Home':
-                    self.x_y_axis_precision_home_request()
-                elif current_command['Command'] == 'A Move REL':
-                    self.a_axis_move_request(current_command['uL'])
-                elif current_command['Command'] == 'A Home':
-                    self.a_axis_home_request()
-                elif current_command['Command'] == 'Light Change':
-                    self.light_change_requested(current_command['Brightness'])
-                elif current_command['Command'] == 'Motor State Change':
-                    self.motor_state_change_requested(current_command['State'])
-            else:
-                self.msleep(50)
+            if current_command is None:
+                break
 
-        self.serial_handler.not_abort_flag = False
+            # self.logger.debug("Command: " + COMMAND_NAMES[current_command.command_type])
+            try:
+                self.command_handlers[current_command.command_type](*current_command.arguments)
+            finally:
+                current_command.completion.set_complete()
+
+        # Anyone still waiting on a command that will never run shouldn't have to wait for their timeout
+        self.command_queue.close()
+        for remaining_command in self.command_queue.drain():
+            remaining_command.completion.set_cancelled()
+
+        self.serial_handler.on_kill_threads_slot()
         self.serial_handler.wait()
         self.logger.debug("PickAndPlate Controller Thread Exiting...")
 
+    # ######### Command queueing ##########
+    def queue_command(self, command_type, *arguments):
+        # Safe to call from any thread. Returns a CommandCompletion the caller can wait on for just this command.
+        command = ControllerCommand(command_type, arguments)
+
+        if not self.command_queue.put(command):
+            command.completion.set_cancelled()
+
+        return command.completion
+
     # ######### Methods for general commands / light control ##########
     def on_light_change_request_signal_slot(self, brightness):
-        self.command_queue.append({'Command': 'Light Change', 'Brightness': brightness})
+        self.queue_command(LIGHT_CHANGE_COMMAND, brightness)
 
     def light_change_requested(self, brightness):
         self.tinyg_command_processed = False
         self.tinyg_light_change_signal.emit(brightness)
 
-        while not self.tinyg_command_processed:
-            self.msleep(50)
-
-        self.controller_command_complete_signal.emit()
+        self.wait_for_command_processed()
 
     def on_motor_state_change_request_signal_slot(self, state):
-        self.command_queue.append({'Command': 'Motor State Change', 'State': state})
+        self.queue_command(MOTOR_STATE_CHANGE_COMMAND, state)
 
     def motor_state_change_requested(self, state):
         self.tinyg_command_processed = False
         self.tinyg_motor_state_change_signal.emit(state)
 
-        while not self.tinyg_command_processed:
-            self.msleep(50)
+        self.wait_for_command_processed()
 
-        self.controller_command_complete_signal.emit()
+    def wait_for_command_processed(self):
+        if not self.response_waiter.wait_for(lambda: self.tinyg_command_processed or (not self.not_abort_flag),
+                                             COMMAND_PROCESSED_TIMEOUT_MS):
+            self.logger.error("Timed out waiting for the TinyG to process a command.")
 
     # ######### Methods for all axes ##########
+    def system_initialization_request(self):
+        self.initial_system_homing_request()
+        self.light_change_requested(0)
+
     def initial_system_homing_request(self):
         # self.tinyg_dump_settings_signal.emit()   # HERE TO DUMP TINYG SETTINGS
         self.light_change_requested(1000)
@@ -567,11 +879,13 @@ class PickAndPlateController(QtCore.QThread):
         self.a_axis_move_request(100)
 
     def on_initial_system_homing_requested_slot(self):
-        self.command_queue.append({'Command': 'Initial Homing'})
+        self.queue_command(INITIAL_HOMING_COMMAND)
 
     def full_system_homing_request(self):
-        precision_z_x_center = self.settings.value("system/system_calibration/precision_z_x_center").toFloat()[0]
-        precision_z_y_center = self.settings.value("system/system_calibration/precision_z_y_center").toFloat()[0]
+        settings = self.settings_core.snapshot
+
+        precision_z_x_center = settings.value("system/system_calibration/precision_z_x_center").toFloat()[0]
+        precision_z_y_center = settings.value("system/system_calibration/precision_z_y_center").toFloat()[0]
 
         self.initial_system_homing_request()
 
@@ -587,62 +901,50 @@ class PickAndPlateController(QtCore.QThread):
 
         self.z_axis_move_request(0)
 
-        self.controller_init_complete_signal.emit()
-
     def on_full_system_homing_requested_slot(self):
-        self.command_queue.append({'Command': 'Full Homing'})
+        self.queue_command(FULL_HOMING_COMMAND)
 
     # ######### Z Axis Methods ##########
     def on_z_axis_move_requested_slot(self, z):
         self.timing_start_time = time.time()
-        self.command_queue.append({'Command': 'Z Move ABS', 'Z': z})
+        self.queue_command(Z_MOVE_ABSOLUTE_COMMAND, z)
 
     def on_z_axis_move_with_feedrate_requested_slot(self, z, f):
-        self.command_queue.append({'Command': 'Z Move ABS w/Feedrate', 'Z': z, 'F': f})
+        self.queue_command(Z_MOVE_ABSOLUTE_WITH_FEEDRATE_COMMAND, z, f)
 
     def on_z_axis_move_relative_requested_slot(self, z):
         self.timing_start_time = time.time()
-        self.command_queue.append({'Command': 'Z Move REL', 'Z': z})
+        self.queue_command(Z_MOVE_RELATIVE_COMMAND, z)
 
     def z_axis_move_request(self, z):
+        motion_requests_before = self.serial_handler.motion_requests_queued
         self.tinyg_move_absolute_signal.emit(IGNORE_VALUE, IGNORE_VALUE, z, IGNORE_VALUE)
 
-        self.msleep(350)
-        while self.tinyg_machine_state == MOTION_RUNNING_STATE:
-            self.msleep(50)
-
-        self.controller_command_complete_signal.emit()
+        self.wait_for_motion_complete(motion_requests_before)
 
     def z_axis_move_with_feedrate_request(self, z, f):
+        motion_requests_before = self.serial_handler.motion_requests_queued
         self.tinyg_move_absolute_with_feedrate_signal.emit(IGNORE_VALUE, IGNORE_VALUE, z, IGNORE_VALUE, f)
 
-        self.msleep(350)
-        while self.tinyg_machine_state == MOTION_RUNNING_STATE:
-            self.msleep(50)
-
-        self.controller_command_complete_signal.emit()
+        self.wait_for_motion_complete(motion_requests_before)
 
     def z_axis_move_relative_request(self, z):
+        motion_requests_before = self.serial_handler.motion_requests_queued
         self.tinyg_move_relative_signal.emit(0, 0, z, 0)
 
-        self.msleep(350)
-        while self.tinyg_machine_state == MOTION_RUNNING_STATE:
-            self.msleep(50)
+        self.wait_for_motion_complete(motion_requests_before)
 
         # self.timing_stop_time = time.time()
         # self.logger.info("Z move completed in " + str(self.timing_stop_time-self.timing_start_time) + " seconds.")
-        self.controller_command_complete_signal.emit()
 
     def on_z_axis_homing_requested_slot(self, homing_type):
-        self.command_queue.append({'Command': 'Z Home', 'Type': homing_type})
+        self.queue_command(Z_HOME_COMMAND, homing_type)
 
     def z_home_request(self, homing_type):
+        motion_requests_before = self.serial_handler.motion_requests_queued
         self.tinyg_z_home_signal.emit(homing_type)
-        self.tinyg_machine_state = HOMING_STATE
 
-        self.msleep(350)
-        while self.tinyg_machine_state == HOMING_STATE:
-            self.msleep(50)
+        self.wait_for_motion_complete(motion_requests_before)
 
         self.msleep(1000)
 
@@ -651,107 +953,113 @@ class PickAndPlateController(QtCore.QThread):
         # self.timing_start_time = time.time()
 
         # self.logger.info("Received X_Y at " + str(time.time()) + " seconds.")
-        self.command_queue.append({'Command': 'X/Y Move ABS', 'X': x, 'Y': y})
+        self.queue_command(X_Y_MOVE_ABSOLUTE_COMMAND, x, y)
 
     def on_x_y_axis_move_with_feedrate_requested_slot(self, x, y, f):
         # self.timing_start_time = time.time()
 
         # self.logger.info("Received X_Y at " + str(time.time()) + " seconds.")
-        self.command_queue.append({'Command': 'X/Y Move ABS w/Feedrate', 'X': x, 'Y': y, 'F': f})
+        self.queue_command(X_Y_MOVE_ABSOLUTE_WITH_FEEDRATE_COMMAND, x, y, f)
 
     def on_x_y_axis_move_relative_requested_slot(self, x, y):
         self.timing_start_time = time.time()
-        self.command_queue.append({'Command': 'X/Y Move REL', 'X': x, 'Y': y})
+        self.queue_command(X_Y_MOVE_RELATIVE_COMMAND, x, y)
 
     def x_y_move_request(self, x, y):
+        motion_requests_before = self.serial_handler.motion_requests_queued
         self.tinyg_move_absolute_signal.emit(x, y,
                                              IGNORE_VALUE, IGNORE_VALUE)
 
-        self.msleep(350)
-        while self.tinyg_machine_state == MOTION_RUNNING_STATE:
-            self.msleep(50)
-
-        self.controller_command_complete_signal.emit()
+        self.wait_for_motion_complete(motion_requests_before)
 
     def x_y_move_with_feedrate_request(self, x, y, f):
+        motion_requests_before = self.serial_handler.motion_requests_queued
         self.tinyg_move_absolute_with_feedrate_signal.emit(x, y,
                                                            IGNORE_VALUE, IGNORE_VALUE, f)
 
-        self.msleep(350)
-        while self.tinyg_machine_state == MOTION_RUNNING_STATE:
-            self.msleep(50)
-
-        self.controller_command_complete_signal.emit()
+        self.wait_for_motion_complete(motion_requests_before)
 
     def x_y_move_relative_request(self, x, y):
+        motion_requests_before = self.serial_handler.motion_requests_queued
         self.tinyg_move_relative_signal.emit(x, y, 0, 0)
 
-        self.msleep(350)
-        while self.tinyg_machine_state == MOTION_RUNNING_STATE:
-            self.msleep(50)
-
-        self.controller_command_complete_signal.emit()
+        self.wait_for_motion_complete(motion_requests_before)
 
     def on_x_y_axes_homing_requested_slot(self):
         self.timing_start_time = time.time()
-        self.command_queue.append({'Command': 'X/Y Home'})
+        self.queue_command(X_Y_HOME_COMMAND)
 
     def x_y_home_request(self):
+        motion_requests_before = self.serial_handler.motion_requests_queued
         self.tinyg_x_y_home_signal.emit()
-        self.tinyg_machine_state = HOMING_STATE
 
-        self.msleep(350)
-        while self.tinyg_machine_state == HOMING_STATE:
-            self.msleep(50)
+        self.wait_for_motion_complete(motion_requests_before)
 
         self.msleep(1000)
 
     def on_x_y_axis_precision_home_requested_slot(self):
         self.timing_start_time = time.time()
-        self.command_queue.append({'Command': 'X/Y Precision Home'})
+        self.queue_command(X_Y_PRECISION_HOME_COMMAND)
 
     def x_y_axis_precision_home_request(self):
+        motion_requests_before = self.serial_handler.motion_requests_queued
         self.tinyg_x_y_precision_home_signal.emit()
-        self.tinyg_machine_state = HOMING_STATE
 
-        self.msleep(350)
-        while self.tinyg_machine_state == HOMING_STATE:
-            self.msleep(50)
+        self.wait_for_motion_complete(motion_requests_before)
 
         self.msleep(1000)
 
     # ######### A Axis Methods ##########
     def on_a_axis_move_requested_slot(self, microliters):
         self.timing_start_time = time.time()
-        self.command_queue.append({'Command': 'A Move REL', 'uL': microliters})
+        self.queue_command(A_MOVE_RELATIVE_COMMAND, microliters)
 
     def a_axis_move_request(self, micro_liters):
         move_amount = (MM_PER_UL * micro_liters)
 
+        motion_requests_before = self.serial_handler.motion_requests_queued
         self.tinyg_move_relative_signal.emit(0, 0, 0, move_amount)
 
-        self.msleep(350)
-        while self.tinyg_machine_state == MOTION_RUNNING_STATE:
-            self.msleep(50)
+        self.wait_for_motion_complete(motion_requests_before)
 
         # self.timing_stop_time = time.time()
         # self.logger.info("A move completed in " + str(self.timing_stop_time-self.timing_start_time) + " seconds.")
-        self.controller_command_complete_signal.emit()
 
     def on_a_axis_home_requested_slot(self):
         self.timing_start_time = time.time()
-        self.command_queue.append({'Command': 'A Home'})
+        self.queue_command(A_HOME_COMMAND)
 
     def a_axis_home_request(self):
+        motion_requests_before = self.serial_handler.motion_requests_queued
         self.tinyg_a_home_signal.emit()
-        self.tinyg_machine_state = HOMING_STATE
 
-        self.msleep(350)
-        while self.tinyg_machine_state == HOMING_STATE:
-            self.msleep(50)
+        self.wait_for_motion_complete(motion_requests_before)
 
         self.msleep(1000)
 
+    # ######### Motion Program Methods ##########
+    def on_motion_program_requested_slot(self, motion_program):
+        self.queue_command(MOTION_PROGRAM_COMMAND, motion_program)
+
+    def motion_program_request(self, motion_program):
+        motion_requests_before = self.serial_handler.motion_requests_queued
+        self.tinyg_motion_program_signal.emit(motion_program)
+
+        for name, number_of_lines in motion_program.sync_points:
+            if not self.serial_handler.wait_for_sync_point(motion_requests_before, motion_program, number_of_lines):
+                self.logger.error("Timed out waiting for the TinyG to reach sync point \"" + name + "\".")
+
+            motion_program.sync_point_times[name] = time.time()
+            motion_program.sync_point_locations[name] = (self.tinyg_x_location, self.tinyg_y_location,
+                                                         self.tinyg_z_location, (self.tinyg_a_location / MM_PER_UL))
+            self.motion_program_sync_point_signal.emit(name)
+
+        self.wait_for_motion_complete(motion_requests_before)
+
+    def wait_for_motion_complete(self, motion_requests_before):
+        if not self.serial_handler.wait_for_motion_complete(motion_requests_before):
+            self.logger.error("Timed out waiting for the TinyG to finish moving.")
+
     # ######### Cross thread variable synchronization ##########
     def on_tinyg_location_changed_slot(self, x, y, z, a):
         self.tinyg_x_location = x
@@ -763,9 +1071,11 @@ class PickAndPlateController(QtCore.QThread):
 
     def on_tinyg_machine_state_changed_slot(self, state):
         self.tinyg_machine_state = state
+        self.response_waiter.notify()
 
     def on_tinyg_command_processed_successfully_slot(self):
         self.tinyg_command_processed = True
+        self.response_waiter.notify()
 
     def broadcast_location_slot(self):
         self.tinyg_location_update_signal.emit(self.tinyg_x_location, self.tinyg_y_location, self.tinyg_z_location,
@@ -774,3 +1084,6 @@ class PickAndPlateController(QtCore.QThread):
     # ######### Program End Kill Thread Method ##########
     def on_kill_threads_slot(self):
         self.not_abort_flag = False
+        self.command_queue.close()
+        self.response_waiter.notify()
+        self.serial_handler.on_kill_threads_slot()  # Also wakes this thread if it's waiting on a move
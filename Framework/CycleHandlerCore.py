@@ -37,9 +37,22 @@ from math import sqrt, pow
 import qimage2ndarray
 import cv2
 import time
-from random import randint, choice
 
 # Custom imports
+from Framework.EmbryoCore import EmbryoSet
+from Framework.MailboxCore import LatestValueMailbox
+from Framework.WaitCore import ConditionWaiter
+from Framework.WakeupCore import WakeupCounter
+from Framework.PickPlannerCore import PickPlanner, count_within, PICK_DISTURBANCE_RADIUS_MM
+from Framework.DetectionCore import VERIFY_TOLERANCE_PX
+from Framework.TimingCore import PhaseTimings, RollingHistogram
+from Framework.TelemetryCore import TelemetryRecorder, TelemetryRecord, PHASE_CYCLE_START, PHASE_IMAGE_READY, \
+    PHASE_PROGRAM_START, PHASE_OVER_EMBRYO, PHASE_AT_PICK_DEPTH, PHASE_ASPIRATED, PHASE_RAISED, PHASE_CAMERA_CLEAR, \
+    PHASE_AT_PLACE_DEPTH, PHASE_PLACED, PHASE_OVER_WASTE, PHASE_PROGRAM_DONE, IMAGE_FULL_DETECTION, \
+    IMAGE_TARGET_VERIFIED, OUTCOME_PLATED, OUTCOME_MISPICK, OUTCOME_DOUBLE_PICK
+from Framework.ControllerCore import MotionProgram, FULL_HOMING_COMMAND, X_Y_MOVE_ABSOLUTE_COMMAND, \
+    X_Y_MOVE_ABSOLUTE_WITH_FEEDRATE_COMMAND, Z_MOVE_ABSOLUTE_COMMAND, Z_MOVE_ABSOLUTE_WITH_FEEDRATE_COMMAND, \
+    A_MOVE_RELATIVE_COMMAND, LIGHT_CHANGE_COMMAND, MOTOR_STATE_CHANGE_COMMAND, MOTION_PROGRAM_COMMAND
 
 #####################################
 # Global Variables
@@ -58,22 +71,54 @@ SIZE_VAL = 2
 
 CAL_PIPETTE_DIAMETER = 1.98  # Diameter in mm for the calibration pipette
 
+WELL_SPACING_MM = 9
+PLATE_ROWS = 8
+PLATE_COLUMNS = 12
+PLATE_WELLS = PLATE_ROWS * PLATE_COLUMNS
+
+OVER_EMBRYO_SYNC_POINT = "Over Embryo"
+AT_PICK_DEPTH_SYNC_POINT = "At Pick Depth"
+ASPIRATED_SYNC_POINT = "Aspirated"
+RAISED_SYNC_POINT = "Raised"
+CAMERA_CLEAR_SYNC_POINT = "Camera Clear"
+AT_PLACE_DEPTH_SYNC_POINT = "At Place Depth"
+PLACED_SYNC_POINT = "Placed"
+OVER_WASTE_SYNC_POINT = "Over Waste"
+
+# Telemetry phase each sync point in the pick program marks
+SYNC_POINT_PHASES = [(OVER_EMBRYO_SYNC_POINT, PHASE_OVER_EMBRYO), (AT_PICK_DEPTH_SYNC_POINT, PHASE_AT_PICK_DEPTH),
+                     (ASPIRATED_SYNC_POINT, PHASE_ASPIRATED), (RAISED_SYNC_POINT, PHASE_RAISED),
+                     (CAMERA_CLEAR_SYNC_POINT, PHASE_CAMERA_CLEAR), (AT_PLACE_DEPTH_SYNC_POINT, PHASE_AT_PLACE_DEPTH),
+                     (PLACED_SYNC_POINT, PHASE_PLACED), (OVER_WASTE_SYNC_POINT, PHASE_OVER_WASTE)]
+
+# Timed spans of a pick, as (name, starting phase, ending phase)
+PHASE_SPANS = [("Detection Wait", PHASE_CYCLE_START, PHASE_IMAGE_READY),
+               ("Planning", PHASE_IMAGE_READY, PHASE_PROGRAM_START),
+               ("XY Traverse", PHASE_PROGRAM_START, PHASE_OVER_EMBRYO),
+               ("Z Down", PHASE_OVER_EMBRYO, PHASE_AT_PICK_DEPTH),
+               ("Aspirate", PHASE_AT_PICK_DEPTH, PHASE_ASPIRATED),
+               ("Z Up", PHASE_ASPIRATED, PHASE_RAISED),
+               ("Timed Transit", PHASE_RAISED, PHASE_CAMERA_CLEAR),
+               ("Place Z Down", PHASE_CAMERA_CLEAR, PHASE_AT_PLACE_DEPTH),
+               ("Dispense Dwell", PHASE_AT_PLACE_DEPTH, PHASE_PLACED),
+               ("To Waste", PHASE_PLACED, PHASE_OVER_WASTE),
+               ("Waste Purge", PHASE_OVER_WASTE, PHASE_PROGRAM_DONE)]
+
+IMAGE_REQUEST_RESEND_MS = 100
+
+PAUSED_REFRESH_MS = 1000  # How often the monitor image and motor hold get refreshed while paused
+CYCLE_IDLE_WAIT_MS = 60000  # Every state change notifies, this only bounds how long a missed one could go unnoticed
+
+CONTROLLER_COMMAND_TIMEOUT_MS = 300000  # Includes time spent queued behind other commands, such as a full homing
+
 
 #####################################
 # PickAndPlateController Definition
 #####################################
 class PickAndPlateCycleHandler(QtCore.QThread):
-    full_system_home_request_signal = QtCore.pyqtSignal()
-    x_y_move_request_signal = QtCore.pyqtSignal(float, float)
-    x_y_move_request_with_feedrate_signal = QtCore.pyqtSignal(float, float, float)
-    z_move_request_signal = QtCore.pyqtSignal(float)
-    z_move_with_feedrate_request_signal = QtCore.pyqtSignal(float, float)
-    a_move_request_signal = QtCore.pyqtSignal(int)
-    light_change_signal = QtCore.pyqtSignal(int)
-    motor_state_change_signal = QtCore.pyqtSignal(int)
-
     cycle_run_state_change_signal = QtCore.pyqtSignal(bool, str)
-    cycle_run_image_request_signal = QtCore.pyqtSignal()
+    cycle_run_image_request_signal = QtCore.pyqtSignal(float)
+    cycle_run_target_verify_request_signal = QtCore.pyqtSignal(float, float, float)
     interface_cycle_stop_signal = QtCore.pyqtSignal()
 
     wait_for_embryos_msg_box_show_signal = QtCore.pyqtSignal()
@@ -84,6 +129,7 @@ class PickAndPlateCycleHandler(QtCore.QThread):
 
     pick_images_ready_signal = QtCore.pyqtSignal()
     pick_positions_ready_signal = QtCore.pyqtSignal(float, float)
+    cycle_stats_ready_signal = QtCore.pyqtSignal()
 
     def __init__(self, main_window):
         QtCore.QThread.__init__(self)
@@ -91,12 +137,12 @@ class PickAndPlateCycleHandler(QtCore.QThread):
         # ########## Get the Pick And Plate instance of the logger ##########
         self.logger = logging.getLogger("PickAndPlate")
 
-        # ########## Get the Pick And Plate settings instance ##########
-        self.settings = QtCore.QSettings()
-
         # ########## Reference to highest level window ##########
         self.main_window = main_window
 
+        # ########## Get the Pick And Plate settings instance, whose snapshot is read instead of QSettings ##########
+        self.settings_core = self.main_window.settings
+
         # ########## Thread flags ##########
         self.not_abort_flag = True
         self.cycle_running_flag = False
@@ -106,8 +152,7 @@ class PickAndPlateCycleHandler(QtCore.QThread):
         # ########## Class Variables ##########
         self.cycle_paused = False
 
-        self.controller_command_complete = False
-        self.init_command_complete = False
+        self.controller = self.main_window.controller
 
         self.tinyg_x_location = 0
         self.tinyg_y_location = 0
@@ -147,22 +192,28 @@ class PickAndPlateCycleHandler(QtCore.QThread):
         self.cycle_monitor_qimage = None
         self.last_pick_qimage = None
         self.current_pick_qimage = None
+        self.pick_images_mailbox = LatestValueMailbox()
 
         self.full_run_keypoints_array = []
         self.current_frame_keypoints = None
-        self.current_frame_valid = None
-        self.current_frame_pickable = None
+        self.current_frame_embryos = EmbryoSet()
+        self.pick_planner = PickPlanner()
+        self.next_pick_target = None  # Chosen from the last detection, and only checked by video instead of re-detected
+        self.verify_result = None
 
         self.cur_plate_x = None
         self.cur_plate_y = None
 
         self.data_received = False
+        self.image_request_not_before = 0.0
+        self.image_waiter = ConditionWaiter()
+        self.state_waiter = ConditionWaiter()
+
+        self.wakeup_counter = WakeupCounter("Cycle Handler")
 
         self.button_state = BUTTON_WAIT
         self.no_embryo_count = 0
 
-        self.pick_images_displayed = False
-
         # Statistical variables
         self.current_pick_number = 0
         self.total_plated = 0
@@ -173,10 +224,27 @@ class PickAndPlateCycleHandler(QtCore.QThread):
         self.time_remaining = 0
         self.success_rate = 0
 
+        # Picks waiting on the next full detection to find out how they went
+        # (telemetry record number, pick number, x px, y px, embryos within the disturbance radius before the pick)
+        self.pending_pick_checks = []
+        self.evaluated_picks = 0
+
+        self.telemetry_recorder = TelemetryRecorder()
+
+        self.phase_timings = PhaseTimings()
+        self.well_times = RollingHistogram()  # Seconds from one well being filled to the next, pauses and all
+        self.last_well_done_time = None
+        self.embryos_per_minute = 0
+
+        self.cycle_stats_mailbox = LatestValueMailbox()
+
         # Timing variables
         self.start_time = 0
         self.stop_time = 0
 
+        self.detection_wait_total = 0
+        self.detection_wait_count = 0
+
         # ########## Make signal/slot connections ##########
         self.connect_signals_to_slots()
 
@@ -184,30 +252,19 @@ class PickAndPlateCycleHandler(QtCore.QThread):
         self.start()
 
     def connect_signals_to_slots(self):
-        # CycleHandler to Controller
-        self.x_y_move_request_signal.connect(self.main_window.controller.on_x_y_axis_move_requested_slot)
-        self.x_y_move_request_with_feedrate_signal.connect(
-            self.main_window.controller.on_x_y_axis_move_with_feedrate_requested_slot)
-        self.z_move_request_signal.connect(self.main_window.controller.on_z_axis_move_requested_slot)
-        self.z_move_with_feedrate_request_signal.connect(
-            self.main_window.controller.on_z_axis_move_with_feedrate_requested_slot)
-        self.a_move_request_signal.connect(self.main_window.controller.on_a_axis_move_requested_slot)
-        self.full_system_home_request_signal.connect(self.main_window.controller.on_full_system_homing_requested_slot)
-        self.light_change_signal.connect(self.main_window.controller.on_light_change_request_signal_slot)
-        self.motor_state_change_signal.connect(self.main_window.controller.on_motor_state_change_request_signal_slot)
-
         # Controller to Cycle Handler
         self.main_window.controller.tinyg_location_update_signal.connect(self.on_system_location_changed_slot)
-        self.main_window.controller.controller_init_complete_signal.connect(self.on_init_command_completed_slot)
-        self.main_window.controller.controller_command_complete_signal.connect(
-            self.on_controller_command_completed_slot)
+        self.main_window.controller.motion_program_sync_point_signal.connect(self.on_motion_program_sync_point_slot)
 
         # VideoCore to CycleHandler
         self.main_window.video.requested_image_ready_signal.connect(self.on_video_requested_image_ready_slot)
+        self.main_window.video.target_verified_signal.connect(self.on_video_target_verified_slot)
 
         # CycleHandler to VideoCore
         self.cycle_run_state_change_signal.connect(self.main_window.video.cycle_run_changed_slot)
         self.cycle_run_image_request_signal.connect(self.main_window.video.on_cycle_run_image_requested_slot)
+        self.cycle_run_target_verify_request_signal.connect(
+            self.main_window.video.on_cycle_run_target_verify_requested_slot)
 
         # CycleHandler MessageBox Signals/Slots
         self.wait_for_embryos_msg_box_show_signal.connect(self.on_wait_for_embryo_placement_slot)
@@ -219,6 +276,8 @@ class PickAndPlateCycleHandler(QtCore.QThread):
     def run(self):
         self.logger.debug("PickAndPlate Cycle Handler Thread Starting...")
         while self.not_abort_flag:
+            self.wakeup_counter.count()
+
             if self.cycle_running_flag:
                 if self.cycle_init_flag:
                     self.run_cycle_init()
@@ -234,35 +293,64 @@ class PickAndPlateCycleHandler(QtCore.QThread):
                     self.run_main_pick_and_plate_cycle()
 
             else:
-                self.msleep(250)
+                self.state_waiter.wait_for(lambda: self.cycle_running_flag or (not self.not_abort_flag),
+                                           CYCLE_IDLE_WAIT_MS)
+
+        self.telemetry_recorder.close()
 
         self.logger.debug("PickAndPlate Cycle Handler Thread Exiting...")
 
     def run_main_pick_and_plate_cycle(self):
-        while self.cycle_paused:
-            self.cycle_run_image_request_signal.emit()
+        while self.cycle_paused and not self.cycle_end_flag and self.not_abort_flag:
+            self.request_cycle_run_image()
             self.set_motors(True)
-            self.msleep(100)
+            self.state_waiter.wait_for(lambda: (not self.cycle_paused) or self.cycle_end_flag or
+                                       (not self.not_abort_flag), PAUSED_REFRESH_MS)
+
+        if self.cycle_paused:
+            return  # Stopped while paused, so let the cycle end without making another pick
 
-        while not self.data_received:
-            self.cycle_run_image_request_signal.emit()
+        telemetry_record = TelemetryRecord()
+        self.set_telemetry_phase(telemetry_record, PHASE_CYCLE_START)
+
+        # Detection normally finished while the last placement and rinse were running, so this is usually no wait at all
+        detection_wait_start = time.time()
+
+        while not self.image_waiter.wait_for(lambda: self.data_received, IMAGE_REQUEST_RESEND_MS):
+            self.resend_image_request()
             self.set_motors(True)
-            self.msleep(100)
 
-        if self.current_frame_pickable:
-            # FIXME: Change embryo choice to be from center of dish outwards. This requires sorting.
-            rand_embryo = randint(0, len(self.current_frame_pickable) - 1)
-            embryo_x_px = self.current_frame_pickable[rand_embryo][X_VAL]
-            embryo_y_px = self.current_frame_pickable[rand_embryo][Y_VAL]
+        self.record_detection_wait(time.time() - detection_wait_start)
+        self.set_telemetry_phase(telemetry_record, PHASE_IMAGE_READY)
+
+        if self.verify_result is None:
+            # Only a full detection shows every embryo, so it's what tells how the picks since the last one went
+            self.evaluate_pending_picks()
+            self.total_detected = self.current_frame_embryos.number_valid()
+
+            # A full detection came back, so start a new working list from it
+            self.pick_planner.set_embryo_set(self.current_frame_embryos)
+            telemetry_record.image_type = IMAGE_FULL_DETECTION
+
+            # Cheapest embryo to go after given where the head is now and the well it's headed to next
+            pick_target = self.pick_planner.choose_next_target(self.tinyg_x_location, self.tinyg_y_location,
+                                                               self.cur_plate_x, self.cur_plate_y)
+        else:
+            telemetry_record.image_type = IMAGE_TARGET_VERIFIED
+            pick_target = self.get_verified_pick_target()
+
+            if pick_target is None:
+                self.request_next_image()
+                return
+
+        if pick_target is not None:
+            embryo_x_px, embryo_y_px, embryo_x, embryo_y = pick_target
 
             # self.logger.info("Center X: " + str(self.dish_center_px_x) + "\tX: " + str(embryo_x_px))
             # self.logger.info("Center Y: " + str(self.dish_center_px_y) + "\tY: " + str(embryo_y_px))
 
             self.no_embryo_count = 0
 
-            embryo_x = (self.dish_x - ((embryo_x_px - self.dish_center_px_x) * self.mm_per_px))
-            embryo_y = (self.dish_y + ((embryo_y_px - self.dish_center_px_y) * self.mm_per_px))
-
             self.pick_positions_ready_signal.emit(embryo_x, embryo_y)
             self.make_current_and_last_pick_images(embryo_x_px, embryo_y_px)
 
@@ -270,62 +358,93 @@ class PickAndPlateCycleHandler(QtCore.QThread):
             pick_height_actual = self.pick_height + self.dish_min
             place_depth_actual = self.place_height + self.plate_min
 
+            # The whole pick, place, and rinse sequence goes to the controller as one program so the TinyG can run it
+            # without stopping to wait on this thread between moves
+            motion_program = MotionProgram()
+
             # Move up and over to found embryo co-ordinates
-            self.move_z(self.z_traverse_height)
-            self.move_x_y(embryo_x, embryo_y)
+            motion_program.move_z(self.z_traverse_height)
+            motion_program.move_x_y(embryo_x, embryo_y)
+            motion_program.sync_point(OVER_EMBRYO_SYNC_POINT)
 
             # Move to pick depth, suck up embryo, and move back up
-            self.move_z(pick_height_actual)
-            self.move_a(self.pick_volume)
+            motion_program.move_z(pick_height_actual)
+            motion_program.sync_point(AT_PICK_DEPTH_SYNC_POINT)
+            motion_program.move_a(self.pick_volume)
+            motion_program.sync_point(ASPIRATED_SYNC_POINT)
 
             # Calculate timing for movement
             z_seconds_pick = (abs(pick_height_actual - self.z_traverse_height) / self.z_vel) * 60
             z_seconds_place = (abs(place_depth_actual - self.z_traverse_height) / self.z_vel) * 60
             x_y_time_needed = self.e_fall_time - z_seconds_pick - z_seconds_place
+            x_y_feedrate = self.get_timed_feedrate(embryo_x, embryo_y, self.cur_plate_x, self.cur_plate_y,
+                                                   x_y_time_needed)
 
             # Move to the next unused well on the plate, then go down and drop embryo, all with timing
-            self.move_z_fixed_feedrate(self.z_traverse_height, self.z_vel)
-            self.move_x_y_timed(self.cur_plate_x, self.cur_plate_y, x_y_time_needed)
-            self.move_z_fixed_feedrate(place_depth_actual, self.z_vel)
+            motion_program.move_z(self.z_traverse_height, self.z_vel)
+            motion_program.sync_point(RAISED_SYNC_POINT)
+            motion_program.move_x_y(self.cur_plate_x, self.cur_plate_y, x_y_feedrate)
+
+            # The head is out of the camera's view over the plate, so the next image can be taken and run through
+            # detection while the placement and rinse below are still going
+            motion_program.sync_point(CAMERA_CLEAR_SYNC_POINT)
+
+            motion_program.move_z(place_depth_actual, self.z_vel)
+            motion_program.sync_point(AT_PLACE_DEPTH_SYNC_POINT)
 
             # For chorionated embryos, I need to disperse at least 15uL of liquid into the plate
             # I also need to account for this in my waste cycle otherwise things will break
             if self.run_embryo_type == "Dechorionated":
-                self.msleep(self.placement_dwell)
+                motion_program.dwell(self.placement_dwell)
+                motion_program.sync_point(PLACED_SYNC_POINT)
 
                 # Move pick head back up and to the waste container
-                self.move_z(self.z_traverse_height)
-                self.move_x_y(self.waste_x, self.waste_y)
-
-                # Now that we're at the waste container, start looking for a new image
-                self.cycle_run_image_request_signal.emit()
-                self.data_received = False
+                motion_program.move_z(self.z_traverse_height)
+                motion_program.move_x_y(self.waste_x, self.waste_y)
+                motion_program.sync_point(OVER_WASTE_SYNC_POINT)
 
                 # Move down in waste and dispel any extra fluid
-                # self.move_z(-5)
-                self.move_a(-(self.pick_volume + 90))
+                # motion_program.move_z(-5)
+                motion_program.move_a(-(self.pick_volume + 90))
             else:
 
-                self.move_a(-self.place_volume)
-                self.msleep(self.placement_dwell)
+                motion_program.move_a(-self.place_volume)
+                motion_program.dwell(self.placement_dwell)
+                motion_program.sync_point(PLACED_SYNC_POINT)
 
                 # Move pick head back up and to the waste container
-                self.move_z(self.z_traverse_height)
-                self.move_x_y(self.waste_x, self.waste_y)
-
-                # Now that we're at the waste container, start looking for a new image
-                self.cycle_run_image_request_signal.emit()
-                self.data_received = False
+                motion_program.move_z(self.z_traverse_height)
+                motion_program.move_x_y(self.waste_x, self.waste_y)
+                motion_program.sync_point(OVER_WASTE_SYNC_POINT)
 
                 # Move down in waste and dispel any extra fluid
-                # self.move_z(-5)
-                self.move_a(-(self.pick_volume - self.place_volume + 90))
+                # motion_program.move_z(-5)
+                motion_program.move_a(-(self.pick_volume - self.place_volume + 90))
+
+            motion_program.move_a(90)
+            motion_program.move_z(self.z_traverse_height)
 
-            self.move_a(90)
-            self.move_z(self.z_traverse_height)
+            self.fill_telemetry_pick_details(telemetry_record, embryo_x_px, embryo_y_px, embryo_x, embryo_y)
 
             self.advance_plate_well()
 
+            # Embryos near this one may get moved by the pick. Unless the list has run dry or been trusted for too
+            # many picks, the next target comes from it and the camera clear sync point only has video check it.
+            self.pick_planner.on_target_picked(embryo_x, embryo_y)
+
+            if not self.pick_planner.needs_redetection():
+                self.next_pick_target = self.pick_planner.choose_next_target(self.waste_x, self.waste_y,
+                                                                             self.cur_plate_x, self.cur_plate_y)
+
+            self.set_telemetry_phase(telemetry_record, PHASE_PROGRAM_START)
+            self.run_motion_program(motion_program)
+            self.set_telemetry_phase(telemetry_record, PHASE_PROGRAM_DONE)
+
+            for sync_point_name, phase in SYNC_POINT_PHASES:
+                self.set_telemetry_sync_point_phase(telemetry_record, phase, motion_program, sync_point_name)
+
+            self.on_pick_complete(telemetry_record, embryo_x_px, embryo_y_px)
+
         else:
             self.no_embryo_count += 1
             self.data_received = False
@@ -355,7 +474,9 @@ class PickAndPlateCycleHandler(QtCore.QThread):
         self.wait_for_embryos_msg_box_decision_signal.emit(BUTTON_CONTINUE)
 
     def advance_plate_well(self):
-        plating_order = self.settings.value("quick_settings/plating_order").toString()
+        settings = self.settings_core.snapshot
+
+        plating_order = settings.value("quick_settings/plating_order").toString()
 
         if plating_order == "Rows":
             if (self.cur_plate_y + 9) > (self.a1_y + (11 * 9)):
@@ -377,6 +498,127 @@ class PickAndPlateCycleHandler(QtCore.QThread):
             if self.cur_plate_y > (self.a1_y + (11 * 9)):
                 self.cycle_end_flag = True
 
+    def get_well_number(self):
+        # Zero based, counted across each row in turn, whatever order the plate is being filled in
+        row = int(round((self.cur_plate_x - self.a1_x) / WELL_SPACING_MM))
+        column = int(round((self.cur_plate_y - self.a1_y) / WELL_SPACING_MM))
+
+        return (row * PLATE_COLUMNS) + column
+
+    # ######### Pick Telemetry and Statistics Methods ###########
+    def set_telemetry_phase(self, telemetry_record, phase):
+        telemetry_record.set_phase(phase, time.time(), self.tinyg_x_location, self.tinyg_y_location,
+                                   self.tinyg_z_location, self.tinyg_a_location)
+
+    @staticmethod
+    def set_telemetry_sync_point_phase(telemetry_record, phase, motion_program, sync_point_name):
+        # Stamped by the controller thread the moment the sync point was reached, rather than whenever this thread
+        # got around to noticing
+        if sync_point_name in motion_program.sync_point_times:
+            x, y, z, a = motion_program.sync_point_locations[sync_point_name]
+            telemetry_record.set_phase(phase, motion_program.sync_point_times[sync_point_name], x, y, z, a)
+
+    def get_disturbance_radius_px(self):
+        return (PICK_DISTURBANCE_RADIUS_MM / self.mm_per_px) if self.mm_per_px else 0
+
+    def count_embryos_near(self, x_px, y_px, radius_px):
+        return count_within(self.current_frame_embryos.get_valid()[:, :2], x_px, y_px, radius_px)
+
+    def fill_telemetry_pick_details(self, telemetry_record, embryo_x_px, embryo_y_px, embryo_x, embryo_y):
+        telemetry_record.run_start_time = self.start_time
+        telemetry_record.well_number = self.get_well_number()
+
+        telemetry_record.target_x_px = embryo_x_px
+        telemetry_record.target_y_px = embryo_y_px
+        telemetry_record.target_x_mm = embryo_x
+        telemetry_record.target_y_mm = embryo_y
+        telemetry_record.well_x_mm = self.cur_plate_x
+        telemetry_record.well_y_mm = self.cur_plate_y
+
+        telemetry_record.embryos_detected = self.current_frame_embryos.number_valid()
+        telemetry_record.embryos_pickable = self.current_frame_embryos.number_pickable()
+        telemetry_record.targets_remaining = self.pick_planner.number_remaining()
+        telemetry_record.neighbors_before = self.count_embryos_near(embryo_x_px, embryo_y_px,
+                                                                    self.get_disturbance_radius_px())
+
+    def on_pick_complete(self, telemetry_record, embryo_x_px, embryo_y_px):
+        self.current_pick_number += 1
+        self.time_elapsed = time.time() - self.start_time
+
+        telemetry_record.pick_number = self.current_pick_number
+        record_number = self.telemetry_recorder.append(telemetry_record)
+
+        self.pending_pick_checks.append((record_number, self.current_pick_number, embryo_x_px, embryo_y_px,
+                                         telemetry_record.neighbors_before))
+
+        self.record_pick_timings(telemetry_record)
+        self.publish_cycle_stats()
+
+    def record_pick_timings(self, telemetry_record):
+        for span_name, start_phase, end_phase in PHASE_SPANS:
+            start_time = telemetry_record.phase_times[start_phase]
+            end_time = telemetry_record.phase_times[end_phase]
+
+            # A sync point that timed out never got a time
+            if start_time and end_time:
+                self.phase_timings.add(span_name, end_time - start_time)
+
+        done_time = telemetry_record.phase_times[PHASE_PROGRAM_DONE]
+        if self.last_well_done_time is None:
+            self.well_times.add(done_time - telemetry_record.phase_times[PHASE_CYCLE_START])
+        else:
+            self.well_times.add(done_time - self.last_well_done_time)
+        self.last_well_done_time = done_time
+
+        # Both come from the recent well rate, so they follow the machine as it speeds up or slows down over a run
+        seconds_per_well = self.well_times.get_mean()
+        self.embryos_per_minute = (60 / seconds_per_well) if seconds_per_well > 0 else 0
+        self.time_remaining = seconds_per_well * max(0, PLATE_WELLS - self.current_pick_number)
+
+    def publish_cycle_stats(self):
+        cycle_stats = {
+            "current_pick_number": self.current_pick_number,
+            "total_plated": self.total_plated,
+            "mispicks": self.mispicks,
+            "double_picks": self.double_picks,
+            "total_detected": self.total_detected,
+            "time_elapsed": self.time_elapsed,
+            "time_remaining": self.time_remaining,
+            "success_rate": self.success_rate if self.evaluated_picks else None,
+            "embryos_per_minute": self.embryos_per_minute
+        }
+
+        if self.cycle_stats_mailbox.put(cycle_stats):
+            self.cycle_stats_ready_signal.emit()
+
+    def evaluate_pending_picks(self):
+        # An embryo still sitting where the target was is a mispick. Otherwise, if more than the target itself is gone
+        # from around it, a neighbor most likely went up the pipette with it.
+        disturbance_radius_px = self.get_disturbance_radius_px()
+
+        for record_number, pick_number, x_px, y_px, neighbors_before in self.pending_pick_checks:
+            if self.count_embryos_near(x_px, y_px, VERIFY_TOLERANCE_PX):
+                outcome = OUTCOME_MISPICK
+                self.mispicks += 1
+                self.logger.debug("Pick " + str(pick_number) + " looks to have been a mispick.")
+            elif (neighbors_before - self.count_embryos_near(x_px, y_px, disturbance_radius_px)) >= 2:
+                outcome = OUTCOME_DOUBLE_PICK
+                self.double_picks += 1
+                self.total_plated += 1
+                self.logger.debug("Pick " + str(pick_number) + " looks to have been a double pick.")
+            else:
+                outcome = OUTCOME_PLATED
+                self.total_plated += 1
+
+            self.evaluated_picks += 1
+            self.telemetry_recorder.update_outcome(record_number, outcome)
+
+        self.pending_pick_checks = []
+
+        if self.evaluated_picks:
+            single_picks = self.evaluated_picks - self.mispicks - self.double_picks
+            self.success_rate = (single_picks * 100.0) / self.evaluated_picks
+
     # ######### Handling for no more embryos ###########
     def check_if_no_embryos(self):
         run_once = True
@@ -433,67 +675,49 @@ class PickAndPlateCycleHandler(QtCore.QThread):
         self.button_state = decision
 
     # ######### Movement and Controller Methods ###########
+    # Each request waits on the completion for its own command, so commands queued from the calibration tabs at the
+    # same time can't be mistaken for the cycle's
     def move_x_y(self, x, y):
-        # start = time.time()
-        self.controller_command_complete = False
-        self.x_y_move_request_signal.emit(x, y)
-        while not self.controller_command_complete:
-            # self.logger.info("Waiting for x_y")
-            self.msleep(150)
+        self.wait_for_controller_command(self.controller.queue_command(X_Y_MOVE_ABSOLUTE_COMMAND, x, y))
 
     def move_x_y_timed(self, x, y, seconds):
-        self.controller_command_complete = False
-
-        delta_x = abs(x - self.tinyg_x_location)
-        delta_y = abs(y - self.tinyg_y_location)
+        feedrate = self.get_timed_feedrate(self.tinyg_x_location, self.tinyg_y_location, x, y, seconds)
 
-        feedrate = (sqrt(pow(delta_x, 2) + pow(delta_y, 2)) / seconds) * 60  # Feedrate is in mm/min
-
-        self.x_y_move_request_with_feedrate_signal.emit(x, y, feedrate)
-        while not self.controller_command_complete:
-            self.msleep(150)
+        self.wait_for_controller_command(
+            self.controller.queue_command(X_Y_MOVE_ABSOLUTE_WITH_FEEDRATE_COMMAND, x, y, feedrate))
 
     def move_z(self, z):
-        self.controller_command_complete = False
-        self.z_move_request_signal.emit(z)
-        while not self.controller_command_complete:
-            # self.logger.info("Waiting for z")
-            self.msleep(150)
+        self.wait_for_controller_command(self.controller.queue_command(Z_MOVE_ABSOLUTE_COMMAND, z))
 
     def move_z_fixed_feedrate(self, z, feedrate):
-        self.controller_command_complete = False
-
-        self.z_move_with_feedrate_request_signal.emit(z, feedrate)
-        while not self.controller_command_complete:
-            self.msleep(150)
+        self.wait_for_controller_command(
+            self.controller.queue_command(Z_MOVE_ABSOLUTE_WITH_FEEDRATE_COMMAND, z, feedrate))
 
     def move_a(self, a):
-        self.controller_command_complete = False
-        self.a_move_request_signal.emit(a)
-        while not self.controller_command_complete:
-            # self.logger.info("Waiting for a")
-            self.msleep(150)
+        self.wait_for_controller_command(self.controller.queue_command(A_MOVE_RELATIVE_COMMAND, a))
 
     def set_lights(self, brightness):
-        self.controller_command_complete = False
-        self.light_change_signal.emit(brightness)
-        while not self.controller_command_complete:
-            # self.logger.info("Waiting for lights")
-            self.msleep(150)
+        self.wait_for_controller_command(self.controller.queue_command(LIGHT_CHANGE_COMMAND, brightness))
 
     def set_motors(self, state):
-        self.controller_command_complete = False
-        self.motor_state_change_signal.emit(state)
-        while not self.controller_command_complete:
-            # self.logger.info("Waiting for lights")
-            self.msleep(150)
+        self.wait_for_controller_command(self.controller.queue_command(MOTOR_STATE_CHANGE_COMMAND, state))
+
+    def run_motion_program(self, motion_program):
+        self.wait_for_controller_command(self.controller.queue_command(MOTION_PROGRAM_COMMAND, motion_program))
+
+    @staticmethod
+    def get_timed_feedrate(start_x, start_y, x, y, seconds):
+        delta_x = abs(x - start_x)
+        delta_y = abs(y - start_y)
+
+        return (sqrt(pow(delta_x, 2) + pow(delta_y, 2)) / seconds) * 60  # Feedrate is in mm/min
 
     def run_hardware_init(self):
-        self.init_command_complete = False
-        self.full_system_home_request_signal.emit()
-        while not self.init_command_complete:
-            # self.logger.info("Waiting for init complete")
-            self.msleep(150)
+        self.wait_for_controller_command(self.controller.queue_command(FULL_HOMING_COMMAND))
+
+    def wait_for_controller_command(self, completion):
+        if not completion.wait(CONTROLLER_COMMAND_TIMEOUT_MS) and not completion.is_complete():
+            self.logger.error("Timed out waiting for the controller to finish a command.")
 
     # ######### Image Methods ###########
     def make_current_and_last_pick_images(self, embryo_x, embryo_y):
@@ -504,13 +728,9 @@ class PickAndPlateCycleHandler(QtCore.QThread):
         cv2.line(current_pick_raw, (150 / 2, 0), (150 / 2, 150), (255, 0, 0), 1)
         self.current_pick_qimage = self.convert_to_qimage(current_pick_raw)
 
-        self.pick_images_displayed = False
-        self.pick_images_ready_signal.emit()
-        while not self.pick_images_displayed:
-            self.msleep(50)
-
-    def on_pick_images_displayed_slot(self):
-        self.pick_images_displayed = True
+        # The gui shows whichever pair is newest when it gets to it, the cycle never waits on the repaint
+        if self.pick_images_mailbox.put((self.last_pick_qimage, self.current_pick_qimage)):
+            self.pick_images_ready_signal.emit()
 
     @staticmethod
     def convert_to_qimage(input_matrix):
@@ -531,9 +751,11 @@ class PickAndPlateCycleHandler(QtCore.QThread):
 
     # #########  ###########
     def run_cycle_init(self):
+        settings = self.settings_core.snapshot
+
         self.set_motors(True)
-        self.cycle_run_state_change_signal.emit(True, self.settings.value("quick_settings/embryo_type").toString())
-        self.cycle_run_image_request_signal.emit()
+        self.cycle_run_state_change_signal.emit(True, settings.value("quick_settings/embryo_type").toString())
+        self.request_cycle_run_image()
         self.set_cycle_run_flags_and_variables()
         self.run_hardware_init()
         self.set_lights(1000)
@@ -544,15 +766,69 @@ class PickAndPlateCycleHandler(QtCore.QThread):
 
         while self.button_state != BUTTON_CONTINUE:
             self.set_motors(True)
-            self.cycle_run_image_request_signal.emit()
-            self.data_received = False
+            self.request_cycle_run_image()
             self.msleep(250)
 
-        self.cycle_run_image_request_signal.emit()
+        self.request_cycle_run_image()
+
+    def record_detection_wait(self, seconds):
+        self.detection_wait_total += seconds
+        self.detection_wait_count += 1
+
+        self.logger.debug("Waited " + str(int(seconds * 1000)) + " ms for detection.")
+
+    def request_cycle_run_image(self):
+        # Video will only answer with a frame grabbed after this point, so nothing picked before now can show up in it
+        self.image_request_not_before = time.time()
+        self.next_pick_target = None
+        self.verify_result = None
+        self.data_received = False
+        self.cycle_run_image_request_signal.emit(self.image_request_not_before)
+
+    def request_target_verification(self):
+        self.image_request_not_before = time.time()
+        self.verify_result = None
         self.data_received = False
+        self.cycle_run_target_verify_request_signal.emit(self.image_request_not_before, self.next_pick_target[0],
+                                                         self.next_pick_target[1])
+
+    def request_next_image(self):
+        if self.next_pick_target is None:
+            self.request_cycle_run_image()
+        else:
+            self.request_target_verification()
+
+    def resend_image_request(self):
+        # Re-sent in case video missed it, but keep the original not-before time so old frames stay rejected
+        if self.next_pick_target is None:
+            self.cycle_run_image_request_signal.emit(self.image_request_not_before)
+        else:
+            self.cycle_run_target_verify_request_signal.emit(self.image_request_not_before, self.next_pick_target[0],
+                                                             self.next_pick_target[1])
+
+    def get_verified_pick_target(self):
+        found, x_px, y_px = self.verify_result
+        self.verify_result = None
+        self.next_pick_target = None
+
+        if found:
+            # Use where the embryo is now, in case the last pick nudged it
+            embryo_x, embryo_y = self.pick_planner.pixel_to_machine(x_px, y_px)
+            return x_px, y_px, embryo_x, embryo_y
+
+        self.logger.debug("Next target failed verification.")
+        self.pick_planner.on_verification_failed()
+
+        if not self.pick_planner.needs_redetection():
+            self.next_pick_target = self.pick_planner.choose_next_target(self.tinyg_x_location, self.tinyg_y_location,
+                                                                         self.cur_plate_x, self.cur_plate_y)
+
+        return None
 
     def run_cycle_end(self):
-        self.cycle_run_state_change_signal.emit(False, self.settings.value("quick_settings/embryo_type").toString())
+        settings = self.settings_core.snapshot
+
+        self.cycle_run_state_change_signal.emit(False, settings.value("quick_settings/embryo_type").toString())
         self.stop_time = time.time()
         self.move_z(self.z_traverse_height)
 
@@ -565,22 +841,45 @@ class PickAndPlateCycleHandler(QtCore.QThread):
         self.set_lights(0)
         self.interface_cycle_stop_signal.emit()
         self.set_motors(False)
-        self.logger.info("Cycle completed in " + str((self.stop_time - self.start_time) / 60) + " minutes.")
+        self.telemetry_recorder.flush()
+
+        self.time_elapsed = self.stop_time - self.start_time
+        self.time_remaining = 0
+        self.publish_cycle_stats()
+
+        self.logger.info("Cycle completed in " + str(self.time_elapsed / 60) + " minutes.")
+        self.logger.info("Made " + str(self.current_pick_number) + " picks, with " + str(self.mispicks) +
+                         " mispicks and " + str(self.double_picks) + " double picks seen.")
+
+        if self.phase_timings.span_names:
+            self.logger.info("Pick phase timings over the last " + str(self.phase_timings.window_size) + " picks:")
+            for line in self.phase_timings.get_summary_lines():
+                self.logger.info(line)
+
+        if self.detection_wait_count:
+            self.logger.info("Waited on detection for " + str(self.detection_wait_total) + " seconds in total, " +
+                             str(int(self.detection_wait_total / self.detection_wait_count * 1000)) +
+                             " ms per pick on average.")
 
     def on_cycle_start_pressed_slot(self):
         self.cycle_running_flag = True
         self.cycle_init_flag = True
+        self.state_waiter.notify()
 
     def on_cycle_pause_pressed_slot(self):
         self.cycle_paused = True
 
     def on_cycle_resume_pressed_slot(self):
         self.cycle_paused = False
+        self.state_waiter.notify()
 
     def on_cycle_stop_pressed_slot(self):
         self.cycle_end_flag = True
+        self.state_waiter.notify()
 
     def set_cycle_run_flags_and_variables(self):
+        settings = self.settings_core.snapshot
+
         # Control flags / vars
         self.cycle_paused = False
         self.no_embryo_count = 0
@@ -588,59 +887,87 @@ class PickAndPlateCycleHandler(QtCore.QThread):
 
         self.start_time = time.time()
 
+        self.detection_wait_total = 0
+        self.detection_wait_count = 0
+
+        # Statistical vars
+        self.current_pick_number = 0
+        self.total_plated = 0
+        self.mispicks = 0
+        self.double_picks = 0
+        self.total_detected = 0
+        self.time_elapsed = 0
+        self.time_remaining = 0
+        self.success_rate = 0
+
+        self.pending_pick_checks = []
+        self.evaluated_picks = 0
+
+        self.phase_timings.clear()
+        self.well_times.clear()
+        self.last_well_done_time = None
+        self.embryos_per_minute = 0
+
         # Cal Vars
         prefix = "d_" if self.run_embryo_type == "Dechorionated" else "c_"
 
-        self.z_vel = self.settings.value("system/plating_calibration/" + prefix + "z_velocity").toInt()[0]
-        self.placement_dwell = self.settings.value("system/plating_calibration/" + prefix + "placement_dwell").toInt()[
+        self.z_vel = settings.value("system/plating_calibration/" + prefix + "z_velocity").toInt()[0]
+        self.placement_dwell = settings.value("system/plating_calibration/" + prefix + "placement_dwell").toInt()[
             0]
-        self.e_fall_time = self.settings.value("system/plating_calibration/" + prefix + "embryo_fall_time").toDouble()[
+        self.e_fall_time = settings.value("system/plating_calibration/" + prefix + "embryo_fall_time").toDouble()[
             0]
-        self.pick_height = self.settings.value("system/plating_calibration/" + prefix + "pick_height").toDouble()[0]
-        self.place_height = self.settings.value("system/plating_calibration/" + prefix + "place_height").toDouble()[0]
-        self.pick_volume = self.settings.value("system/plating_calibration/" + prefix + "pick_volume").toDouble()[0]
-        self.place_volume = self.settings.value("system/plating_calibration/" + prefix + "place_volume").toDouble()[0]
+        self.pick_height = settings.value("system/plating_calibration/" + prefix + "pick_height").toDouble()[0]
+        self.place_height = settings.value("system/plating_calibration/" + prefix + "place_height").toDouble()[0]
+        self.pick_volume = settings.value("system/plating_calibration/" + prefix + "pick_volume").toDouble()[0]
+        self.place_volume = settings.value("system/plating_calibration/" + prefix + "place_volume").toDouble()[0]
         self.pipette_diameter = \
-            self.settings.value("system/plating_calibration/" + prefix + "tube_diameter").toDouble()[0]
+            settings.value("system/plating_calibration/" + prefix + "tube_diameter").toDouble()[0]
 
         # Offset for pipette size adjustment
         cal_pipette_radius = CAL_PIPETTE_DIAMETER / 2
         current_pipette_radius = self.pipette_diameter / 2
         pipette_adjustment = current_pipette_radius - cal_pipette_radius
 
-        self.dish_x = self.settings.value("system/system_calibration/dish_x_center").toFloat()[0] + pipette_adjustment
-        self.dish_y = self.settings.value("system/system_calibration/dish_y_center").toFloat()[0] + pipette_adjustment
-        self.a1_x = self.settings.value("system/system_calibration/a1_x_center").toFloat()[0] + pipette_adjustment
-        self.a1_y = self.settings.value("system/system_calibration/a1_y_center").toFloat()[0] + pipette_adjustment
-        self.waste_x = self.settings.value("system/system_calibration/waste_x_center").toFloat()[0] + pipette_adjustment
-        self.waste_y = self.settings.value("system/system_calibration/waste_y_center").toFloat()[0] + pipette_adjustment
-
-        self.dish_center_px_x = self.settings.value("system/system_calibration/crop_x_center").toInt()[0]
-        self.dish_center_px_y = self.settings.value("system/system_calibration/crop_y_center").toInt()[0]
-        self.dist_cal_x = self.settings.value("system/system_calibration/distance_cal_x").toInt()[0]
-        self.dist_cal_y = self.settings.value("system/system_calibration/distance_cal_y").toInt()[0]
+        self.dish_x = settings.value("system/system_calibration/dish_x_center").toFloat()[0] + pipette_adjustment
+        self.dish_y = settings.value("system/system_calibration/dish_y_center").toFloat()[0] + pipette_adjustment
+        self.a1_x = settings.value("system/system_calibration/a1_x_center").toFloat()[0] + pipette_adjustment
+        self.a1_y = settings.value("system/system_calibration/a1_y_center").toFloat()[0] + pipette_adjustment
+        self.waste_x = settings.value("system/system_calibration/waste_x_center").toFloat()[0] + pipette_adjustment
+        self.waste_y = settings.value("system/system_calibration/waste_y_center").toFloat()[0] + pipette_adjustment
+
+        self.dish_center_px_x = settings.value("system/system_calibration/crop_x_center").toInt()[0]
+        self.dish_center_px_y = settings.value("system/system_calibration/crop_y_center").toInt()[0]
+        self.dist_cal_x = settings.value("system/system_calibration/distance_cal_x").toInt()[0]
+        self.dist_cal_y = settings.value("system/system_calibration/distance_cal_y").toInt()[0]
         self.mm_per_px = CAL_POINT_DIST_MM / sqrt(pow(self.dist_cal_x, 2) + pow(self.dist_cal_y, 2))
 
-        self.plate_min = self.settings.value("system/system_calibration/plate_z_min").toDouble()[0]
-        self.dish_min = self.settings.value("system/system_calibration/dish_z_min").toDouble()[0]
+        self.pick_planner.set_calibration(self.dish_x, self.dish_y, self.dish_center_px_x, self.dish_center_px_y,
+                                          self.mm_per_px)
+
+        self.plate_min = settings.value("system/system_calibration/plate_z_min").toDouble()[0]
+        self.dish_min = settings.value("system/system_calibration/dish_z_min").toDouble()[0]
 
         self.cur_plate_x = self.a1_x
         self.cur_plate_y = self.a1_y
 
-        self.run_embryo_type = self.settings.value("quick_settings/embryo_type").toString()
+        self.run_embryo_type = settings.value("quick_settings/embryo_type").toString()
 
     def on_video_requested_image_ready_slot(self):
         self.cropped_only_raw = self.main_window.video.cropped_only_raw
         self.current_frame_keypoints = self.main_window.video.keypoints
-        self.current_frame_valid = self.main_window.video.valid_embryos
-        self.current_frame_pickable = self.main_window.video.pickable_embryos
+        self.current_frame_embryos = self.main_window.video.embryo_set
         self.data_received = True
+        self.image_waiter.notify()
 
-    def on_controller_command_completed_slot(self):
-        self.controller_command_complete = True
+    def on_video_target_verified_slot(self, found, x_px, y_px):
+        self.cropped_only_raw = self.main_window.video.cropped_only_raw
+        self.verify_result = (found, x_px, y_px)
+        self.data_received = True
+        self.image_waiter.notify()
 
-    def on_init_command_completed_slot(self):
-        self.init_command_complete = True
+    def on_motion_program_sync_point_slot(self, name):
+        if name == CAMERA_CLEAR_SYNC_POINT:
+            self.request_next_image()
 
     def on_system_location_changed_slot(self, x, y, z, a):
         self.tinyg_x_location = x
@@ -650,3 +977,5 @@ class PickAndPlateCycleHandler(QtCore.QThread):
 
     def on_kill_threads_slot(self):
         self.not_abort_flag = False
+        self.state_waiter.notify()
+        self.image_waiter.notify()
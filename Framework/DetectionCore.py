@@ -0,0 +1,304 @@
+"""
+    This file contains the DetectionCore sub-class as part of the Framework Class
+    This class handles loading blob detection profiles from settings, caching the detectors built from them, and
+    running the dish masking, blob detection, and embryo filtering steps on a frame
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+import cv2
+import numpy
+from collections import OrderedDict
+
+# Custom imports
+from Framework.EmbryoCore import EmbryoSet
+
+#####################################
+# Global Variables
+#####################################
+DETECTION_SETTINGS_GROUP = "system/detection_calibration/"
+
+DECHORIONATED_PREFIX = "d_"
+CHORIONATED_PREFIX = "c_"
+
+# Order matters here, it's the order values are stored in the cache key
+BLOB_PARAM_SETTINGS = [
+    ("min_blob_distance", float),
+    ("min_repeat", int),
+    ("blob_thresh_min", int),
+    ("blob_thresh_max", int),
+    ("blob_thresh_step", int),
+    ("blob_area_enabled", int),
+    ("blob_area_min", float),
+    ("blob_area_max", float),
+    ("blob_circularity_enabled", int),
+    ("blob_circularity_min", float),
+    ("blob_circularity_max", float),
+    ("blob_convexity_enabled", int),
+    ("blob_convexity_min", float),
+    ("blob_convexity_max", float),
+    ("blob_inertia_enabled", int),
+    ("blob_inertia_min", float),
+    ("blob_inertia_max", float)
+]
+
+BLOB_DETECTOR_CACHE_SIZE = 8  # Every spin box change in detection calibration is a new key, so keep this bounded
+
+VERIFY_ROI_HALF_SIZE_PX = 60  # Big enough to also catch any neighbor that would make the target unpickable
+VERIFY_TOLERANCE_PX = 10  # How far a target can have drifted and still count as the same embryo
+
+
+#####################################
+# Detection Profile Functions
+#####################################
+def get_profile_prefix(profile_name):
+    if profile_name == "Dechorionated":
+        return DECHORIONATED_PREFIX
+    else:
+        return CHORIONATED_PREFIX
+
+
+def read_blob_param_values(settings, prefix):
+    values = []
+
+    for name, value_type in BLOB_PARAM_SETTINGS:
+        variant = settings.value(DETECTION_SETTINGS_GROUP + prefix + name)
+
+        if value_type == float:
+            values.append(variant.toDouble()[0])
+        else:
+            values.append(variant.toInt()[0])
+
+    return tuple(values)
+
+
+def make_blob_params(values):
+    named = dict(zip([name for name, _ in BLOB_PARAM_SETTINGS], values))
+
+    params = cv2.SimpleBlobDetector_Params()
+
+    params.minDistBetweenBlobs = named["min_blob_distance"]
+    params.minRepeatability = named["min_repeat"]
+    params.minThreshold = named["blob_thresh_min"]
+    params.maxThreshold = named["blob_thresh_max"]
+    params.thresholdStep = named["blob_thresh_step"]
+
+    params.filterByColor = False
+
+    if named["blob_area_enabled"]:
+        params.filterByArea = True
+        params.minArea = named["blob_area_min"]
+        params.maxArea = named["blob_area_max"]
+    else:
+        params.filterByArea = False
+
+    if named["blob_circularity_enabled"]:
+        params.filterByCircularity = True
+        params.minCircularity = named["blob_circularity_min"]
+        params.maxCircularity = named["blob_circularity_max"]
+    else:
+        params.filterByCircularity = False
+
+    if named["blob_convexity_enabled"]:
+        params.filterByConvexity = True
+        params.minConvexity = named["blob_convexity_min"]
+        params.maxConvexity = named["blob_convexity_max"]
+    else:
+        params.filterByConvexity = False
+
+    if named["blob_inertia_enabled"]:
+        params.filterByInertia = True
+        params.minInertiaRatio = named["blob_inertia_min"]
+        params.maxInertiaRatio = named["blob_inertia_max"]
+    else:
+        params.filterByInertia = False
+
+    return params
+
+
+#####################################
+# BlobDetectorCache Class Definition
+#####################################
+class BlobDetectorCache(object):
+    """
+        Keeps the SimpleBlobDetectors built for recently used profiles, keyed on the profile prefix plus every blob
+        parameter value. A detector only gets rebuilt when a profile's values actually change, and switching back and
+        forth between the dechorionated and chorionated profiles reuses the existing ones.
+    """
+
+    def __init__(self, max_size=BLOB_DETECTOR_CACHE_SIZE):
+        self.max_size = max_size
+        self.detectors = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get_detector(self, prefix, values):
+        key = (prefix,) + tuple(values)
+
+        detector = self.detectors.pop(key, None)
+
+        if detector is None:
+            self.misses += 1
+            detector = cv2.SimpleBlobDetector(make_blob_params(values))
+
+            if len(self.detectors) >= self.max_size:
+                self.detectors.popitem(last=False)
+        else:
+            self.hits += 1
+
+        self.detectors[key] = detector  # Re-inserting keeps the most recently used detectors at the end
+
+        return detector
+
+    def get_stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.detectors)}
+
+
+#####################################
+# DishDetector Class Definition
+#####################################
+class DishDetector(object):
+    """
+        Everything needed to go from a raw camera frame to an EmbryoSet, with no Qt or camera dependencies so it can be
+        run offline as well as from the video thread. Call load_settings() whenever settings or the profile change.
+    """
+
+    def __init__(self):
+        self.blob_detector_cache = BlobDetectorCache()
+        self.blob_profile_prefix = None
+        self.blob_param_values = None
+
+        self.embryo_set_en = 0
+        self.embryo_min_dist = 0
+        self.embryo_min_size = 0
+        self.embryo_max_size = 0
+
+        self.x_center = 0
+        self.y_center = 0
+        self.crop_dim_half = 0
+        self.usable_offset = 0
+
+        self.greyscale_frame = numpy.array([])
+        self.masked_greyscale_frame = numpy.array([])
+
+        self.dish_mask_frame = None
+        self.dish_mask_key = None
+
+    def load_settings(self, settings, profile_name):
+        prefix = get_profile_prefix(profile_name)
+
+        # The detector itself is only built when these values change, see BlobDetectorCache
+        self.blob_profile_prefix = prefix
+        self.blob_param_values = read_blob_param_values(settings, prefix)
+
+        self.embryo_set_en = settings.value(DETECTION_SETTINGS_GROUP + prefix + "embryo_settings_enabled").toInt()[0]
+        self.embryo_min_dist = settings.value(DETECTION_SETTINGS_GROUP + prefix + "embryo_min_dist").toDouble()[0]
+        self.embryo_min_size = settings.value(DETECTION_SETTINGS_GROUP + prefix + "embryo_min_size").toDouble()[0]
+        self.embryo_max_size = settings.value(DETECTION_SETTINGS_GROUP + prefix + "embryo_max_size").toDouble()[0]
+
+        self.x_center = settings.value("system/system_calibration/crop_x_center").toInt()[0]
+        self.y_center = settings.value("system/system_calibration/crop_y_center").toInt()[0]
+        self.crop_dim_half = (settings.value("system/system_calibration/crop_dimension").toInt()[0] / 2)
+        self.usable_offset = settings.value("system/system_calibration/usable_area_offset").toInt()[0]
+
+    def get_dish_roi(self, input_frame):
+        roi_x = self.x_center - self.crop_dim_half
+        roi_y = self.y_center - self.crop_dim_half
+
+        roi_frame = input_frame[roi_y:(self.y_center + self.crop_dim_half), roi_x:(self.x_center + self.crop_dim_half)]
+
+        # Copied so overlays can be drawn on it without opencv silently drawing on a temporary instead
+        return numpy.ascontiguousarray(roi_frame), roi_x, roi_y
+
+    def get_dish_mask_frame(self, roi_shape):
+        roi_height, roi_width = roi_shape[:2]
+        mask_key = (roi_height, roi_width, self.crop_dim_half, self.usable_offset)
+
+        # Only redraw the mask when the dish calibration has actually changed
+        if mask_key != self.dish_mask_key:
+            self.dish_mask_frame = numpy.zeros((roi_height, roi_width), numpy.uint8)
+            cv2.circle(self.dish_mask_frame, (self.crop_dim_half, self.crop_dim_half),
+                       (self.crop_dim_half - self.usable_offset), 255, -1)
+
+            self.greyscale_frame = numpy.zeros((roi_height, roi_width), numpy.uint8)
+            self.masked_greyscale_frame = numpy.zeros((roi_height, roi_width), numpy.uint8)
+
+            self.dish_mask_key = mask_key
+
+        return self.dish_mask_frame
+
+    def get_masked_greyscale_frame(self, input_frame, conversion_type):
+        mask_frame = self.get_dish_mask_frame(input_frame.shape)
+
+        # Both steps write into the preallocated buffers rather than making new frames every time
+        self.greyscale_frame = cv2.cvtColor(input_frame, conversion_type, self.greyscale_frame)
+        self.masked_greyscale_frame = cv2.bitwise_and(self.greyscale_frame, mask_frame, self.masked_greyscale_frame)
+
+        return self.masked_greyscale_frame
+
+    def detect_keypoints(self, masked_frame):
+        detector = self.blob_detector_cache.get_detector(self.blob_profile_prefix, self.blob_param_values)
+        return detector.detect(masked_frame)
+
+    def get_embryo_set(self, keypoints):
+        embryo_set = EmbryoSet.from_keypoints(keypoints)
+
+        if self.embryo_set_en:
+            embryo_set.update_pickable(self.embryo_min_dist, self.embryo_min_size, self.embryo_max_size)
+
+        return embryo_set
+
+    def verify_target(self, input_frame, x_px, y_px):
+        # Checks a small square around an earlier detection instead of the whole dish. Returns whether a pickable
+        # embryo is still there, and its position in full frame pixels if so.
+        frame_height, frame_width = input_frame.shape[:2]
+
+        roi_x = max(int(x_px) - VERIFY_ROI_HALF_SIZE_PX, 0)
+        roi_y = max(int(y_px) - VERIFY_ROI_HALF_SIZE_PX, 0)
+        roi_frame = input_frame[roi_y:min(int(y_px) + VERIFY_ROI_HALF_SIZE_PX, frame_height),
+                                roi_x:min(int(x_px) + VERIFY_ROI_HALF_SIZE_PX, frame_width)]
+
+        if not roi_frame.size:
+            return False, x_px, y_px
+
+        embryo_set = self.get_embryo_set(self.detect_keypoints(cv2.cvtColor(roi_frame, cv2.COLOR_BGR2GRAY)))
+        embryo_set.translate(roi_x, roi_y)
+
+        candidates = embryo_set.get_pickable() if self.embryo_set_en else embryo_set.get_valid()
+        if not candidates.shape[0]:
+            return False, x_px, y_px
+
+        distances = numpy.hypot(candidates[:, 0] - x_px, candidates[:, 1] - y_px)
+        closest = int(numpy.argmin(distances))
+
+        if distances[closest] > VERIFY_TOLERANCE_PX:
+            return False, x_px, y_px
+
+        return True, float(candidates[closest, 0]), float(candidates[closest, 1])
@@ -0,0 +1,198 @@
+"""
+    This file contains the EmbryoCore sub-class as part of the Framework Class
+    This class handles storing detected embryos and filtering them into valid and pickable sets
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+import numpy
+from itertools import chain
+
+# Custom imports
+
+#####################################
+# Global Variables
+#####################################
+X_VAL = 0
+Y_VAL = 1
+SIZE_VAL = 2
+
+# Above this many embryos the full distance matrix gets too big for the beaglebone, so a grid index is used instead
+PAIRWISE_EMBRYO_LIMIT = 256
+
+GRID_NEIGHBOR_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 0), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+#####################################
+# EmbryoSet Class Definition
+#####################################
+class EmbryoSet(object):
+    """
+        Holds every embryo found in a single frame as one float32 (N, 3) array of [x, y, size] rows, along with
+        boolean masks saying which rows are valid (no NaN values) and which are pickable. A new set is made for each
+        detection and never changed once handed to other threads.
+    """
+
+    def __init__(self, embryos=None):
+        if embryos is None:
+            self.embryos = numpy.zeros((0, 3), dtype=numpy.float32)
+        else:
+            self.embryos = numpy.asarray(embryos, dtype=numpy.float32).reshape(-1, 3)
+
+        self.valid = ~numpy.isnan(self.embryos).any(axis=1)
+        self.pickable = numpy.zeros(self.embryos.shape[0], dtype=bool)
+
+    @classmethod
+    def from_keypoints(cls, keypoints):
+        number_keypoints = len(keypoints)
+
+        embryos = numpy.fromiter(chain.from_iterable((point.pt[0], point.pt[1], point.size) for point in keypoints),
+                                 dtype=numpy.float32, count=(number_keypoints * 3))
+
+        return cls(embryos.reshape(number_keypoints, 3))
+
+    def update_pickable(self, min_between_embryos, min_embryo_dia, max_embryo_dia):
+        valid_index = numpy.flatnonzero(self.valid)
+
+        self.pickable[:] = False
+        self.pickable[valid_index] = get_pickable_mask(self.embryos[valid_index], min_between_embryos,
+                                                       min_embryo_dia, max_embryo_dia)
+
+    def translate(self, x_offset, y_offset):
+        self.embryos[:, X_VAL] += x_offset
+        self.embryos[:, Y_VAL] += y_offset
+
+    def get_valid(self):
+        return self.embryos[self.valid]
+
+    def get_pickable(self):
+        return self.embryos[self.pickable]
+
+    def number_valid(self):
+        return int(numpy.count_nonzero(self.valid))
+
+    def number_pickable(self):
+        return int(numpy.count_nonzero(self.pickable))
+
+    def __len__(self):
+        return self.embryos.shape[0]
+
+
+#####################################
+# Embryo Filtering Functions
+#####################################
+def get_pickable_mask(embryos, min_between_embryos, min_embryo_dia, max_embryo_dia):
+    """
+        Takes an (N, 3) array of [x, y, size] rows and returns a boolean mask of the embryos that are the right size
+        and have no other embryo closer than min_between_embryos (edge to edge). Embryos sharing the exact same
+        center point are not compared against each other, matching the original list based implementation.
+    """
+    embryos = numpy.asarray(embryos, dtype=numpy.float64).reshape(-1, 3)
+
+    sizes = embryos[:, SIZE_VAL]
+    pickable = (sizes >= min_embryo_dia) & (sizes <= max_embryo_dia)
+
+    candidates = numpy.flatnonzero(pickable)
+    if candidates.size == 0 or embryos.shape[0] < 2:
+        return pickable
+
+    # No two embryos can ever be too close if this is not positive, so skip the neighbor search
+    search_radius = min_between_embryos + sizes.max()
+    if search_radius <= 0:
+        return pickable
+
+    if embryos.shape[0] <= PAIRWISE_EMBRYO_LIMIT:
+        too_close = get_too_close_pairwise(embryos, candidates, min_between_embryos)
+    else:
+        too_close = get_too_close_grid(embryos, candidates, min_between_embryos, search_radius)
+
+    pickable[candidates[too_close]] = False
+
+    return pickable
+
+
+def get_too_close_pairwise(embryos, candidates, min_between_embryos):
+    query = embryos[candidates]
+
+    delta_x = query[:, X_VAL, numpy.newaxis] - embryos[numpy.newaxis, :, X_VAL]
+    delta_y = query[:, Y_VAL, numpy.newaxis] - embryos[numpy.newaxis, :, Y_VAL]
+
+    gaps = (numpy.sqrt(delta_x * delta_x + delta_y * delta_y) - (query[:, SIZE_VAL, numpy.newaxis] / 2) -
+            (embryos[numpy.newaxis, :, SIZE_VAL] / 2))
+
+    same_center = (delta_x == 0) & (delta_y == 0)
+
+    return ((gaps < min_between_embryos) & ~same_center).any(axis=1)
+
+
+def get_too_close_grid(embryos, candidates, min_between_embryos, cell_size):
+    # Bucket every embryo into a square cell the size of the largest possible too-close distance. That way any
+    # embryo that could be too close to another is guaranteed to sit in the same or one of the eight adjacent cells.
+    cell_x = numpy.floor((embryos[:, X_VAL] - embryos[:, X_VAL].min()) / cell_size).astype(numpy.int64)
+    cell_y = numpy.floor((embryos[:, Y_VAL] - embryos[:, Y_VAL].min()) / cell_size).astype(numpy.int64)
+
+    # Padded by one cell on each side so neighbor offsets never wrap around into another column
+    cells_per_column = cell_y.max() + 3
+    cell_keys = (cell_x + 1) * cells_per_column + (cell_y + 1)
+
+    sort_order = numpy.argsort(cell_keys, kind="mergesort")
+    sorted_keys = cell_keys[sort_order]
+
+    too_close = numpy.zeros(candidates.size, dtype=bool)
+
+    for offset_x, offset_y in GRID_NEIGHBOR_OFFSETS:
+        neighbor_keys = cell_keys[candidates] + (offset_x * cells_per_column) + offset_y
+
+        range_starts = numpy.searchsorted(sorted_keys, neighbor_keys, side="left")
+        range_counts = numpy.searchsorted(sorted_keys, neighbor_keys, side="right") - range_starts
+
+        total_pairs = range_counts.sum()
+        if total_pairs == 0:
+            continue
+
+        # Expand each [start, start + count) range into one flat list of (query, neighbor) pairs
+        query_index = numpy.repeat(numpy.arange(candidates.size), range_counts)
+        range_offsets = numpy.arange(total_pairs) - numpy.repeat(numpy.cumsum(range_counts) - range_counts,
+                                                                  range_counts)
+        neighbor_index = sort_order[numpy.repeat(range_starts, range_counts) + range_offsets]
+
+        query = embryos[candidates[query_index]]
+        neighbors = embryos[neighbor_index]
+
+        delta_x = query[:, X_VAL] - neighbors[:, X_VAL]
+        delta_y = query[:, Y_VAL] - neighbors[:, Y_VAL]
+
+        gaps = (numpy.sqrt(delta_x * delta_x + delta_y * delta_y) - (query[:, SIZE_VAL] / 2) -
+                (neighbors[:, SIZE_VAL] / 2))
+
+        same_center = (delta_x == 0) & (delta_y == 0)
+
+        too_close[query_index[(gaps < min_between_embryos) & ~same_center]] = True
+
+    return too_close
@@ -32,13 +32,17 @@ __status__ = "Development"
 #####################################
 # Python native imports
 from PyQt4 import QtCore
+from collections import deque
 import logging
+import sys
 from os import makedirs
 from os.path import expanduser, exists
 import datetime
 import time
 
 # Custom imports
+from Framework.WaitCore import ConditionWaiter
+from Framework.WakeupCore import WakeupCounter
 
 #####################################
 # Global Variables
@@ -48,6 +52,145 @@ application_hidden_path_root = expanduser("~") + "/.PickAndPlate"  # Change /.pn
 application_logging_path = application_hidden_path_root + "/logs"
 application_log_full_path = application_logging_path + "/" + current_date + ".txt"
 
+LOG_QUEUE_MAX_RECORDS = 10000  # Records waiting to be written before new ones start getting dropped
+LOG_BATCH_INTERVAL_MS = 250  # Lets records pile up between writes so the file is written and flushed once per batch
+LOG_WRITER_IDLE_WAIT_MS = 60000  # Records are notified, this only bounds how long a missed one could sit in the queue
+LOG_FLUSH_TIMEOUT_MS = 2000  # How long shutdown waits for the writer to empty the queue
+
+
+#####################################
+# QueuedLogHandler Definition
+#####################################
+class QueuedLogHandler(logging.Handler):
+    """
+        Takes the place of the file and console handlers for every thread that logs. Emitting a record only fills in
+        its message and appends it to a bounded queue, so no logging call from the serial, video, or cycle threads
+        waits on the SD card. Records that arrive while the queue is full are dropped and counted by level.
+    """
+
+    def __init__(self, formatter, max_records=LOG_QUEUE_MAX_RECORDS):
+        logging.Handler.__init__(self)
+        self.setFormatter(formatter)
+
+        self.max_records = max_records
+
+        self.records = deque()
+        self.record_waiter = ConditionWaiter()
+
+        self.dropped_counts = {}  # Dropped since the writer last reported, by level name
+        self.total_dropped = 0
+
+    def emit(self, record):
+        try:
+            if len(self.records) >= self.max_records:
+                self.dropped_counts[record.levelname] = self.dropped_counts.get(record.levelname, 0) + 1
+                self.total_dropped += 1
+                return
+
+            self.prepare(record)
+            self.records.append(record)
+            self.record_waiter.notify()
+        except Exception:
+            self.handleError(record)
+
+    def prepare(self, record):
+        # Done now, while the arguments and traceback still hold what they did when the call was made
+        record.msg = record.getMessage()
+        record.args = None
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatter.formatException(record.exc_info)
+            record.exc_info = None
+
+    def take_records(self):
+        # Only ever called by one thread at a time, so the queue can't empty out between the check and the pop
+        records = []
+
+        while self.records:
+            records.append(self.records.popleft())
+
+        return records
+
+    def take_dropped_counts(self):
+        dropped_counts = self.dropped_counts
+        self.dropped_counts = {}
+
+        return dropped_counts
+
+
+#####################################
+# LogWriter Definition
+#####################################
+class LogWriter(QtCore.QThread):
+    """
+        The only thread that writes to the log file and console. Every wakeup takes everything queued so far, formats
+        it, and writes it out as one block with a single flush.
+    """
+
+    def __init__(self, queue_handler, formatter, console_output):
+        QtCore.QThread.__init__(self)
+
+        # ########## Local class variables ##########
+        self.queue_handler = queue_handler
+        self.formatter = formatter
+
+        self.log_file = open(application_log_full_path, 'a')
+        self.console_stream = sys.stderr if console_output else None
+
+        self.wakeup_counter = WakeupCounter("Log Writer")
+
+        # ########## Thread flags ##########
+        self.not_abort_flag = True
+
+    def run(self):
+        while self.not_abort_flag:
+            self.queue_handler.record_waiter.wait_for(lambda: self.queue_handler.records or (not self.not_abort_flag),
+                                                      LOG_WRITER_IDLE_WAIT_MS)
+            self.wakeup_counter.count()
+
+            self.write_queued_records()
+            self.msleep(LOG_BATCH_INTERVAL_MS)
+
+        self.write_queued_records()
+
+    def write_queued_records(self):
+        records = self.queue_handler.take_records()
+        dropped_counts = self.queue_handler.take_dropped_counts()
+
+        if dropped_counts:
+            records.append(self.make_dropped_record(dropped_counts))
+
+        if not records:
+            return
+
+        log_text = "".join([self.formatter.format(record) + "\n" for record in records])
+
+        try:
+            self.log_file.write(log_text)
+            self.log_file.flush()
+
+            if self.console_stream:
+                self.console_stream.write(log_text)
+                self.console_stream.flush()
+        except (IOError, OSError):
+            pass  # Nowhere left to report this, and the writer has to keep going for the next batch
+
+    def make_dropped_record(self, dropped_counts):
+        dropped_text = ", ".join([str(dropped_counts[level_name]) + " " + level_name
+                                  for level_name in sorted(dropped_counts)])
+
+        return logging.makeLogRecord({"name": "PickAndPlate", "levelno": logging.WARNING, "levelname": "WARNING",
+                                      "msg": "Log queue was full, dropped " + dropped_text + " records. " +
+                                             str(self.queue_handler.total_dropped) + " dropped since launch."})
+
+    def close_log_file(self):
+        self.log_file.close()
+
+    def on_kill_threads_slot(self):
+        self.not_abort_flag = False
+        self.queue_handler.record_waiter.notify()
+
 
 #####################################
 # PickAndPlateLogger Definition
@@ -58,6 +201,11 @@ class PickAndPlateLogger(QtCore.QObject):
 
         # ########## Local class variables ##########
         self.console_output = console_output
+        self.formatter = logging.Formatter(fmt='%(levelname)s : %(asctime)s :  %(message)s',
+                                           datefmt='%m/%d/%y %H:%M:%S')
+
+        self.queue_handler = None
+        self.log_writer = None
 
         # ########## Get the Pick And Plate instance of the logger ##########
         self.make_logging_paths()
@@ -78,18 +226,24 @@ class PickAndPlateLogger(QtCore.QObject):
     def setup_logger(self):
         self.logger.setLevel(logging.DEBUG)
 
-        formatter = logging.Formatter(fmt='%(levelname)s : %(asctime)s :  %(message)s', datefmt='%m/%d/%y %H:%M:%S')
-
         self.make_logging_paths()
 
+        self.queue_handler = QueuedLogHandler(self.formatter)
+        self.queue_handler.setLevel(logging.DEBUG)
+        self.logger.addHandler(self.queue_handler)
+
+        self.log_writer = LogWriter(self.queue_handler, self.formatter, self.console_output)
+        self.log_writer.start()
+
+    def add_direct_handlers(self):
         file_handler = logging.FileHandler(filename=application_log_full_path)
-        file_handler.setFormatter(formatter)
+        file_handler.setFormatter(self.formatter)
         file_handler.setLevel(logging.DEBUG)
         self.logger.addHandler(file_handler)
 
         if self.console_output:
             console_handler = logging.StreamHandler()
-            console_handler.setFormatter(formatter)
+            console_handler.setFormatter(self.formatter)
             console_handler.setLevel(logging.DEBUG)
             self.logger.addHandler(console_handler)
 
@@ -97,4 +251,17 @@ class PickAndPlateLogger(QtCore.QObject):
         self.logger_file.write("\n########## New Instance of Application Started ##########\n\n")
         self.logger_file.close()
 
-# TODO: Add in logging cleanup so we don't run out of space over time
\ No newline at end of file
+    def on_kill_threads_slot(self):
+        # Called after every other thread has stopped, so everything they logged on the way out gets written. Anything
+        # logged after this goes straight to the file and console again.
+        self.log_writer.on_kill_threads_slot()
+        writer_finished = self.log_writer.wait(LOG_FLUSH_TIMEOUT_MS)
+
+        self.add_direct_handlers()
+        self.logger.removeHandler(self.queue_handler)
+
+        if writer_finished:
+            self.log_writer.write_queued_records()  # Anything logged while the writer was on its way out
+            self.log_writer.close_log_file()
+
+# TODO: Add in logging cleanup so we don't run out of space over time
@@ -0,0 +1,85 @@
+"""
+    This file contains the MailboxCore sub-class as part of the Framework Class
+    This class handles passing the newest value from a worker thread to the gui thread without either side waiting
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+from PyQt4 import QtCore
+
+# Custom imports
+
+#####################################
+# Global Variables
+#####################################
+
+
+#####################################
+# LatestValueMailbox Class Definition
+#####################################
+class LatestValueMailbox(object):
+    """
+        Holds only the newest value put into it. The producer calls put() and only emits its ready signal when put()
+        returns True, so at most one notification is ever queued for the gui thread. The gui slot calls get() to read
+        the newest value, which also re-arms notifications. Values replaced before anyone read them are counted as
+        dropped.
+    """
+
+    def __init__(self):
+        self.mutex = QtCore.QMutex()
+
+        self.value = None
+        self.notification_pending = False
+
+        self.number_put = 0
+        self.number_dropped = 0
+
+    def put(self, value):
+        self.mutex.lock()
+
+        if self.notification_pending:
+            self.number_dropped += 1
+
+        self.value = value
+        self.number_put += 1
+
+        should_notify = not self.notification_pending
+        self.notification_pending = True
+
+        self.mutex.unlock()
+
+        return should_notify
+
+    def get(self):
+        self.mutex.lock()
+        self.notification_pending = False
+        value = self.value
+        self.mutex.unlock()
+
+        return value
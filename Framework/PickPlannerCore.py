@@ -0,0 +1,192 @@
+"""
+    This file contains the PickPlannerCore sub-class as part of the Framework Class
+    This class handles choosing the order embryos get picked in from a single detection
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+import numpy
+
+# Custom imports
+
+#####################################
+# Global Variables
+#####################################
+X_VAL = 0
+Y_VAL = 1
+
+CENTER_WEIGHT = 0.5  # Extra cost per mm from the dish center, so picks work from the center outwards
+
+DENSITY_RISK_RADIUS_MM = 3.0  # Embryos closer than this to a target might get pulled up or pushed around with it
+DENSITY_RISK_WEIGHT_MM = 20.0  # A neighbor right on top of a target costs as much as this much extra travel
+
+PICK_DISTURBANCE_RADIUS_MM = 3.0  # Targets this close to a picked embryo may have been moved by the pick
+
+# Confidence that the remaining targets still match the dish. It starts at 1 with every detection, gets multiplied by
+# these decays, and the dish gets fully detected again once it drops below the minimum.
+PICK_CONFIDENCE_DECAY = 0.85
+FAILED_VERIFICATION_CONFIDENCE_DECAY = 0.5
+MIN_DETECTION_CONFIDENCE = 0.3
+
+RISK_ROWS_PER_CHUNK = 256  # Keeps the target to neighbor distance matrix small on the beaglebone
+
+
+#####################################
+# Pick Planning Functions
+#####################################
+def get_density_risks(targets, neighbors, risk_radius=DENSITY_RISK_RADIUS_MM):
+    """
+        Takes (N, 2) target and (M, 2) neighbor positions in mm and returns how crowded each target is. Every neighbor
+        inside the risk radius adds between 0 (at the radius) and 1 (touching). Neighbors sharing a target's exact
+        position are the target itself, and are skipped.
+    """
+    risks = numpy.zeros(targets.shape[0])
+
+    if (not targets.shape[0]) or (not neighbors.shape[0]) or (risk_radius <= 0):
+        return risks
+
+    for start in range(0, targets.shape[0], RISK_ROWS_PER_CHUNK):
+        chunk = targets[start:(start + RISK_ROWS_PER_CHUNK)]
+
+        delta_x = chunk[:, X_VAL, numpy.newaxis] - neighbors[numpy.newaxis, :, X_VAL]
+        delta_y = chunk[:, Y_VAL, numpy.newaxis] - neighbors[numpy.newaxis, :, Y_VAL]
+        distances = numpy.sqrt(delta_x * delta_x + delta_y * delta_y)
+
+        closeness = numpy.clip(1 - (distances / risk_radius), 0, 1)
+        closeness[distances == 0] = 0
+
+        risks[start:(start + chunk.shape[0])] = closeness.sum(axis=1)
+
+    return risks
+
+
+def get_distances(points, x, y):
+    delta_x = points[:, X_VAL] - x
+    delta_y = points[:, Y_VAL] - y
+
+    return numpy.sqrt(delta_x * delta_x + delta_y * delta_y)
+
+
+def count_within(points, x, y, radius):
+    return int(numpy.count_nonzero(get_distances(points, x, y) <= radius))
+
+
+#####################################
+# PickPlanner Class Definition
+#####################################
+class PickPlanner(object):
+    """
+        Keeps the pickable embryos from one detection and hands them out one at a time, cheapest first. A target's
+        cost is the XY travel from the head to it and on to the next well, plus a pull towards the dish center and a
+        penalty for how crowded it is. Targets that have been handed out are never handed out again, so the same list
+        can be used for several picks. After each pick, on_target_picked() drops any targets close enough to have been
+        disturbed, and needs_redetection() says when the list has run dry or can no longer be trusted. Has no Qt
+        dependencies so it can be run offline.
+    """
+
+    def __init__(self):
+        self.dish_x = 0
+        self.dish_y = 0
+        self.dish_center_px_x = 0
+        self.dish_center_px_y = 0
+        self.mm_per_px = 0
+
+        self.targets_px = numpy.zeros((0, 2))
+        self.targets_mm = numpy.zeros((0, 2))
+        self.target_risks = numpy.zeros(0)
+        self.remaining = numpy.zeros(0, dtype=bool)
+
+        self.confidence = 0.0
+
+    def set_calibration(self, dish_x, dish_y, dish_center_px_x, dish_center_px_y, mm_per_px):
+        self.dish_x = dish_x
+        self.dish_y = dish_y
+        self.dish_center_px_x = dish_center_px_x
+        self.dish_center_px_y = dish_center_px_y
+        self.mm_per_px = mm_per_px
+
+    def pixels_to_machine(self, points_px):
+        # Same conversion the cycle handler has always used, the camera's x axis runs opposite to the machine's
+        machine_x = self.dish_x - ((points_px[:, X_VAL] - self.dish_center_px_x) * self.mm_per_px)
+        machine_y = self.dish_y + ((points_px[:, Y_VAL] - self.dish_center_px_y) * self.mm_per_px)
+
+        return numpy.column_stack((machine_x, machine_y))
+
+    def set_embryo_set(self, embryo_set):
+        self.targets_px = embryo_set.get_pickable()[:, :2].astype(numpy.float64)
+        self.targets_mm = self.pixels_to_machine(self.targets_px)
+
+        # Embryos that aren't pickable themselves can still get disturbed, so every valid one counts as a neighbor
+        neighbors_mm = self.pixels_to_machine(embryo_set.get_valid()[:, :2].astype(numpy.float64))
+        self.target_risks = get_density_risks(self.targets_mm, neighbors_mm)
+
+        self.remaining = numpy.ones(self.targets_px.shape[0], dtype=bool)
+
+        self.confidence = 1.0
+
+    def pixel_to_machine(self, x_px, y_px):
+        machine_point = self.pixels_to_machine(numpy.array([[x_px, y_px]], dtype=numpy.float64))[0]
+        return float(machine_point[X_VAL]), float(machine_point[Y_VAL])
+
+    def number_remaining(self):
+        return int(numpy.count_nonzero(self.remaining))
+
+    def invalidate_near(self, x_mm, y_mm, radius_mm):
+        self.remaining &= (get_distances(self.targets_mm, x_mm, y_mm) > radius_mm)
+
+    def on_target_picked(self, x_mm, y_mm):
+        self.invalidate_near(x_mm, y_mm, PICK_DISTURBANCE_RADIUS_MM)
+        self.confidence *= PICK_CONFIDENCE_DECAY
+
+    def on_verification_failed(self):
+        self.confidence *= FAILED_VERIFICATION_CONFIDENCE_DECAY
+
+    def needs_redetection(self):
+        return (not self.remaining.any()) or (self.confidence < MIN_DETECTION_CONFIDENCE)
+
+    def get_scores(self, head_x, head_y, next_well_x, next_well_y):
+        travel = get_distances(self.targets_mm, head_x, head_y) + get_distances(self.targets_mm, next_well_x,
+                                                                                 next_well_y)
+        from_center = get_distances(self.targets_mm, self.dish_x, self.dish_y)
+
+        return travel + (CENTER_WEIGHT * from_center) + (DENSITY_RISK_WEIGHT_MM * self.target_risks)
+
+    def choose_next_target(self, head_x, head_y, next_well_x, next_well_y):
+        # Returns (x_px, y_px, x_mm, y_mm) for the cheapest target not handed out yet, or None once there are none
+        if not self.remaining.any():
+            return None
+
+        scores = self.get_scores(head_x, head_y, next_well_x, next_well_y)
+        scores[~self.remaining] = numpy.inf
+
+        index = int(numpy.argmin(scores))
+        self.remaining[index] = False
+
+        return (float(self.targets_px[index, X_VAL]), float(self.targets_px[index, Y_VAL]),
+                float(self.targets_mm[index, X_VAL]), float(self.targets_mm[index, Y_VAL]))
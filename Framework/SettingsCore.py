@@ -42,9 +42,37 @@ from PyQt4 import QtCore
 
 
 #####################################
-# PickAndPlateLogger Definition
+# SettingsSnapshot Definition
+#####################################
+class SettingsSnapshot(object):
+    """
+        Read only, in memory copy of every QSettings value at the time it was made. Threads read from this instead of
+        QSettings so that per-frame and per-move code never hits the settings file. A new snapshot is made and swapped
+        in whenever settings are saved, so one that is already in use never changes underneath its reader.
+    """
+
+    def __init__(self, values):
+        self.values = dict(values)
+
+    def value(self, key, default=None):
+        if key in self.values:
+            return QtCore.QVariant(self.values[key])
+        elif default is None:
+            return QtCore.QVariant()
+        else:
+            return QtCore.QVariant(default)
+
+    def contains(self, key):
+        return key in self.values
+
+
+#####################################
+# PickAndPlateSettings Definition
 #####################################
 class PickAndPlateSettings(QtCore.QObject):
+
+    settings_snapshot_changed_signal = QtCore.pyqtSignal()
+
     def __init__(self, main_window):
         QtCore.QObject.__init__(self)
 
@@ -60,6 +88,10 @@ class PickAndPlateSettings(QtCore.QObject):
         # ########## Load settings, overwriting with defaults if no settings exist ##########
         self.load_settings_or_overwrite_with_defaults()
 
+        # ########## Make the first snapshot for the threads to read from ##########
+        self.snapshot = None
+        self.update_settings_snapshot()
+
     @staticmethod
     def setup_pick_and_plate_settings():
         QtCore.QCoreApplication.setOrganizationName("OSU SARL")
@@ -70,6 +102,17 @@ class PickAndPlateSettings(QtCore.QObject):
         self.load_system_tab_settings()
         self.settings.sync()
 
+    def update_settings_snapshot(self):
+        values = {}
+        for key in self.settings.allKeys():
+            values[str(key)] = QtCore.QVariant(self.settings.value(key))
+
+        self.snapshot = SettingsSnapshot(values)  # Single reference swap, so readers see either the old or new one
+        self.settings_snapshot_changed_signal.emit()
+
+    def on_settings_saved_slot(self):
+        self.update_settings_snapshot()
+
     def load_system_tab_settings(self):
         self.load_plating_calibration_tab_settings()
         self.load_system_calibration_tab_settings()
@@ -0,0 +1,283 @@
+"""
+    This file contains the TelemetryCore sub-class as part of the Framework Class
+    This class handles recording a fixed size binary record for every pick to a memory mapped ring file, and reading
+    those records back for offline analysis
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+import logging
+import struct
+import mmap
+from os import makedirs
+from os.path import expanduser, exists, getsize
+
+# Custom imports
+
+#####################################
+# Global Variables
+#####################################
+application_telemetry_path = expanduser("~") + "/.PickAndPlate/telemetry"
+application_telemetry_full_path = application_telemetry_path + "/cycle_telemetry.bin"
+
+TELEMETRY_MAGIC = b"PNPTELEM"
+TELEMETRY_VERSION = 2
+
+TELEMETRY_RECORD_CAPACITY = 8192  # About 85 full plates before the oldest records get overwritten
+
+# Magic, version, record size, record capacity, and total records ever written. Padded out to a fixed size.
+HEADER_STRUCT = struct.Struct("<8sIIIQ")
+HEADER_SIZE = 64
+
+MAX_PHASES = 16
+
+# Run start time, pick number, well number, image type, outcome, target x/y px, target x/y mm, well x/y mm,
+# embryos detected, embryos pickable, targets remaining in the working list, embryos near the target before the pick,
+# then a timestamp for every phase followed by the TinyG x/y/z/a position at every phase
+RECORD_STRUCT = struct.Struct("<dIHBBffffffHHHH" + ("d" * MAX_PHASES) + ("f" * (MAX_PHASES * 4)))
+OUTCOME_OFFSET = struct.calcsize("<dIHB")
+
+# In the order they happen in a pick
+PHASE_CYCLE_START = 0
+PHASE_IMAGE_READY = 1
+PHASE_PROGRAM_START = 2
+PHASE_OVER_EMBRYO = 3
+PHASE_AT_PICK_DEPTH = 4
+PHASE_ASPIRATED = 5
+PHASE_RAISED = 6
+PHASE_CAMERA_CLEAR = 7
+PHASE_AT_PLACE_DEPTH = 8
+PHASE_PLACED = 9
+PHASE_OVER_WASTE = 10
+PHASE_PROGRAM_DONE = 11
+
+PHASE_NAMES = ["Cycle Start", "Image Ready", "Program Start", "Over Embryo", "At Pick Depth", "Aspirated", "Raised",
+               "Camera Clear", "At Place Depth", "Placed", "Over Waste", "Program Done"]
+
+IMAGE_FULL_DETECTION = 0
+IMAGE_TARGET_VERIFIED = 1
+
+OUTCOME_UNKNOWN = 0
+OUTCOME_PLATED = 1
+OUTCOME_MISPICK = 2
+OUTCOME_DOUBLE_PICK = 3
+
+OUTCOME_NAMES = ["Unknown", "Plated", "Mispick", "Double Pick"]
+
+
+#####################################
+# TelemetryRecord Class Definition
+#####################################
+class TelemetryRecord(object):
+    """
+        Everything recorded about a single pick. Phases that never happened are left as a timestamp of 0.
+    """
+    __slots__ = ["run_start_time", "pick_number", "well_number", "image_type", "outcome", "target_x_px",
+                 "target_y_px", "target_x_mm", "target_y_mm", "well_x_mm", "well_y_mm", "embryos_detected",
+                 "embryos_pickable", "targets_remaining", "neighbors_before", "phase_times", "phase_positions"]
+
+    def __init__(self):
+        self.run_start_time = 0.0
+        self.pick_number = 0
+        self.well_number = 0
+        self.image_type = IMAGE_FULL_DETECTION
+        self.outcome = OUTCOME_UNKNOWN
+
+        self.target_x_px = 0.0
+        self.target_y_px = 0.0
+        self.target_x_mm = 0.0
+        self.target_y_mm = 0.0
+        self.well_x_mm = 0.0
+        self.well_y_mm = 0.0
+
+        self.embryos_detected = 0
+        self.embryos_pickable = 0
+        self.targets_remaining = 0
+        self.neighbors_before = 0
+
+        self.phase_times = [0.0] * MAX_PHASES
+        self.phase_positions = [0.0] * (MAX_PHASES * 4)
+
+    def set_phase(self, phase, timestamp, x, y, z, a):
+        self.phase_times[phase] = timestamp
+        self.phase_positions[(phase * 4):((phase + 1) * 4)] = [x, y, z, a]
+
+    def get_phase_position(self, phase):
+        return tuple(self.phase_positions[(phase * 4):((phase + 1) * 4)])
+
+    def pack(self):
+        return RECORD_STRUCT.pack(self.run_start_time, self.pick_number, self.well_number, self.image_type,
+                                  self.outcome, self.target_x_px, self.target_y_px, self.target_x_mm, self.target_y_mm,
+                                  self.well_x_mm, self.well_y_mm, min(self.embryos_detected, 0xFFFF),
+                                  min(self.embryos_pickable, 0xFFFF), min(self.targets_remaining, 0xFFFF),
+                                  min(self.neighbors_before, 0xFFFF), *(self.phase_times + self.phase_positions))
+
+    @classmethod
+    def unpack(cls, data):
+        values = RECORD_STRUCT.unpack(data)
+
+        record = cls()
+        (record.run_start_time, record.pick_number, record.well_number, record.image_type, record.outcome,
+         record.target_x_px, record.target_y_px, record.target_x_mm, record.target_y_mm, record.well_x_mm,
+         record.well_y_mm, record.embryos_detected, record.embryos_pickable, record.targets_remaining,
+         record.neighbors_before) = values[:15]
+
+        record.phase_times = list(values[15:(15 + MAX_PHASES)])
+        record.phase_positions = list(values[(15 + MAX_PHASES):])
+
+        return record
+
+
+#####################################
+# TelemetryRecorder Class Definition
+#####################################
+class TelemetryRecorder(object):
+    """
+        Appends TelemetryRecords to a ring of fixed size slots in a memory mapped file. A write is just a copy into
+        memory that the kernel writes back on its own, so it takes microseconds and never waits on the disk. The file
+        is fully allocated when it's made so the first write into a slot doesn't have to wait on that either. Only
+        one thread should write records. If the file can't be opened, recording is turned off and a warning logged.
+    """
+
+    def __init__(self, path=application_telemetry_full_path, capacity=TELEMETRY_RECORD_CAPACITY):
+        self.logger = logging.getLogger("PickAndPlate")
+
+        self.path = path
+        self.capacity = capacity
+        self.records_written = 0
+
+        self.file = None
+        self.mmap = None
+
+        try:
+            self.open_ring_file()
+        except (IOError, OSError, ValueError, mmap.error):
+            self.logger.warning("Unable to open telemetry file " + self.path + ". Telemetry will not be recorded.")
+            self.close()
+
+    def open_ring_file(self):
+        file_size = HEADER_SIZE + (RECORD_STRUCT.size * self.capacity)
+
+        if not exists(self.path.rsplit("/", 1)[0]):
+            makedirs(self.path.rsplit("/", 1)[0])
+
+        header = read_header(self.path) if exists(self.path) and (getsize(self.path) == file_size) else None
+
+        if (header is None) or (header[1:4] != (TELEMETRY_VERSION, RECORD_STRUCT.size, self.capacity)):
+            with open(self.path, "wb") as new_file:
+                new_file.write(b"\0" * file_size)
+            self.records_written = 0
+        else:
+            self.records_written = header[4]
+
+        self.file = open(self.path, "r+b")
+        self.mmap = mmap.mmap(self.file.fileno(), file_size)
+        self.write_header()
+
+    def write_header(self):
+        self.mmap[0:HEADER_STRUCT.size] = HEADER_STRUCT.pack(TELEMETRY_MAGIC, TELEMETRY_VERSION, RECORD_STRUCT.size,
+                                                              self.capacity, self.records_written)
+
+    def get_record_offset(self, record_number):
+        return HEADER_SIZE + ((record_number % self.capacity) * RECORD_STRUCT.size)
+
+    def append(self, record):
+        # Returns the record number, which can be used to update the record's outcome later, or None if not recording
+        if self.mmap is None:
+            return None
+
+        record_number = self.records_written
+        offset = self.get_record_offset(record_number)
+
+        self.mmap[offset:(offset + RECORD_STRUCT.size)] = record.pack()
+
+        # Only counted once the whole record is in place, so a reader never sees half of one
+        self.records_written += 1
+        self.write_header()
+
+        return record_number
+
+    def update_outcome(self, record_number, outcome):
+        if (self.mmap is None) or (record_number is None) or \
+                (record_number < (self.records_written - self.capacity)):
+            return  # Already overwritten by newer records
+
+        offset = self.get_record_offset(record_number) + OUTCOME_OFFSET
+        self.mmap[offset:(offset + 1)] = struct.pack("<B", outcome)
+
+    def flush(self):
+        # Not for the middle of a pick, this waits on the disk
+        if self.mmap is not None:
+            self.mmap.flush()
+
+    def close(self):
+        if self.mmap is not None:
+            self.mmap.flush()
+            self.mmap.close()
+            self.mmap = None
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+#####################################
+# Telemetry Reading Functions
+#####################################
+def read_header(path):
+    with open(path, "rb") as telemetry_file:
+        header = HEADER_STRUCT.unpack(telemetry_file.read(HEADER_STRUCT.size))
+
+    if header[0] != TELEMETRY_MAGIC:
+        return None
+
+    return header
+
+
+def read_records(path=application_telemetry_full_path):
+    """
+        Returns every record still in the ring file, oldest first. Safe to run while the recorder is writing, since it
+        only reads records the header says are complete.
+    """
+    header = read_header(path)
+    if header is None:
+        raise ValueError(path + " is not a telemetry file.")
+
+    _, version, record_size, capacity, records_written = header
+    if (version != TELEMETRY_VERSION) or (record_size != RECORD_STRUCT.size):
+        raise ValueError(path + " was written by a different telemetry version.")
+
+    records = []
+
+    with open(path, "rb") as telemetry_file:
+        for record_number in range(max(0, records_written - capacity), records_written):
+            telemetry_file.seek(HEADER_SIZE + ((record_number % capacity) * record_size))
+            records.append(TelemetryRecord.unpack(telemetry_file.read(record_size)))
+
+    return records
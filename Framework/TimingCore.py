@@ -0,0 +1,141 @@
+"""
+    This file contains the TimingCore sub-class as part of the Framework Class
+    This class handles keeping rolling histograms of how long each phase of a pick takes
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+from collections import deque
+from bisect import bisect_left
+
+# Custom imports
+
+#####################################
+# Global Variables
+#####################################
+ROLLING_WINDOW_SIZE = 50  # Samples kept per histogram, about half a plate
+
+# Upper edges in seconds of every bucket but the last, which catches everything longer
+DEFAULT_BUCKET_EDGES = [0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 60.0]
+
+
+#####################################
+# RollingHistogram Class Definition
+#####################################
+class RollingHistogram(object):
+    """
+        Bucket counts and a running total over only the newest samples. Adding a sample is a bisect and a couple of
+        increments, with no sorting or summing over the window, so it's cheap enough to call in the middle of a pick.
+    """
+
+    def __init__(self, bucket_edges=DEFAULT_BUCKET_EDGES, window_size=ROLLING_WINDOW_SIZE):
+        self.bucket_edges = bucket_edges
+        self.window_size = window_size
+
+        self.samples = deque()  # (value, bucket index)
+        self.counts = [0] * (len(bucket_edges) + 1)
+        self.total = 0.0
+
+    def add(self, value):
+        bucket = bisect_left(self.bucket_edges, value)
+
+        self.samples.append((value, bucket))
+        self.counts[bucket] += 1
+        self.total += value
+
+        if len(self.samples) > self.window_size:
+            old_value, old_bucket = self.samples.popleft()
+            self.counts[old_bucket] -= 1
+            self.total -= old_value
+
+    def clear(self):
+        self.samples.clear()
+        self.counts = [0] * (len(self.bucket_edges) + 1)
+        self.total = 0.0
+
+    def get_mean(self):
+        return (self.total / len(self.samples)) if self.samples else 0.0
+
+    def get_percentile(self, percent):
+        # Upper edge of the bucket the percentile falls in, or the largest sample if it's past the last edge
+        if not self.samples:
+            return 0.0
+
+        needed = (percent / 100.0) * len(self.samples)
+        seen = 0
+
+        for bucket, count in enumerate(self.counts[:-1]):
+            seen += count
+            if count and (seen >= needed):
+                return self.bucket_edges[bucket]
+
+        return max(value for value, _ in self.samples)
+
+    def __len__(self):
+        return len(self.samples)
+
+
+#####################################
+# PhaseTimings Class Definition
+#####################################
+class PhaseTimings(object):
+    """
+        A RollingHistogram for each named span, kept in the order the spans were first added.
+    """
+
+    def __init__(self, window_size=ROLLING_WINDOW_SIZE):
+        self.window_size = window_size
+
+        self.span_names = []
+        self.histograms = {}
+
+    def add(self, span_name, seconds):
+        if span_name not in self.histograms:
+            self.span_names.append(span_name)
+            self.histograms[span_name] = RollingHistogram(window_size=self.window_size)
+
+        self.histograms[span_name].add(seconds)
+
+    def get_mean(self, span_name):
+        return self.histograms[span_name].get_mean() if span_name in self.histograms else 0.0
+
+    def clear(self):
+        self.span_names = []
+        self.histograms = {}
+
+    def get_summary_lines(self):
+        lines = []
+
+        for span_name in self.span_names:
+            histogram = self.histograms[span_name]
+            lines.append("%-16s mean %7.0f ms  p50 <= %7.0f ms  p90 <= %7.0f ms" % (
+                span_name + ":", histogram.get_mean() * 1000, histogram.get_percentile(50) * 1000,
+                histogram.get_percentile(90) * 1000))
+
+        return lines
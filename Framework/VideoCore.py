@@ -37,10 +37,15 @@ import cv2
 import numpy
 import qimage2ndarray
 import subprocess
-from math import sqrt, isnan, pow
+import time
 from datetime import datetime
 
 # Custom imports
+from Framework.EmbryoCore import EmbryoSet
+from Framework.MailboxCore import LatestValueMailbox
+from Framework.DetectionCore import DishDetector, get_profile_prefix
+from Framework.WaitCore import ConditionWaiter
+from Framework.WakeupCore import WakeupCounter
 
 #####################################
 # Global Variables
@@ -58,6 +63,12 @@ CV_CAP_PROP_FRAME_HEIGHT = 4
 CV_CAP_PROP_FPS = 5
 CV_CAP_PROP_FOURCC = 6
 
+FRAME_BUFFER_SIZE = 3  # Number of preallocated frames the grabber cycles through
+FRAME_WAIT_TIMEOUT_MS = 500  # Longest a consumer blocks waiting on a new frame before re-checking its own flags
+GRABBER_RETRY_DELAY_MS = 15
+CAMERA_RECONNECT_DELAY_MS = 500
+VIDEO_IDLE_WAIT_MS = 60000  # Every state change notifies, this only bounds how long a missed one could go unnoticed
+
 RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 
@@ -74,6 +85,12 @@ GREEN = (0, 255, 0)
 # FrameGrabber Class
 #####################################
 class FrameGrabber(QtCore.QThread):
+    """
+        The only thread that talks to the camera. Each frame is grabbed and decoded exactly once into a small ring of
+        preallocated frames, tagged with a sequence number and the time it was grabbed. Consumers copy frames out
+        under the lock, blocking on a wait condition until one newer than what they need shows up.
+    """
+
     def __init__(self, x, y):
         QtCore.QThread.__init__(self)
 
@@ -87,29 +104,124 @@ class FrameGrabber(QtCore.QThread):
         self.process_continuous = False
         self.process_single = False
 
+        self.frame_mutex = QtCore.QMutex()
+        self.frame_ready_condition = QtCore.QWaitCondition()
+        self.processing_state_condition = QtCore.QWaitCondition()
+
+        self.frame_buffers = [numpy.zeros((y, x, 3), numpy.uint8) for _ in range(FRAME_BUFFER_SIZE)]
+        self.frame_sequence_numbers = [0] * FRAME_BUFFER_SIZE
+        self.frame_timestamps = [0.0] * FRAME_BUFFER_SIZE
+        self.latest_frame_index = None
+        self.frame_sequence_number = 0
+
+        self.wakeup_counter = WakeupCounter("Frame Grabber")
+
     def run(self):
         while self.not_abort:
-            if self.process_continuous:
-                self.video_camera.grab()
-                self.msleep(15)
-            elif self.process_single:
-                self.video_camera.grab()
+            self.wakeup_counter.count()
+
+            if self.process_continuous or self.process_single:
                 self.process_single = False
+                self.capture_frame()
             else:
-                self.msleep(200)
+                # Every change to the processing state or abort flag wakes this under the same lock, so it can sleep
+                # until one happens without a timeout
+                self.frame_mutex.lock()
+                if self.not_abort and not (self.process_continuous or self.process_single):
+                    self.processing_state_condition.wait(self.frame_mutex)
+                self.frame_mutex.unlock()
+
+        self.frame_mutex.lock()
+        self.frame_ready_condition.wakeAll()
+        self.frame_mutex.unlock()
+
+    def capture_frame(self):
+        if not self.video_camera.grab():
+            self.msleep(GRABBER_RETRY_DELAY_MS)
+            return
+
+        grab_time = time.time()
+
+        # The slot after the latest is never the one consumers copy from, so it can be decoded into without the lock
+        if self.latest_frame_index is None:
+            frame_index = 0
+        else:
+            frame_index = (self.latest_frame_index + 1) % FRAME_BUFFER_SIZE
+
+        return_val, frame = self.video_camera.retrieve(self.frame_buffers[frame_index])
+        if (not return_val) or (frame is None):
+            return
+
+        self.frame_mutex.lock()
+        self.frame_sequence_number += 1
+        self.frame_buffers[frame_index] = frame
+        self.frame_sequence_numbers[frame_index] = self.frame_sequence_number
+        self.frame_timestamps[frame_index] = grab_time
+        self.latest_frame_index = frame_index
+        self.frame_ready_condition.wakeAll()
+        self.frame_mutex.unlock()
+
+    def get_latest_frame(self, output_frame=None):
+        self.frame_mutex.lock()
+        try:
+            return self.copy_latest_frame(output_frame)
+        finally:
+            self.frame_mutex.unlock()
+
+    def wait_for_frame_after(self, timestamp, output_frame=None, timeout_ms=FRAME_WAIT_TIMEOUT_MS):
+        deadline = time.time() + (timeout_ms / 1000.0)
+
+        self.frame_mutex.lock()
+        try:
+            while (self.latest_frame_index is None) or (self.frame_timestamps[self.latest_frame_index] <= timestamp):
+                remaining_ms = int((deadline - time.time()) * 1000)
+                if (not self.not_abort) or (remaining_ms <= 0):
+                    return None
+                self.frame_ready_condition.wait(self.frame_mutex, remaining_ms)
+
+            return self.copy_latest_frame(output_frame)
+        finally:
+            self.frame_mutex.unlock()
+
+    def copy_latest_frame(self, output_frame):
+        # Must be called with frame_mutex held. Returns (frame, sequence number, grab time) or None if no frames yet
+        if self.latest_frame_index is None:
+            return None
+
+        frame = self.frame_buffers[self.latest_frame_index]
+
+        if (output_frame is None) or (output_frame.shape != frame.shape) or (output_frame.dtype != frame.dtype):
+            output_frame = frame.copy()
+        else:
+            output_frame[...] = frame
+
+        return (output_frame, self.frame_sequence_numbers[self.latest_frame_index],
+                self.frame_timestamps[self.latest_frame_index])
+
+    def set_processing_state(self, continuous, single):
+        self.frame_mutex.lock()
+        self.process_continuous = continuous
+        self.process_single = single
+        self.processing_state_condition.wakeAll()
+        self.frame_mutex.unlock()
 
     def set_process_continuous(self):
-        self.process_single = False
-        self.process_continuous = True
+        if not self.process_continuous:
+            self.set_processing_state(True, False)
 
     def set_process_single(self):
-        self.process_continuous = False
-        self.process_single = True
+        self.set_processing_state(False, True)
 
     def stop_processing(self):
-        self.process_single = False
-        self.process_continuous = False
+        if self.process_continuous or self.process_single:
+            self.set_processing_state(False, False)
 
+    def abort(self):
+        self.frame_mutex.lock()
+        self.not_abort = False
+        self.processing_state_condition.wakeAll()
+        self.frame_ready_condition.wakeAll()
+        self.frame_mutex.unlock()
 
 
 #####################################
@@ -122,6 +234,7 @@ class PickAndPlateVideo(QtCore.QThread):
     CYCLE_RUN = "Cycle Run"
 
     requested_image_ready_signal = QtCore.pyqtSignal()
+    target_verified_signal = QtCore.pyqtSignal(bool, float, float)
     embryo_info_signal = QtCore.pyqtSignal(int, int, int)
     number_embryos_detected_signal = QtCore.pyqtSignal(int)
 
@@ -131,12 +244,12 @@ class PickAndPlateVideo(QtCore.QThread):
         # ########## Get the Pick And Plate instance of the logger ##########
         self.logger = logging.getLogger("PickAndPlate")
 
-        # ########## Get the Pick And Plate settings instance ##########
-        self.settings = QtCore.QSettings()
-
         # ########## Reference to highest level window ##########
         self.main_window = main_window
 
+        # ########## Get the Pick And Plate settings instance, whose snapshot is read instead of QSettings ##########
+        self.settings_core = self.main_window.settings
+
         # ########## Thread flags ##########
         self.not_abort_flag = True
 
@@ -145,6 +258,8 @@ class PickAndPlateVideo(QtCore.QThread):
 
         self.setup_params_once = False
         self.wait_for_image_req = True
+        self.image_request_not_before = 0.0
+        self.verify_target_px = None  # Set when the cycle only wants one earlier target checked, not a full detection
 
         # ########## Class Variables ##########
         self.frame_grabber = None
@@ -153,11 +268,13 @@ class PickAndPlateVideo(QtCore.QThread):
         self.dev_null_writer = open('/dev/null', 'w')
 
         self.raw_frame = numpy.array([])
+        self.raw_frame_sequence_number = 0
+        self.raw_frame_timestamp = 0
         self.rgb_frame = numpy.array([])
-        self.greyscale_frame = numpy.array([])
 
         self.cropped_only_raw = None
         self.settings_and_cal_qimage = None
+        self.settings_and_cal_image_mailbox = LatestValueMailbox()
         self.cycle_monitor_qimage = None
         self.last_pick_qimage = None
         self.current_pick_qimage = None
@@ -167,30 +284,22 @@ class PickAndPlateVideo(QtCore.QThread):
         self.video_output_type = None
         self.detection_profile_name = None
 
-        self.images_displayed = False
         self.count = 0
 
-        self.current_params = cv2.SimpleBlobDetector_Params()
+        self.dish_detector = DishDetector()
         self.keypoints = None
-        self.valid_embryos = None
-        self.pickable_embryos = None
-
-        self.embryo_set_en = 0
-        self.embryo_min_dist = 0
-        self.embryo_min_size = 0
-        self.embryo_max_size = 0
+        self.embryo_set = EmbryoSet()
 
         self.min_thresh = 0
         self.x_res = 0
         self.y_res = 0
-        self.x_center = 0
-        self.y_center = 0
-        self.crop_dim_half = 0
-        self.usable_offset = 0
 
         self.take_image = True
         self.image_count = 0
 
+        self.state_waiter = ConditionWaiter()
+        self.wakeup_counter = WakeupCounter("Video")
+
         # ########## Make signal/slot connections ##########
         self.connect_signals_to_slots()
 
@@ -198,35 +307,44 @@ class PickAndPlateVideo(QtCore.QThread):
         self.start()
 
     def connect_signals_to_slots(self):
-        pass
+        self.settings_core.settings_snapshot_changed_signal.connect(self.on_settings_snapshot_changed_slot)
 
     def run(self):
         self.logger.debug("PickAndPlate Video Thread Starting...")
         while self.not_abort_flag:
+            self.wakeup_counter.count()
+
             if self.reconnect_to_camera_flag:
                 self.reconnect_to_camera()
-                self.msleep(500)
+                self.state_waiter.wait_for(lambda: not self.not_abort_flag, CAMERA_RECONNECT_DELAY_MS)
             elif self.camera_connected_flag:
                 if self.video_being_used:
-                    #self.frame_grabber.should_process_video = True
-                    self.get_camera_frame()
-                    self.show_needed_images()
+                    self.frame_grabber.set_process_continuous()
+                    if self.get_camera_frame():  # Blocks until the grabber has a frame newer than the last one used
+                        self.show_needed_images()
                 else:
                     self.frame_grabber.stop_processing()
-                    #self.frame_grabber.should_process_video = False
-                self.msleep(40)
+                    self.state_waiter.wait_for(lambda: self.video_being_used or self.reconnect_to_camera_flag or
+                                               (not self.not_abort_flag), VIDEO_IDLE_WAIT_MS)
 
-        self.frame_grabber.not_abort = False
-        self.frame_grabber.wait()
+        self.stop_frame_grabber()
         self.logger.debug("PickAndPlate Video Thread Exiting...")
 
+    def stop_frame_grabber(self):
+        if self.frame_grabber:
+            self.frame_grabber.abort()
+            self.frame_grabber.wait()
+
     def reconnect_to_camera(self):
-        x_res = self.settings.value("system/system_settings/camera_res_width").toInt()[0]
-        y_res = self.settings.value("system/system_settings/camera_res_height").toInt()[0]
+        settings = self.settings_core.snapshot
+
+        x_res = settings.value("system/system_settings/camera_res_width").toInt()[0]
+        y_res = settings.value("system/system_settings/camera_res_height").toInt()[0]
 
-        focus_value = self.settings.value("system/system_calibration/camera_focus").toInt()[0]
-        exposure_value = self.settings.value("system/system_calibration/camera_exposure").toInt()[0]
+        focus_value = settings.value("system/system_calibration/camera_focus").toInt()[0]
+        exposure_value = settings.value("system/system_calibration/camera_exposure").toInt()[0]
 
+        self.stop_frame_grabber()  # Never leave an old grabber fighting the new one for the camera
         self.frame_grabber = FrameGrabber(x_res, y_res)
 
         self.video_camera = self.frame_grabber.video_camera
@@ -240,8 +358,10 @@ class PickAndPlateVideo(QtCore.QThread):
             self.camera_connected_flag = True
 
     def configure_v4l2_camera_settings_slot(self, focus, exposure):
-        x_res = self.settings.value("system/system_settings/camera_res_width").toInt()[0]
-        y_res = self.settings.value("system/system_settings/camera_res_height").toInt()[0]
+        settings = self.settings_core.snapshot
+
+        x_res = settings.value("system/system_settings/camera_res_width").toInt()[0]
+        y_res = settings.value("system/system_settings/camera_res_height").toInt()[0]
 
         #vid_fmt_string = set_video_format_command + "width=" + str(x_res) + ",height=" + str(y_res) + ",pixelformat=1"
 
@@ -259,17 +379,16 @@ class PickAndPlateVideo(QtCore.QThread):
 
     def show_needed_images(self):
         if self.video_output_widget_name == self.DETECTION_CAL:
-            self.frame_grabber.set_process_continuous()
             self.show_detection_calibration()
         elif self.video_output_widget_name == self.SYSTEM_CAL:
-            self.frame_grabber.set_process_continuous()
             self.show_system_calibration()
         elif self.video_output_widget_name == self.CYCLE_RUN:
-            self.frame_grabber.set_process_continuous()
             self.show_cycle_run()
 
     def show_detection_calibration(self):
-        self.setup_blob_params()
+        if self.setup_params_once:
+            self.setup_blob_params()
+            self.setup_params_once = False
 
         frame = numpy.array([])
 
@@ -285,59 +404,39 @@ class PickAndPlateVideo(QtCore.QThread):
             return_val, frame = cv2.threshold(frame, self.min_thresh, 255, cv2.THRESH_BINARY)
 
         elif self.video_output_type == "Masked Threshold":
-            frame = cv2.cvtColor(self.raw_frame, cv2.COLOR_RGB2GRAY)
-
-            mask_frame = numpy.zeros((self.y_res, self.x_res), numpy.uint8)
-            cv2.circle(mask_frame, (self.x_center, self.y_center), (self.crop_dim_half - self.usable_offset), 255, -1)
-
-            frame = cv2.bitwise_and(frame, mask_frame)
-            frame = self.crop_image(frame)
+            roi_frame, roi_x, roi_y = self.dish_detector.get_dish_roi(self.raw_frame)
+            frame = self.dish_detector.get_masked_greyscale_frame(roi_frame, cv2.COLOR_RGB2GRAY)
 
         elif self.video_output_type == "Detected Threshold":
-            frame = cv2.cvtColor(self.raw_frame, cv2.COLOR_RGB2GRAY)
-
-            mask_frame = numpy.zeros((self.y_res, self.x_res), numpy.uint8)
-            cv2.circle(mask_frame, (self.x_center, self.y_center), (self.crop_dim_half - self.usable_offset), 255, -1)
+            roi_frame, roi_x, roi_y = self.dish_detector.get_dish_roi(self.raw_frame)
+            frame = self.dish_detector.get_masked_greyscale_frame(roi_frame, cv2.COLOR_RGB2GRAY)
 
-            frame = cv2.bitwise_and(frame, mask_frame)
+            frame = self.masked_detect_and_overlay(frame, frame, "GRAY", roi_x, roi_y)
 
-            frame = self.masked_detect_and_overlay(frame, frame, "GRAY")
-
-            frame = self.crop_image(frame)
         elif self.video_output_type == "Original w/ Detected":
-            frame = cv2.cvtColor(self.raw_frame, cv2.COLOR_RGB2GRAY)
-
-            mask_frame = numpy.zeros((self.y_res, self.x_res), numpy.uint8)
-            cv2.circle(mask_frame, (self.x_center, self.y_center), (self.crop_dim_half - self.usable_offset), 255, -1)
-
-            frame = cv2.bitwise_and(frame, mask_frame)
+            roi_frame, roi_x, roi_y = self.dish_detector.get_dish_roi(self.raw_frame)
+            frame = self.dish_detector.get_masked_greyscale_frame(roi_frame, cv2.COLOR_RGB2GRAY)
 
-            frame = self.masked_detect_and_overlay(frame, self.raw_frame, "BGR")
-
-            frame = self.crop_image(frame)
+            frame = self.masked_detect_and_overlay(frame, roi_frame, "BGR", roi_x, roi_y)
 
         try:
-            self.images_displayed = False
             resized = cv2.resize(frame, (250, 250))
 
             self.settings_and_cal_qimage = self.convert_to_qimage(resized)
-            self.requested_image_ready_signal.emit()
-
-            while not self.images_displayed:
-                if (not self.not_abort_flag) or (not self.video_being_used):
-                    break
-                self.msleep(10)
+            self.show_settings_and_cal_image()
         except:
             self.logger.debug("failed to convert")
 
     def show_system_calibration(self):
-        x_center = self.settings.value("system/system_calibration/crop_x_center").toInt()[0]
-        y_center = self.settings.value("system/system_calibration/crop_y_center").toInt()[0]
-        crop_dim_half = (self.settings.value("system/system_calibration/crop_dimension").toInt()[0] / 2)
-        usable_offset = self.settings.value("system/system_calibration/usable_area_offset").toInt()[0]
+        settings = self.settings_core.snapshot
+
+        x_center = settings.value("system/system_calibration/crop_x_center").toInt()[0]
+        y_center = settings.value("system/system_calibration/crop_y_center").toInt()[0]
+        crop_dim_half = (settings.value("system/system_calibration/crop_dimension").toInt()[0] / 2)
+        usable_offset = settings.value("system/system_calibration/usable_area_offset").toInt()[0]
 
-        dist_x_center = self.settings.value("system/system_calibration/distance_cal_x").toInt()[0] + x_center
-        dist_y_center = self.settings.value("system/system_calibration/distance_cal_y").toInt()[0] + y_center
+        dist_x_center = settings.value("system/system_calibration/distance_cal_x").toInt()[0] + x_center
+        dist_y_center = settings.value("system/system_calibration/distance_cal_y").toInt()[0] + y_center
 
         cv2.circle(self.raw_frame, (x_center, y_center), 3, (0, 0, 255), -1, cv2.CV_AA)
         cv2.circle(self.raw_frame, (x_center, y_center), crop_dim_half-1, (0, 0, 255), 1, cv2.CV_AA)
@@ -348,31 +447,40 @@ class PickAndPlateVideo(QtCore.QThread):
 
         try:
             self.settings_and_cal_qimage = self.convert_to_qimage(cv2.resize(frame, (250, 250)))
-            self.requested_image_ready_signal.emit()
+            self.show_settings_and_cal_image()
         except:
             self.logger.debug("failed to convert")
 
+    def show_settings_and_cal_image(self):
+        # If the gui hasn't picked up the last image yet it just gets the newer one, so video never waits on a repaint
+        if self.settings_and_cal_image_mailbox.put(self.settings_and_cal_qimage):
+            self.requested_image_ready_signal.emit()
+
     def show_cycle_run(self):
         if self.setup_params_once:
             self.setup_blob_params()
             self.setup_params_once = False
 
-        if  not self.wait_for_image_req:
+        # Skip frames grabbed before the request time, they may still show embryos that have since been picked
+        if (not self.wait_for_image_req) and (self.raw_frame_timestamp > self.image_request_not_before):
             self.wait_for_image_req = True
 
+            if self.verify_target_px is not None:
+                self.verify_cycle_run_target()
+                return
+
             try:
-                frame = cv2.cvtColor(self.raw_frame, cv2.COLOR_BGR2GRAY)  # convert color image to grey
+                roi_frame, roi_x, roi_y = self.dish_detector.get_dish_roi(self.raw_frame)  # Only the dish square gets processed
                 # return_val, frame = cv2.threshold(frame, self.min_thresh, 255, cv2.cv.CV_THRESH_BINARY)  # apply binary threshold to image
-                mask_frame = numpy.zeros((self.y_res, self.x_res), numpy.uint8)  # Setup a masking frame the size of the input frame with zeros
-                cv2.circle(mask_frame, (self.x_center, self.y_center), (self.crop_dim_half - self.usable_offset), 255, -1)  # Fill the mask with 1's for a circle where the dish is in the image
-                frame = cv2.bitwise_and(frame, mask_frame)  # Apply the mask to the input frame
-                detected_frame = self.masked_detect_and_overlay(frame, self.raw_frame, "BGR")  # Send the masked frame to blob detection
-                frame = self.crop_image(detected_frame)  # Crop image to size for display on gui
-
+                frame = self.dish_detector.get_masked_greyscale_frame(roi_frame, cv2.COLOR_BGR2GRAY)  # Grey frame with everything outside the dish blacked out
+                detected_frame = self.masked_detect_and_overlay(frame, roi_frame, "BGR", roi_x, roi_y)  # Send the masked frame to blob detection
 
-                self.cropped_only_raw = detected_frame
+                # Put the overlaid dish back into the full frame so the cycle handler can keep using full frame pixels
+                roi_height, roi_width = detected_frame.shape[:2]
+                self.raw_frame[roi_y:(roi_y + roi_height), roi_x:(roi_x + roi_width)] = detected_frame
+                self.cropped_only_raw = self.raw_frame.copy()  # raw_frame gets reused for the next camera frame
 
-                resized = cv2.resize(frame, (200, 200))
+                resized = cv2.resize(detected_frame, (200, 200))
                 self.cycle_monitor_qimage = self.convert_to_qimage(resized)
 
                 self.requested_image_ready_signal.emit()
@@ -380,149 +488,58 @@ class PickAndPlateVideo(QtCore.QThread):
             except:
                 self.logger.debug("failed to convert")
 
-    def masked_detect_and_overlay(self, input_frame, overlay_frame, overlay_type):
-        detector = cv2.SimpleBlobDetector(self.current_params)
-        self.keypoints = detector.detect(input_frame)
+    def verify_cycle_run_target(self):
+        target_x_px, target_y_px = self.verify_target_px
+
+        try:
+            found, x_px, y_px = self.dish_detector.verify_target(self.raw_frame, target_x_px, target_y_px)
+            self.cropped_only_raw = self.raw_frame.copy()  # Still needed for the pick images
+
+            self.target_verified_signal.emit(found, x_px, y_px)
+
+        except:
+            self.logger.debug("failed to verify target")
+
+    def masked_detect_and_overlay(self, input_frame, overlay_frame, overlay_type, roi_x=0, roi_y=0):
+        self.keypoints = self.dish_detector.detect_keypoints(input_frame)
         self.number_embryos_detected_signal.emit(len(self.keypoints))
 
-        if self.embryo_set_en:
+        embryo_set = self.dish_detector.get_embryo_set(self.keypoints)
+
+        if self.dish_detector.embryo_set_en:
             if overlay_type == "BGR":
                 output_frame = overlay_frame
             else:
                 output_frame = cv2.cvtColor(overlay_frame, cv2.COLOR_GRAY2BGR)
 
-            self.valid_embryos = self.get_valid_embryos(self.keypoints)
-            self.pickable_embryos = self.get_pickable_embryos(self.valid_embryos)
-
-            output_frame = self.draw_embryos(output_frame, self.valid_embryos, RED)
-            output_frame = self.draw_embryos(output_frame, self.pickable_embryos, GREEN)
+            output_frame = self.draw_embryos(output_frame, embryo_set.get_valid(), RED)
+            output_frame = self.draw_embryos(output_frame, embryo_set.get_pickable(), GREEN)
 
         else:
             output_frame = cv2.drawKeypoints(overlay_frame, self.keypoints, color=(255, 0, 0))
 
-        if self.pickable_embryos:
-            self.number_embryos_detected_signal.emit(len(self.pickable_embryos))
+        # Embryos are drawn in dish coordinates above, but everything downstream works in full frame coordinates
+        embryo_set.translate(roi_x, roi_y)
+        self.embryo_set = embryo_set
+
+        if embryo_set.number_pickable():
+            self.number_embryos_detected_signal.emit(embryo_set.number_pickable())
 
         return output_frame
 
     def setup_blob_params(self):
-        if self.detection_profile_name == "Dechorionated":
-            prefix = "d_"
-        else:
-            prefix = "c_"
-
-        min_blob_dist = self.settings.value("system/detection_calibration/" + prefix + "min_blob_distance").toDouble()[0]
-        min_repeat = self.settings.value("system/detection_calibration/" + prefix + "min_repeat").toInt()[0]
-        blob_thresh_min = self.settings.value("system/detection_calibration/" + prefix + "blob_thresh_min").toInt()[0]
-        blob_thresh_max = self.settings.value("system/detection_calibration/" + prefix + "blob_thresh_max").toInt()[0]
-        blob_thresh_step = self.settings.value("system/detection_calibration/" + prefix + "blob_thresh_step").toInt()[0]
-        blob_area_en = self.settings.value("system/detection_calibration/" + prefix + "blob_area_enabled").toInt()[0]
-        blob_area_min = self.settings.value("system/detection_calibration/" + prefix + "blob_area_min").toDouble()[0]
-        blob_area_max = self.settings.value("system/detection_calibration/" + prefix + "blob_area_max").toDouble()[0]
-        blob_circ_en = self.settings.value("system/detection_calibration/" + prefix + "blob_circularity_enabled").toInt()[0]
-        blob_circ_min = self.settings.value("system/detection_calibration/" + prefix + "blob_circularity_min").toDouble()[0]
-        blob_circ_max = self.settings.value("system/detection_calibration/" + prefix + "blob_circularity_max").toDouble()[0]
-        blob_conv_en = self.settings.value("system/detection_calibration/" + prefix + "blob_convexity_enabled").toInt()[0]
-        blob_conv_min = self.settings.value("system/detection_calibration/" + prefix + "blob_convexity_min").toDouble()[0]
-        blob_conv_max = self.settings.value("system/detection_calibration/" + prefix + "blob_convexity_max").toDouble()[0]
-        blob_inertia_en = self.settings.value("system/detection_calibration/" + prefix + "blob_inertia_enabled").toInt()[0]
-        blob_inertia_min = self.settings.value("system/detection_calibration/" + prefix + "blob_inertia_min").toDouble()[0]
-        blob_inertia_max = self.settings.value("system/detection_calibration/" + prefix + "blob_inertia_max").toDouble()[0]
-
-
-        self.current_params.minDistBetweenBlobs = min_blob_dist
-        self.current_params.minRepeatability = min_repeat
-        self.current_params.minThreshold = blob_thresh_min
-        self.current_params.maxThreshold = blob_thresh_max
-        self.current_params.thresholdStep = blob_thresh_step
-
-
-        self.current_params.filterByColor = False
-
-        if blob_area_en:
-            self.current_params.filterByArea = True
-            self.current_params.minArea = blob_area_min
-            self.current_params.maxArea = blob_area_max
-        else:
-            self.current_params.filterByArea = False
-
-        if blob_circ_en:
-            self.current_params.filterByCircularity = True
-            self.current_params.minCircularity = blob_circ_min
-            self.current_params.maxCircularity = blob_circ_max
-        else:
-            self.current_params.filterByCircularity = False
-
-        if blob_conv_en:
-            self.current_params.filterByConvexity = True
-            self.current_params.minConvexity = blob_conv_min
-            self.current_params.maxConvexity = blob_conv_max
-        else:
-            self.current_params.filterByConvexity = False
-
-        if blob_inertia_en:
-            self.current_params.filterByInertia = True
-            self.current_params.minInertiaRatio = blob_inertia_min
-            self.current_params.maxInertiaRatio = blob_inertia_max
-        else:
-            self.current_params.filterByInertia = False
-
-        self.embryo_set_en = self.settings.value("system/detection_calibration/" + prefix + "embryo_settings_enabled").toInt()[0]
-        self.embryo_min_dist = self.settings.value("system/detection_calibration/" + prefix + "embryo_min_dist").toDouble()[0]
-        self.embryo_min_size = self.settings.value("system/detection_calibration/" + prefix + "embryo_min_size").toDouble()[0]
-        self.embryo_max_size = self.settings.value("system/detection_calibration/" + prefix + "embryo_max_size").toDouble()[0]
+        settings = self.settings_core.snapshot
 
+        prefix = get_profile_prefix(self.detection_profile_name)
 
-        # self.logger.info("Min Dist:" + str(self.embryo_min_dist))
-        # self.logger.info("Min Size:" + str(self.embryo_min_size))
-        # self.logger.info("Max Size:" + str(self.embryo_max_size))
+        self.dish_detector.load_settings(settings, self.detection_profile_name)
+        self.logger.debug("Blob detector cache stats: " + str(self.dish_detector.blob_detector_cache.get_stats()))
 
-        self.min_thresh = self.settings.value("system/detection_calibration/" + prefix + "min_binary_thresh").toInt()[0]
+        self.min_thresh = settings.value("system/detection_calibration/" + prefix + "min_binary_thresh").toInt()[0]
         #FIXME: thresholding testing
-        self.min_thresh = blob_thresh_min
-        self.x_res = self.settings.value("system/system_settings/camera_res_width").toInt()[0]
-        self.y_res = self.settings.value("system/system_settings/camera_res_height").toInt()[0]
-        self.x_center = self.settings.value("system/system_calibration/crop_x_center").toInt()[0]
-        self.y_center = self.settings.value("system/system_calibration/crop_y_center").toInt()[0]
-        self.crop_dim_half = (self.settings.value("system/system_calibration/crop_dimension").toInt()[0] / 2)
-        self.usable_offset = self.settings.value("system/system_calibration/usable_area_offset").toInt()[0]
-
-    def get_valid_embryos(self, keypoints):
-        valid = []
-
-        for point in self.keypoints:
-                if (not isnan(point.pt[0])) and (not isnan(point.pt[1])) and (not isnan(point.size)):
-                    valid.append([point.pt[0], point.pt[1], point.size])
-
-        return valid
-
-    def get_pickable_embryos(self, valid):
-        pickable = []
-        min_between_embryos = self.embryo_min_dist
-        min_embryo_dia = self.embryo_min_size
-        max_embryo_dia = self.embryo_max_size
-
-        for embryo in valid:
-            x = embryo[0]
-            y = embryo[1]
-            dia = embryo[2]
-
-            if (dia >= min_embryo_dia) and (dia <= max_embryo_dia):
-                found_too_close = False
-                for comp_embryo in valid:
-                    c_x = comp_embryo[0]
-                    c_y = comp_embryo[1]
-                    c_dia = comp_embryo[2]
-
-                    if (x == c_x) and (y == c_y):
-                        pass
-                    elif (sqrt(pow(abs(x-c_x), 2) + pow(abs(y-c_y), 2))-(dia/2)-(c_dia/2)) < min_between_embryos:
-                        found_too_close = True
-                        break
-                if not found_too_close:
-                    pickable.append(embryo)
-
-        return pickable
+        self.min_thresh = settings.value("system/detection_calibration/" + prefix + "blob_thresh_min").toInt()[0]
+        self.x_res = settings.value("system/system_settings/camera_res_width").toInt()[0]
+        self.y_res = settings.value("system/system_settings/camera_res_height").toInt()[0]
 
     @staticmethod
     def draw_embryos(frame, embryos, color):
@@ -535,9 +552,11 @@ class PickAndPlateVideo(QtCore.QThread):
         return qimage2ndarray.array2qimage(input_matrix)
 
     def crop_image(self, input_matrix):
-        x_center = self.settings.value("system/system_calibration/crop_x_center").toInt()[0]
-        y_center = self.settings.value("system/system_calibration/crop_y_center").toInt()[0]
-        crop_dim_half = (self.settings.value("system/system_calibration/crop_dimension").toInt()[0] / 2)
+        settings = self.settings_core.snapshot
+
+        x_center = settings.value("system/system_calibration/crop_x_center").toInt()[0]
+        y_center = settings.value("system/system_calibration/crop_y_center").toInt()[0]
+        crop_dim_half = (settings.value("system/system_calibration/crop_dimension").toInt()[0] / 2)
         x1 = x_center - crop_dim_half
         x2 = x_center + crop_dim_half
         y1 = y_center - crop_dim_half
@@ -549,7 +568,12 @@ class PickAndPlateVideo(QtCore.QThread):
 
     def get_camera_frame(self):
         #self.raw_frame = cv2.imread('images/chorionated.png', cv2.IMREAD_COLOR)
-        return_val, self.raw_frame = self.video_camera.read()
+        frame_info = self.frame_grabber.wait_for_frame_after(self.raw_frame_timestamp, self.raw_frame)
+
+        if frame_info is None:
+            return False
+
+        self.raw_frame, self.raw_frame_sequence_number, self.raw_frame_timestamp = frame_info
 
         if self.take_image:
             if self.image_count >= 12:
@@ -559,9 +583,14 @@ class PickAndPlateVideo(QtCore.QThread):
             else:
                 self.image_count += 1
 
+        return True
+
+    def on_settings_snapshot_changed_slot(self):
+        self.setup_params_once = True
+
     def on_general_camera_settings_changed_slot(self):
-        self.settings.sync()
         self.reconnect_to_camera_flag = True
+        self.state_waiter.notify()
 
     def detection_calibration_preview_status_slot(self, enabled_state, which_image, which_profile):
         if enabled_state:
@@ -571,11 +600,13 @@ class PickAndPlateVideo(QtCore.QThread):
         self.video_output_type = which_image
         self.video_output_widget_name = self.DETECTION_CAL
         self.detection_profile_name = which_profile
+        self.state_waiter.notify()
 
     def system_calibration_preview_status_slot(self, enabled_state):
 
         self.video_being_used = enabled_state
         self.video_output_widget_name = self.SYSTEM_CAL
+        self.state_waiter.notify()
 
     def cycle_run_changed_slot(self, enabled_state, which_profile):
         if enabled_state:
@@ -586,12 +617,18 @@ class PickAndPlateVideo(QtCore.QThread):
 
         self.video_being_used = enabled_state
         self.video_output_widget_name = self.CYCLE_RUN
+        self.state_waiter.notify()
 
-    def on_cycle_run_image_requested_slot(self):
+    def on_cycle_run_image_requested_slot(self, not_before):
+        self.image_request_not_before = not_before
+        self.verify_target_px = None
         self.wait_for_image_req = False
 
-    def images_displayed_slot(self):
-        self.images_displayed = True
+    def on_cycle_run_target_verify_requested_slot(self, not_before, x_px, y_px):
+        self.image_request_not_before = not_before
+        self.verify_target_px = (x_px, y_px)
+        self.wait_for_image_req = False
 
     def on_kill_threads_slot(self):
-        self.not_abort_flag = False
\ No newline at end of file
+        self.not_abort_flag = False
+        self.state_waiter.notify()
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+    This file contains the WaitCore sub-class as part of the Framework Class
+    This class handles blocking a thread until some shared state changes, instead of sleeping and polling for it
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+from PyQt4 import QtCore
+import time
+
+# Custom imports
+
+#####################################
+# Global Variables
+#####################################
+
+
+#####################################
+# ConditionWaiter Class Definition
+#####################################
+class ConditionWaiter(object):
+    """
+        Lets one thread sleep until a condition on shared state becomes true. Whoever changes that state calls notify()
+        afterwards, which re-checks the condition in every waiting thread. Qt's wait condition is used rather than
+        python's, as python 2's threading.Condition polls in a loop when given a timeout.
+    """
+
+    def __init__(self):
+        self.mutex = QtCore.QMutex()
+        self.condition = QtCore.QWaitCondition()
+
+    def wait_for(self, predicate, timeout_ms):
+        deadline = time.time() + (timeout_ms / 1000.0)
+
+        self.mutex.lock()
+        try:
+            while not predicate():
+                remaining_ms = int((deadline - time.time()) * 1000)
+                if remaining_ms <= 0:
+                    return False
+                self.condition.wait(self.mutex, remaining_ms)
+
+            return True
+        finally:
+            self.mutex.unlock()
+
+    def notify(self):
+        # Taking the lock means a waiter is either about to check the condition or already asleep, never in between
+        self.mutex.lock()
+        self.condition.wakeAll()
+        self.mutex.unlock()
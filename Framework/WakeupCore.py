@@ -0,0 +1,122 @@
+"""
+    This file contains the WakeupCore sub-class as part of the Framework Class
+    This class handles counting how often each thread or timer wakes up, so idle overhead can be measured
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+from PyQt4 import QtCore
+import logging
+import time
+
+# Custom imports
+
+#####################################
+# Global Variables
+#####################################
+WAKEUP_REPORT_INTERVAL_MS = 60000
+
+wakeup_counters = {}  # Every counter made so far, by component name
+
+
+#####################################
+# WakeupCounter Class Definition
+#####################################
+class WakeupCounter(object):
+    """
+        Each component calls count() every time its thread loop comes around or its timer fires. Counting is a single
+        integer add, and only ever done from the component's own thread.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+        self.wakeups = 0
+
+        self.last_rate_wakeups = 0
+        self.last_rate_time = time.time()
+
+        wakeup_counters[name] = self
+
+    def count(self):
+        self.wakeups += 1
+
+    def get_rate(self):
+        # Wakeups per second since the last time this was called
+        now = time.time()
+        wakeups = self.wakeups
+
+        elapsed = now - self.last_rate_time
+        rate = ((wakeups - self.last_rate_wakeups) / elapsed) if elapsed > 0 else 0.0
+
+        self.last_rate_wakeups = wakeups
+        self.last_rate_time = now
+
+        return rate
+
+
+def get_wakeup_rates():
+    return [(name, wakeup_counters[name].get_rate()) for name in sorted(wakeup_counters)]
+
+
+#####################################
+# WakeupReporter Class Definition
+#####################################
+class WakeupReporter(QtCore.QObject):
+    """
+        Logs every component's wakeups per second at a fixed interval from a timer on the gui thread. Its own timer
+        counts as a wakeup too.
+    """
+
+    def __init__(self, interval_ms=WAKEUP_REPORT_INTERVAL_MS):
+        QtCore.QObject.__init__(self)
+
+        # ########## Get the Pick And Plate instance of the logger ##########
+        self.logger = logging.getLogger("PickAndPlate")
+
+        # ########## Class Variables ##########
+        self.wakeup_counter = WakeupCounter("Wakeup Reporter")
+
+        self.report_timer = QtCore.QTimer(self)
+        self.report_timer.setInterval(interval_ms)
+
+        # ########## Make signal/slot connections ##########
+        self.connect_signals_to_slots()
+
+        # ########## Start timer ##########
+        self.report_timer.start()
+
+    def connect_signals_to_slots(self):
+        self.report_timer.timeout.connect(self.on_report_timer_timeout_slot)
+
+    def on_report_timer_timeout_slot(self):
+        self.wakeup_counter.count()
+
+        rates = ", ".join([name + " " + "{0:.2f}".format(rate) for name, rate in get_wakeup_rates()])
+        self.logger.debug("Wakeups per second: " + rates)
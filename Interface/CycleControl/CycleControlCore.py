@@ -55,7 +55,7 @@ class CycleControl(QtCore.QThread):
     pause_cycle_signal = QtCore.pyqtSignal()
     resume_cycle_signal = QtCore.pyqtSignal()
 
-    pick_images_displayed = QtCore.pyqtSignal()
+    settings_saved_signal = QtCore.pyqtSignal()
 
     def __init__(self, main_window, master):
         QtCore.QThread.__init__(self)
@@ -96,6 +96,7 @@ class CycleControl(QtCore.QThread):
         self.time_elapsed_label = self.main_window.cycle_time_elapsed_label
         self.time_remaining_label = self.main_window.cycle_time_remaining_label
         self.success_rate_label = self.main_window.cycle_success_rate_label
+        self.embryos_per_minute_label = self.main_window.cycle_embryos_per_minute_label
 
         self.start_button = self.main_window.cycle_start_button
         self.pause_resume_button = self.main_window.cycle_pause_resume_button
@@ -110,17 +111,6 @@ class CycleControl(QtCore.QThread):
         # ########## Set labels to defaults ##########
         self.set_labels_to_defaults()
 
-        # ########## Hide Currently Unused Gui Elements ##########
-        self.current_pick_num_label.setVisible(False)
-        self.total_picked_num_label.setVisible(False)
-        self.mispick_label.setVisible(False)
-        self.double_pick_label.setVisible(False)
-        self.total_detected_label.setVisible(False)
-        self.time_elapsed_label.setVisible(False)
-        self.time_remaining_label.setVisible(False)
-        self.success_rate_label.setVisible(False)
-
-
     def connect_signals_to_slots(self):
         self.start_button.clicked.connect(self.on_start_button_pressed_slot)
         self.pause_resume_button.clicked.connect(self.on_pause_resume_button_pressed_slot)
@@ -146,9 +136,10 @@ class CycleControl(QtCore.QThread):
         self.main_window.cycle_handler.interface_cycle_stop_signal.connect(self.on_stop_button_pressed_slot)
         self.main_window.cycle_handler.pick_images_ready_signal.connect(self.on_pick_images_ready_slot)
         self.main_window.cycle_handler.pick_positions_ready_signal.connect(self.on_pick_locations_updated_slot)
+        self.main_window.cycle_handler.cycle_stats_ready_signal.connect(self.on_cycle_stats_ready_slot)
 
-        # CycleControl to CycleHandler
-        self.pick_images_displayed.connect(self.main_window.cycle_handler.on_pick_images_displayed_slot)
+        # CycleControl to Settings
+        self.settings_saved_signal.connect(self.main_window.settings.on_settings_saved_slot)
 
 
     def set_labels_to_defaults(self):
@@ -195,6 +186,7 @@ class CycleControl(QtCore.QThread):
         self.time_elapsed_label.setText("N/A")
         self.time_remaining_label.setText("N/A")
         self.success_rate_label.setText("N/A")
+        self.embryos_per_minute_label.setText("N/A")
 
     def on_start_button_pressed_slot(self):
         self.set_labels_to_defaults()
@@ -248,31 +240,37 @@ class CycleControl(QtCore.QThread):
         if checked:
             self.quick_c_button.setChecked(False)
             self.settings.setValue("quick_settings/embryo_type", "Dechorionated")
+            self.settings_saved_signal.emit()
 
     def on_chorionated_button_clicked(self, checked):
         if checked:
             self.quick_d_button.setChecked(False)
             self.settings.setValue("quick_settings/embryo_type", "Chorionated")
+            self.settings_saved_signal.emit()
 
     def on_normal_run_button_clicked(self, checked):
         if checked:
             self.quick_clean_button.setChecked(False)
             self.settings.setValue("quick_settings/run_type", "Normal")
+            self.settings_saved_signal.emit()
 
     def on_clean_run_button_clicked(self, checked):
         if checked:
             self.quick_normal_button.setChecked(False)
             self.settings.setValue("quick_settings/run_type", "Clean")
+            self.settings_saved_signal.emit()
 
     def on_rows_first_button_clicked(self, checked):
         if checked:
             self.quick_cols_button.setChecked(False)
             self.settings.setValue("quick_settings/plating_order", "Rows")
+            self.settings_saved_signal.emit()
 
     def on_cols_first_button_clicked(self, checked):
         if checked:
             self.quick_rows_button.setChecked(False)
             self.settings.setValue("quick_settings/plating_order", "Cols")
+            self.settings_saved_signal.emit()
 
     def on_cycle_monitor_image_ready_slot(self):
         try:
@@ -281,23 +279,45 @@ class CycleControl(QtCore.QThread):
             pass
 
     def on_pick_images_ready_slot(self):
+        last_pick_qimage, current_pick_qimage = self.main_window.cycle_handler.pick_images_mailbox.get()
+
         try:
-            self.last_pick_label.setPixmap(QtGui.QPixmap.fromImage(
-                    self.main_window.cycle_handler.last_pick_qimage))
+            self.last_pick_label.setPixmap(QtGui.QPixmap.fromImage(last_pick_qimage))
         except:
             pass
 
         try:
-            self.current_pick_label.setPixmap(QtGui.QPixmap.fromImage(
-                    self.main_window.cycle_handler.current_pick_qimage))
+            self.current_pick_label.setPixmap(QtGui.QPixmap.fromImage(current_pick_qimage))
         except:
             pass
 
-        self.pick_images_displayed.emit()
-
     def on_pick_locations_updated_slot(self, x, y):
         x_text = "X: {0:.3f}".format(x)
         y_text = "Y: {0:.3f}".format(y)
 
         self.last_pick_pos_label.setText(self.current_pick_pos_label.text())
-        self.current_pick_pos_label.setText(x_text + " | " + y_text)
\ No newline at end of file
+        self.current_pick_pos_label.setText(x_text + " | " + y_text)
+
+    def on_cycle_stats_ready_slot(self):
+        cycle_stats = self.main_window.cycle_handler.cycle_stats_mailbox.get()
+
+        self.current_pick_num_label.setText(str(cycle_stats["current_pick_number"]))
+        self.total_picked_num_label.setText(str(cycle_stats["total_plated"]))
+        self.mispick_label.setText(str(cycle_stats["mispicks"]))
+        self.double_pick_label.setText(str(cycle_stats["double_picks"]))
+        self.total_detected_label.setText(str(cycle_stats["total_detected"]))
+        self.time_elapsed_label.setText(self.format_duration(cycle_stats["time_elapsed"]))
+        self.time_remaining_label.setText(self.format_duration(cycle_stats["time_remaining"]))
+        self.embryos_per_minute_label.setText("{0:.1f}".format(cycle_stats["embryos_per_minute"]))
+
+        if cycle_stats["success_rate"] is None:
+            self.success_rate_label.setText("N/A")
+        else:
+            self.success_rate_label.setText("{0:.0f}%".format(cycle_stats["success_rate"]))
+
+    @staticmethod
+    def format_duration(seconds):
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+
+        return "{0:02d}:{1:02d}:{2:02d}".format(hours, minutes, seconds)
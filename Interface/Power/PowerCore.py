@@ -72,8 +72,10 @@ class Power(QtCore.QObject):
         self.threads.append(self.main_window.video)
         self.threads.append(self.main_window.controller)
         self.threads.append(self.main_window.cycle_handler)
-        self.threads.append(self.master.status)
-        self.threads.append(self.master.tables_tab)
+
+        # ########## References to objects that only run timers on the gui thread, stopped but not waited on ##########
+        self.timer_objects = []
+        self.timer_objects.append(self.master.status)
 
         # ########## Setup signal and slot connections ##########
         self.connect_signals_to_slots()
@@ -88,6 +90,9 @@ class Power(QtCore.QObject):
         for thread in self.threads:
             self.kill_threads_signal.connect(thread.on_kill_threads_slot)
 
+        for timer_object in self.timer_objects:
+            self.kill_threads_signal.connect(timer_object.on_kill_threads_slot)
+
     def kill_all_threads(self):
         self.kill_threads_signal.emit()
 
@@ -115,6 +120,9 @@ class Power(QtCore.QObject):
             else:
                 all_threads_killed = True
 
+        # ########## Last, so everything the threads logged on their way out makes it to the log file ##########
+        self.main_window.logger_core.on_kill_threads_slot()
+
     def on_reboot_button_pressed_slot(self):
         self.kill_all_threads()
         subprocess.Popen(reboot_command.split(), stdout=subprocess.PIPE)
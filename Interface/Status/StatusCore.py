@@ -36,6 +36,7 @@ import logging
 import datetime
 
 # Custom imports
+from Framework.WakeupCore import WakeupCounter
 
 #####################################
 # Global Variables
@@ -48,15 +49,17 @@ UTC_offsets = [
     (10, 30), (11, 0), (11, 30), (12, 0), (12, 45), (13, 0), (14, 0)
 ]
 
+DATETIME_ID_UPDATE_INTERVAL_MS = 10000  # Ten second update interval
+
 #####################################
 # Status Class Definition
 #####################################
-class Status(QtCore.QThread):
+class Status(QtCore.QObject):
 
     datetime_id_changed_signal = QtCore.pyqtSignal(str)
 
     def __init__(self, main_window, master):
-        QtCore.QThread.__init__(self)
+        QtCore.QObject.__init__(self)
 
         # ########## Get the Pick And Plate instance of the logger ##########
         self.logger = logging.getLogger("PickAndPlate")
@@ -75,38 +78,29 @@ class Status(QtCore.QThread):
 
         self.main_tab_widget = self.master.main_tab_widget
 
-        # ########## Thread flags ##########
-        self.thread_sleep_ms = 200
-        self.not_abort_flag = True
-
         # ########## Class Variables ##########
         self.previous_date_id_string = None
 
-        self.date_id_label_update_timeout = 10000  # Ten second update interval
-        self.datetime_id_update_counter = self.date_id_label_update_timeout
+        # Only wakes up when the label may need to change, rather than a thread checking a counter five times a second
+        self.datetime_id_update_timer = QtCore.QTimer(self)
+        self.datetime_id_update_timer.setInterval(DATETIME_ID_UPDATE_INTERVAL_MS)
+
+        self.wakeup_counter = WakeupCounter("Status")
 
         # ########## Make signal/slot connections ##########
         self.connect_signals_to_slots()
 
         # ########## Start timer ##########
-        self.start()
+        self.get_new_datetime_id_string()
+        self.datetime_id_update_timer.start()
 
     def connect_signals_to_slots(self):
         self.datetime_id_changed_signal.connect(self.update_datetime_id_label)
+        self.datetime_id_update_timer.timeout.connect(self.on_datetime_id_update_timer_timeout_slot)
 
-    def run(self):
-        self.logger.debug("Status Thread Starting..")
-
-        while self.not_abort_flag:
-
-            if self.datetime_id_update_counter >= self.date_id_label_update_timeout:
-                self.get_new_datetime_id_string()
-                self.datetime_id_update_counter = 0
-
-            self.datetime_id_update_counter += self.thread_sleep_ms
-            self.msleep(self.thread_sleep_ms)
-
-        self.logger.debug("Status Thread Exiting...")
+    def on_datetime_id_update_timer_timeout_slot(self):
+        self.wakeup_counter.count()
+        self.get_new_datetime_id_string()
 
     def get_new_datetime_id_string(self):
         unit_id = self.settings.value("system/system_settings/unit_id").toInt()[0]
@@ -136,4 +130,4 @@ class Status(QtCore.QThread):
         self.main_tab_widget.setTabText(4, string)
 
     def on_kill_threads_slot(self):
-        self.not_abort_flag = False
\ No newline at end of file
+        self.datetime_id_update_timer.stop()
\ No newline at end of file
@@ -47,7 +47,7 @@ import logging
 class DetectionCalibration(QtCore.QObject):
 
     detection_image_preview_options_changed_signal = QtCore.pyqtSignal(int, str, str)
-    image_displayed_signal = QtCore.pyqtSignal()
+    settings_saved_signal = QtCore.pyqtSignal()
 
     light_change_signal = QtCore.pyqtSignal(int)
     motor_state_change_signal = QtCore.pyqtSignal(int)
@@ -155,7 +155,7 @@ class DetectionCalibration(QtCore.QObject):
         self.detection_image_preview_options_changed_signal.connect(
             self.main_window.video.detection_calibration_preview_status_slot)
 
-        self.image_displayed_signal.connect(self.main_window.video.images_displayed_slot)
+        self.settings_saved_signal.connect(self.main_window.settings.on_settings_saved_slot)
 
         self.main_window.video.requested_image_ready_signal.connect(self.on_requested_image_ready_slot)
         self.main_window.video.number_embryos_detected_signal.connect(self.on_detected_embryos_number_changed_slot)
@@ -227,6 +227,8 @@ class DetectionCalibration(QtCore.QObject):
             self.settings.setValue("system/detection_calibration/" + prefix + "blob_inertia_max",
                                    self.blob_inertia_max_sb.value())
 
+            self.settings_saved_signal.emit()
+
     def load_and_show_settings(self):
         self.profile_change_lockout = True
 
@@ -296,9 +298,10 @@ class DetectionCalibration(QtCore.QObject):
             self.image_preview_label.clear()
 
     def on_requested_image_ready_slot(self):
-        if self.cal_preview_button.isChecked():
-            self.image_preview_label.setPixmap(QtGui.QPixmap.fromImage(self.main_window.video.settings_and_cal_qimage))
-            self.image_displayed_signal.emit()
+        qimage = self.main_window.video.settings_and_cal_image_mailbox.get()
+
+        if self.cal_preview_button.isChecked() and (qimage is not None):
+            self.image_preview_label.setPixmap(QtGui.QPixmap.fromImage(qimage))
 
     def on_detected_embryos_number_changed_slot(self, number):
         self.num_detected_label.setText(str(number))
@@ -38,6 +38,8 @@ import commands
 import socket
 
 # Custom imports
+from Framework.WaitCore import ConditionWaiter
+from Framework.WakeupCore import WakeupCounter
 
 #####################################
 # Global Variables
@@ -46,6 +48,8 @@ eth_renew_ip_command = "sudo dhclient -r && sudo dhclient eth0"
 
 internet_test_ip_address = ("8.8.8.8", 53)  # This is google's primary DNS server. Should almost never go down.
 
+NETWORK_UPDATE_INTERVAL_MS = 20 * 1000
+
 #####################################
 # DetectionCalibration Class Definition
 #####################################
@@ -75,7 +79,8 @@ class Networking(QtCore.QThread):
         self.not_abort_flag = True
 
         # ########## Class variables ##########
-        self.timeout_counter = 0
+        self.kill_waiter = ConditionWaiter()
+        self.wakeup_counter = WakeupCounter("Networking")
 
         # ########## Make signal/slot connections ##########
         self.connect_signals_to_slots()
@@ -89,13 +94,10 @@ class Networking(QtCore.QThread):
     def run(self):
         self.logger.debug("System Networking Thread Starting..")
 
-        while self.not_abort_flag:
-            if self.timeout_counter >= (20*1000):
-                self.network_update()
-                self.timeout_counter = 0
-
-            self.timeout_counter += 200
-            self.msleep(200)
+        # Sleeps the whole interval between updates, only waking early to exit
+        while not self.kill_waiter.wait_for(lambda: not self.not_abort_flag, NETWORK_UPDATE_INTERVAL_MS):
+            self.wakeup_counter.count()
+            self.network_update()
 
         self.logger.debug("System Networking Thread Exiting...")
 
@@ -134,4 +136,5 @@ class Networking(QtCore.QThread):
             return "No"
 
     def on_kill_threads_slot(self):
-        self.not_abort_flag = False
\ No newline at end of file
+        self.not_abort_flag = False
+        self.kill_waiter.notify()
\ No newline at end of file
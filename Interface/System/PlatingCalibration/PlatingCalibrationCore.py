@@ -45,6 +45,9 @@ import logging
 # PickAndPlateLogger Definition
 #####################################
 class PlatingCalibration(QtCore.QObject):
+
+    settings_saved_signal = QtCore.pyqtSignal()
+
     def __init__(self, main_window, master):
         QtCore.QObject.__init__(self)
 
@@ -105,6 +108,8 @@ class PlatingCalibration(QtCore.QObject):
         self.c_fall_time_sb.valueChanged.connect(self.save_changed_values_to_settings_slot)
         self.c_p_dwell_sb.valueChanged.connect(self.save_changed_values_to_settings_slot)
 
+        self.settings_saved_signal.connect(self.main_window.settings.on_settings_saved_slot)
+
     def save_changed_values_to_settings_slot(self):
         self.settings.setValue("system/plating_calibration/d_pick_height", self.d_pick_height_sb.value())
         self.settings.setValue("system/plating_calibration/d_place_height", self.d_place_height_sb.value())
@@ -127,6 +132,8 @@ class PlatingCalibration(QtCore.QObject):
         self.settings.setValue("system/plating_calibration/c_embryo_fall_time", self.c_fall_time_sb.value())
         self.settings.setValue("system/plating_calibration/c_placement_dwell", self.c_p_dwell_sb.value())
 
+        self.settings_saved_signal.emit()
+
     def load_and_show_settings(self):
         self.d_pick_height_sb.setValue(self.settings.value("system/plating_calibration/d_pick_height").toDouble()[0])
         self.d_place_height_sb.setValue(self.settings.value("system/plating_calibration/d_place_height").toDouble()[0])
@@ -58,6 +58,7 @@ class SystemCalibration(QtCore.QObject):
     motor_state_change_signal = QtCore.pyqtSignal(int)
 
     setting_saved_messagebox_show_signal = QtCore.pyqtSignal()
+    settings_saved_signal = QtCore.pyqtSignal()
 
     def __init__(self, main_window, master):
         QtCore.QObject.__init__(self)
@@ -171,6 +172,7 @@ class SystemCalibration(QtCore.QObject):
         self.motors_off_button.clicked.connect(self.on_motors_off_clicked_slot)
 
         self.setting_saved_messagebox_show_signal.connect(self.on_setting_saved_show_message_box_slot)
+        self.settings_saved_signal.connect(self.main_window.settings.on_settings_saved_slot)
 
         # ########## External connections ##########
         self.system_location_request_signal.connect(self.main_window.controller.broadcast_location_slot)
@@ -198,6 +200,8 @@ class SystemCalibration(QtCore.QObject):
         self.settings.setValue("system/system_calibration/distance_cal_y", self.distance_cal_y_sb.value())
         self.settings.setValue("system/system_calibration/usable_area_offset", self.usable_area_offset_sb.value())
 
+        self.settings_saved_signal.emit()
+
     def load_and_show_settings(self):
         self.crop_x_center_sb.setValue(self.settings.value("system/system_calibration/crop_x_center").toInt()[0])
         self.crop_y_center_sb.setValue(self.settings.value("system/system_calibration/crop_y_center").toInt()[0])
@@ -266,34 +270,41 @@ class SystemCalibration(QtCore.QObject):
     def on_save_precision_z_center_clicked_slot(self):
         self.settings.setValue("system/system_calibration/precision_z_x_center", self.tinyg_x_location)
         self.settings.setValue("system/system_calibration/precision_z_y_center", self.tinyg_y_location)
+        self.settings_saved_signal.emit()
         self.setting_saved_messagebox_show_signal.emit()
 
     def on_save_dish_center_clicked_slot(self):
         self.settings.setValue("system/system_calibration/dish_x_center", self.tinyg_x_location)
         self.settings.setValue("system/system_calibration/dish_y_center", self.tinyg_y_location)
+        self.settings_saved_signal.emit()
         self.setting_saved_messagebox_show_signal.emit()
 
     def on_save_a1_center_clicked_slot(self):
         self.settings.setValue("system/system_calibration/a1_x_center", self.tinyg_x_location)
         self.settings.setValue("system/system_calibration/a1_y_center", self.tinyg_y_location)
+        self.settings_saved_signal.emit()
         self.setting_saved_messagebox_show_signal.emit()
 
     def on_save_clean_center_clicked_slot(self):
         self.settings.setValue("system/system_calibration/clean_x_center", self.tinyg_x_location)
         self.settings.setValue("system/system_calibration/clean_y_center", self.tinyg_y_location)
+        self.settings_saved_signal.emit()
         self.setting_saved_messagebox_show_signal.emit()
 
     def on_save_waste_center_clicked_slot(self):
         self.settings.setValue("system/system_calibration/waste_x_center", self.tinyg_x_location)
         self.settings.setValue("system/system_calibration/waste_y_center", self.tinyg_y_location)
+        self.settings_saved_signal.emit()
         self.setting_saved_messagebox_show_signal.emit()
 
     def on_save_dish_min_clicked_slot(self):
         self.settings.setValue("system/system_calibration/dish_z_min", self.tinyg_z_location)
+        self.settings_saved_signal.emit()
         self.setting_saved_messagebox_show_signal.emit()
 
     def on_save_plate_min_clicked_slot(self):
         self.settings.setValue("system/system_calibration/plate_z_min", self.tinyg_z_location)
+        self.settings_saved_signal.emit()
         self.setting_saved_messagebox_show_signal.emit()
 
     @staticmethod
@@ -31,16 +31,27 @@ __status__ = "Development"
 # Imports
 #####################################
 # Python native imports
-from PyQt4 import QtCore
+from PyQt4 import QtCore, QtGui
+from collections import deque
+from os.path import getsize
 import logging
-from os.path import exists, getsize
 
 # Custom imports
 from Framework import LoggerCore
+from Framework.WaitCore import ConditionWaiter
+from Framework.WakeupCore import WakeupCounter
 
 #####################################
 # Global Variables
 #####################################
+LOG_UPDATE_IDLE_WAIT_MS = 60000  # Updates are notified, this only bounds how long a missed one could go unnoticed
+LOG_MIN_REFRESH_MS = 200  # Lets a burst of log lines go to the browser as one update
+
+LOG_RING_SIZE = 5000  # Most recent lines kept in memory and shown in the browser
+LOG_INITIAL_READ_BYTES = 512 * 1024  # How far back into an existing log file to start reading at launch
+
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+LOG_LEVEL_OTHER = None  # Dividers, tracebacks, and anything else without a level, which are always shown
 
 #####################################
 # Things to do
@@ -53,6 +64,7 @@ from Framework import LoggerCore
 class SystemLog(QtCore.QThread):
 
     text_ready_signal = QtCore.pyqtSignal(str)
+    new_text_ready_signal = QtCore.pyqtSignal(str)
 
     def __init__(self, main_window, master):
         QtCore.QThread.__init__(self)
@@ -75,11 +87,24 @@ class SystemLog(QtCore.QThread):
         self.debug_checkbox = self.main_window.system_log_debug_checkbox
 
         # ########## Class variables ##########
-        self.prev_checked_info = self.info_checkbox.isChecked()
-        self.prev_checked_warning = self.warning_checkbox.isChecked()
-        self.prev_checked_error = self.error_checkbox.isChecked()
-        self.prev_checked_debug = self.debug_checkbox.isChecked()
-        self.prev_log_file_size = 0
+        self.update_requested = True
+        self.refilter_requested = True
+        self.update_waiter = ConditionWaiter()
+        self.wakeup_counter = WakeupCounter("System Log")
+
+        # Tells us when the logger writes to the file, instead of checking its size five times a second
+        self.log_file_watcher = QtCore.QFileSystemWatcher([self.log_path])
+
+        # Where the next read picks up, and any line the logger was still in the middle of writing at the last read
+        self.log_file_offset = max(0, getsize(self.log_path) - LOG_INITIAL_READ_BYTES)
+        self.skip_first_partial_line = self.log_file_offset > 0
+        self.partial_line = ""
+
+        # (level, line) for the newest lines only, oldest first
+        self.log_lines = deque(maxlen=LOG_RING_SIZE)
+
+        # Set from the gui thread whenever a checkbox changes, so this thread never has to touch the widgets
+        self.shown_levels = self.get_checked_levels()
 
         # ########## Thread flags ##########
         self.not_abort_flag = True
@@ -90,75 +115,118 @@ class SystemLog(QtCore.QThread):
 
     def connect_signals_to_slots(self):
         self.text_ready_signal.connect(self.log_text_browser.setText)
+        self.new_text_ready_signal.connect(self.on_new_text_ready_slot)
+
+        self.log_file_watcher.fileChanged.connect(self.on_update_needed_slot)
+
+        self.info_checkbox.toggled.connect(self.on_levels_changed_slot)
+        self.warning_checkbox.toggled.connect(self.on_levels_changed_slot)
+        self.error_checkbox.toggled.connect(self.on_levels_changed_slot)
+        self.debug_checkbox.toggled.connect(self.on_levels_changed_slot)
 
     def run(self):
         self.logger.debug("System Log Thread Starting...")
         while self.not_abort_flag:
-            while self.should_update_text():
-                self.send_logfile_text_to_browser()
-            self.msleep(200)
+            self.update_waiter.wait_for(lambda: self.update_requested or self.refilter_requested or
+                                        (not self.not_abort_flag), LOG_UPDATE_IDLE_WAIT_MS)
+            self.wakeup_counter.count()
+
+            if (self.update_requested or self.refilter_requested) and self.not_abort_flag:
+                self.update_requested = False
+                new_lines = self.read_new_log_lines()
+
+                if self.refilter_requested:
+                    self.refilter_requested = False
+                    self.send_log_ring_text_to_browser()
+                elif new_lines:
+                    self.send_new_log_text_to_browser(new_lines)
+
+                self.msleep(LOG_MIN_REFRESH_MS)
 
         self.logger.debug("System Log Thread Exiting...")
 
-    def should_update_text(self):
-        return_value = False
+    def on_update_needed_slot(self):
+        self.update_requested = True
+        self.update_waiter.notify()
 
-        if self.info_checkbox.isChecked() != self.prev_checked_info:
-            return_value = True
-            self.prev_checked_info = self.info_checkbox.isChecked()
+    def on_levels_changed_slot(self):
+        self.shown_levels = self.get_checked_levels()
+        self.refilter_requested = True
+        self.update_waiter.notify()
 
-        if self.warning_checkbox.isChecked() != self.prev_checked_warning:
-            return_value = True
-            self.prev_checked_warning = self.warning_checkbox.isChecked()
+    def get_checked_levels(self):
+        checked_levels = {LOG_LEVEL_OTHER}
 
-        if self.error_checkbox.isChecked() != self.prev_checked_error:
-            return_value = True
-            self.prev_checked_error = self.error_checkbox.isChecked()
+        for level, checkbox in zip(LOG_LEVELS, [self.debug_checkbox, self.info_checkbox, self.warning_checkbox,
+                                                self.error_checkbox]):
+            if checkbox.isChecked():
+                checked_levels.add(level)
 
-        if self.debug_checkbox.isChecked() != self.prev_checked_debug:
-            return_value = True
-            self.prev_checked_debug = self.debug_checkbox.isChecked()
+        return checked_levels
 
-        if self.logfile_changed():
-            return_value = True
+    def read_new_log_lines(self):
+        # Only reads what the logger has appended since the last call, and adds the complete lines to the ring
+        if getsize(self.log_path) < self.log_file_offset:
+            # File was truncated or replaced, so start over from its beginning
+            self.log_file_offset = 0
+            self.skip_first_partial_line = False
+            self.partial_line = ""
+            self.log_lines.clear()
+            self.refilter_requested = True
 
-        return return_value
+        self.log_file_reader.seek(self.log_file_offset)
+        new_text = self.log_file_reader.read()
+        self.log_file_offset = self.log_file_reader.tell()
 
-    def logfile_changed(self):
-        if not exists(self.log_path):
-            return False
-        elif getsize(self.log_path) != self.prev_log_file_size:
-            self.prev_log_file_size = getsize(self.log_path)
-            return True
-        else:
-            return False
+        if not new_text:
+            return []
 
-    def send_logfile_text_to_browser(self):
-        log_browser_string = ""
+        new_text_lines = (self.partial_line + new_text).split("\n")
+        self.partial_line = new_text_lines.pop()  # Empty unless the logger was mid-line
 
-        self.log_file_reader.seek(0)
-        log_lines = self.log_file_reader.readlines()
+        if self.skip_first_partial_line and new_text_lines:
+            # Started reading partway into the file, so the first line is almost certainly cut off
+            self.skip_first_partial_line = False
+            new_text_lines.pop(0)
 
-        for line in reversed(log_lines):
+        new_lines = []
+
+        for line in new_text_lines:
             log_line_type = line.split(" ")[0]
+            level = log_line_type if log_line_type in LOG_LEVELS else LOG_LEVEL_OTHER
+            new_lines.append((level, line + "\n"))
+
+        self.log_lines.extend(new_lines)
+
+        return new_lines[-LOG_RING_SIZE:]
+
+    def get_shown_text(self, lines):
+        # Newest first, the same as the browser shows it
+        shown_levels = self.shown_levels
+        return "".join([line for level, line in reversed(lines) if level in shown_levels])
+
+    def send_log_ring_text_to_browser(self):
+        self.text_ready_signal.emit(self.get_shown_text(self.log_lines))
 
-            if log_line_type == "INFO":
-                if self.info_checkbox.isChecked():
-                    log_browser_string += line
-            elif log_line_type == "WARNING":
-                if self.warning_checkbox.isChecked():
-                    log_browser_string += line
-            elif log_line_type == "ERROR":
-                if self.error_checkbox.isChecked():
-                    log_browser_string += line
-            elif log_line_type == "DEBUG":
-                if self.debug_checkbox.isChecked():
-                    log_browser_string += line
-            else:
-                log_browser_string += line
-
-        self.text_ready_signal.emit(log_browser_string)
+    def send_new_log_text_to_browser(self, new_lines):
+        new_text = self.get_shown_text(new_lines)
+
+        if new_text:
+            self.new_text_ready_signal.emit(new_text)
+
+    def on_new_text_ready_slot(self, new_text):
+        # Newest lines go on top, then anything past the size of the ring gets trimmed off the bottom
+        document = self.log_text_browser.document()
+
+        cursor = QtGui.QTextCursor(document)
+        cursor.movePosition(QtGui.QTextCursor.Start)
+        cursor.insertText(new_text)
+
+        if document.blockCount() > LOG_RING_SIZE:
+            cursor = QtGui.QTextCursor(document.findBlockByNumber(LOG_RING_SIZE))
+            cursor.movePosition(QtGui.QTextCursor.End, QtGui.QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
 
     def on_kill_threads_slot(self):
         self.not_abort_flag = False
-
+        self.update_waiter.notify()
@@ -47,6 +47,7 @@ import logging
 class SystemSettings(QtCore.QObject):
 
     system_image_preview_options_changed_signal = QtCore.pyqtSignal(int)
+    settings_saved_signal = QtCore.pyqtSignal()
 
     def __init__(self, main_window, master):
         QtCore.QObject.__init__(self)
@@ -85,6 +86,7 @@ class SystemSettings(QtCore.QObject):
         self.camera_res_height_sb.valueChanged.connect(self.save_changed_values_to_settings_slot)
 
         self.apply_cam_settings_button.clicked.connect(self.main_window.video.on_general_camera_settings_changed_slot)
+        self.settings_saved_signal.connect(self.main_window.settings.on_settings_saved_slot)
 
         self.cal_preview_button.toggled.connect(self.system_image_preview_options_changed_slot)
         self.system_image_preview_options_changed_signal.connect(
@@ -99,6 +101,8 @@ class SystemSettings(QtCore.QObject):
         self.settings.setValue("system/system_settings/camera_res_width", self.camera_res_width_sb.value())
         self.settings.setValue("system/system_settings/camera_res_height", self.camera_res_height_sb.value())
 
+        self.settings_saved_signal.emit()
+
     def load_and_show_settings(self):
         self.unit_id_sb.setValue(self.settings.value("system/system_settings/unit_id").toInt()[0])
         self.timezone_cb.setCurrentIndex(self.settings.value("system/system_settings/timezone_index").toInt()[0])
@@ -113,5 +117,7 @@ class SystemSettings(QtCore.QObject):
             self.image_preview_label.clear()
 
     def on_requested_image_ready_slot(self):
-        if self.cal_preview_button.isChecked():
-            self.image_preview_label.setPixmap(QtGui.QPixmap.fromImage(self.main_window.video.settings_and_cal_qimage))
\ No newline at end of file
+        qimage = self.main_window.video.settings_and_cal_image_mailbox.get()
+
+        if self.cal_preview_button.isChecked() and (qimage is not None):
+            self.image_preview_label.setPixmap(QtGui.QPixmap.fromImage(qimage))
\ No newline at end of file
@@ -44,9 +44,9 @@ import logging
 #####################################
 # PickAndPlateLogger Definition
 #####################################
-class Tables(QtCore.QThread):
+class Tables(QtCore.QObject):
     def __init__(self, main_window, master):
-        QtCore.QThread.__init__(self)
+        QtCore.QObject.__init__(self)
 
         # ########## Reference to system logger ##########
         self.logger = logging.getLogger("PickAndPlate")
@@ -65,22 +65,8 @@ class Tables(QtCore.QThread):
         self.table2_combobox = self.main_window.tables_table2_combobox
         self.table2_widget = self.main_window.tables_table2_widget
 
-        # ########## Thread flags ##########
-        self.not_abort_flag = True
-
         # ########## Init functions ##########
         self.connect_signals_to_slots()
-        self.start()
 
     def connect_signals_to_slots(self):
         pass
-
-    def run(self):
-        self.logger.debug("Tables Thread Starting...")
-        while self.not_abort_flag:
-            self.msleep(200)
-
-        self.logger.debug("Tables Thread Exiting...")
-
-    def on_kill_threads_slot(self):
-        self.not_abort_flag = False
\ No newline at end of file
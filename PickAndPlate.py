@@ -46,6 +46,7 @@ from Framework.SettingsCore import PickAndPlateSettings
 from Framework.VideoCore import PickAndPlateVideo
 from Framework.ControllerCore import PickAndPlateController
 from Framework.CycleHandlerCore import PickAndPlateCycleHandler
+from Framework.WakeupCore import WakeupReporter
 
 #####################################
 # Global Variables
@@ -101,6 +102,9 @@ class PickAndPlateWindow(QtGui.QMainWindow, form_class):
 
         self.interface = PickAndPlateInterface(self)  # This one HAS to be last so it can handle killing threads
 
+        # ########## Periodically log how often every thread and timer wakes up ##########
+        self.wakeup_reporter = WakeupReporter()
+
 if __name__ == "__main__":
     signal.signal(signal.SIGINT, signal.SIG_DFL)  # This allows the keyboard interrupt kill to work  properly
     app = QtGui.QApplication(sys.argv)  # Create the base qt gui application
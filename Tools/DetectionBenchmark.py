@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+
+"""
+    Offline benchmark of the cycle run detection path over a directory of saved camera frames, such as the ones dumped
+    to /home/debian/screen_dumps at the start of each cycle. Needs no camera and no gui, so it can be run on any linux
+    box before deploying. Run from the root of the repository with "python Tools/DetectionBenchmark.py <directory>".
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+import sys
+import time
+import glob
+import argparse
+from os.path import dirname, abspath, join
+
+import cv2
+import numpy
+from PyQt4 import QtCore
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# Custom imports
+from Framework.SettingsCore import PickAndPlateSettings, SettingsSnapshot
+from Framework.DetectionCore import DishDetector
+
+#####################################
+# Global Variables
+#####################################
+DEFAULT_IMAGE_DIRECTORY = "/home/debian/screen_dumps"
+
+PROFILES = [("d_", "Dechorionated"), ("c_", "Chorionated")]
+
+STAGES = ["roi", "mask", "detect", "filter", "total"]
+PERCENTILES = [50, 90, 99]
+
+
+#####################################
+# Benchmark Functions
+#####################################
+def load_settings_snapshot(settings_file):
+    if settings_file:
+        settings = QtCore.QSettings(settings_file, QtCore.QSettings.IniFormat)
+        return SettingsSnapshot(dict((str(key), QtCore.QVariant(settings.value(key))) for key in settings.allKeys()))
+    else:
+        # Same settings the gui would use, with defaults filled in for anything missing
+        return PickAndPlateSettings(None).snapshot
+
+
+def load_frames(image_directory):
+    frames = []
+
+    for path in sorted(glob.glob(join(image_directory, "*.png"))):
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is not None:
+            frames.append(frame)
+
+    return frames
+
+
+def run_detection(dish_detector, frame, stage_times):
+    # Same steps, in the same order, as PickAndPlateVideo.show_cycle_run minus the overlay drawing
+    start = time.time()
+    roi_frame, roi_x, roi_y = dish_detector.get_dish_roi(frame)
+    roi_done = time.time()
+    masked_frame = dish_detector.get_masked_greyscale_frame(roi_frame, cv2.COLOR_BGR2GRAY)
+    mask_done = time.time()
+    keypoints = dish_detector.detect_keypoints(masked_frame)
+    detect_done = time.time()
+    embryo_set = dish_detector.get_embryo_set(keypoints)
+    embryo_set.translate(roi_x, roi_y)
+    filter_done = time.time()
+
+    stage_times["roi"].append(roi_done - start)
+    stage_times["mask"].append(mask_done - roi_done)
+    stage_times["detect"].append(detect_done - mask_done)
+    stage_times["filter"].append(filter_done - detect_done)
+    stage_times["total"].append(filter_done - start)
+
+    return embryo_set
+
+
+def benchmark_profile(settings, profile_name, frames, repeats):
+    dish_detector = DishDetector()
+    dish_detector.load_settings(settings, profile_name)
+
+    stage_times = dict((stage, []) for stage in STAGES)
+    counts = {"detected": [], "valid": [], "pickable": []}
+
+    run_detection(dish_detector, frames[0], dict((stage, []) for stage in STAGES))  # Warm up the mask and detector
+
+    for _ in range(repeats):
+        for frame in frames:
+            embryo_set = run_detection(dish_detector, frame, stage_times)
+
+            counts["detected"].append(len(embryo_set))
+            counts["valid"].append(embryo_set.number_valid())
+            counts["pickable"].append(embryo_set.number_pickable())
+
+    return stage_times, counts
+
+
+def print_profile_results(prefix, profile_name, stage_times, counts):
+    print("")
+    print("Profile %s (%s)" % (prefix, profile_name))
+
+    header = "%8s" % "Stage" + "".join(["%10s" % ("p%d ms" % percentile) for percentile in PERCENTILES])
+    print(header + "%10s%10s" % ("mean ms", "max ms"))
+
+    for stage in STAGES:
+        times_ms = numpy.array(stage_times[stage]) * 1000
+        line = "%8s" % stage + "".join(["%10.2f" % numpy.percentile(times_ms, percentile)
+                                        for percentile in PERCENTILES])
+        print(line + "%10.2f%10.2f" % (times_ms.mean(), times_ms.max()))
+
+    total_seconds = sum(stage_times["total"])
+    print("Frames: %d    FPS: %.1f" % (len(stage_times["total"]), len(stage_times["total"]) / max(total_seconds, 1e-9)))
+
+    for name in ["detected", "valid", "pickable"]:
+        values = numpy.array(counts[name])
+        print("%8s embryos per frame: mean %.1f  min %d  max %d" % (name.capitalize(), values.mean(), values.min(),
+                                                                  values.max()))
+
+
+def run_benchmark(image_directory, settings_file, repeats, prefixes):
+    frames = load_frames(image_directory)
+    if not frames:
+        print("No png images found in " + image_directory)
+        return False
+
+    settings = load_settings_snapshot(settings_file)
+
+    print("Loaded %d frames from %s" % (len(frames), image_directory))
+
+    for prefix, profile_name in PROFILES:
+        if prefix in prefixes:
+            stage_times, counts = benchmark_profile(settings, profile_name, frames, repeats)
+            print_profile_results(prefix, profile_name, stage_times, counts)
+
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark embryo detection on saved camera frames.")
+    parser.add_argument("image_directory", nargs="?", default=DEFAULT_IMAGE_DIRECTORY,
+                        help="Directory of png frames saved from the pick and plate camera.")
+    parser.add_argument("-f", "--settings-file", default=None,
+                        help="Ini settings file to use, such as one copied off the beaglebone. Defaults to the local "
+                             "Pick And Plate settings.")
+    parser.add_argument("-r", "--repeats", type=int, default=3, help="Passes over the frames for each profile.")
+    parser.add_argument("-p", "--profiles", nargs="+", default=[prefix for prefix, _ in PROFILES],
+                        choices=[prefix for prefix, _ in PROFILES], help="Detection profiles to benchmark.")
+    args = parser.parse_args()
+
+    sys.exit(0 if run_benchmark(args.image_directory, args.settings_file, args.repeats, args.profiles) else 1)
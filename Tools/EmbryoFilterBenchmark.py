@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+"""
+    Benchmark comparing the original list based pickable embryo filter against the numpy based one in EmbryoCore.
+    Run from the root of the repository with "python Tools/EmbryoFilterBenchmark.py".
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+import sys
+import time
+import argparse
+from os.path import dirname, abspath
+from math import sqrt, pow
+
+import numpy
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# Custom imports
+from Framework.EmbryoCore import get_pickable_mask
+
+#####################################
+# Global Variables
+#####################################
+KEYPOINT_COUNTS = [10, 100, 1000, 5000]
+
+FRAME_WIDTH = 864
+FRAME_HEIGHT = 480
+
+EMBRYO_MIN_DIST = 5.0
+EMBRYO_MIN_SIZE = 8.0
+EMBRYO_MAX_SIZE = 14.0
+
+
+#####################################
+# Benchmark Functions
+#####################################
+def legacy_get_pickable_embryos(valid, min_between_embryos, min_embryo_dia, max_embryo_dia):
+    # Copy of the original PickAndPlateVideo.get_pickable_embryos, kept here as the reference implementation
+    pickable = []
+
+    for embryo in valid:
+        x = embryo[0]
+        y = embryo[1]
+        dia = embryo[2]
+
+        if (dia >= min_embryo_dia) and (dia <= max_embryo_dia):
+            found_too_close = False
+            for comp_embryo in valid:
+                c_x = comp_embryo[0]
+                c_y = comp_embryo[1]
+                c_dia = comp_embryo[2]
+
+                if (x == c_x) and (y == c_y):
+                    pass
+                elif (sqrt(pow(abs(x-c_x), 2) + pow(abs(y-c_y), 2))-(dia/2)-(c_dia/2)) < min_between_embryos:
+                    found_too_close = True
+                    break
+            if not found_too_close:
+                pickable.append(embryo)
+
+    return pickable
+
+
+def numpy_get_pickable_embryos(valid, min_between_embryos, min_embryo_dia, max_embryo_dia):
+    embryos = numpy.array(valid, dtype=numpy.float64).reshape(-1, 3)
+    return embryos[get_pickable_mask(embryos, min_between_embryos, min_embryo_dia, max_embryo_dia)].tolist()
+
+
+def make_synthetic_keypoints(count, random_state):
+    # Keypoints come out of opencv as float32, so round trip through it to get realistic values
+    x = random_state.uniform(0, FRAME_WIDTH, count)
+    y = random_state.uniform(0, FRAME_HEIGHT, count)
+    size = random_state.uniform(EMBRYO_MIN_SIZE - 4, EMBRYO_MAX_SIZE + 4, count)
+
+    return numpy.column_stack((x, y, size)).astype(numpy.float32).astype(numpy.float64).tolist()
+
+
+def time_function(function, valid, repeats):
+    best = None
+    result = None
+
+    for _ in range(repeats):
+        start = time.time()
+        result = function(valid, EMBRYO_MIN_DIST, EMBRYO_MIN_SIZE, EMBRYO_MAX_SIZE)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, result
+
+
+def run_benchmark(counts, repeats, seed):
+    random_state = numpy.random.RandomState(seed)
+
+    print("%8s %14s %14s %10s %10s %8s" % ("Count", "Legacy (ms)", "Numpy (ms)", "Speedup", "Pickable", "Match"))
+
+    all_matched = True
+    for count in counts:
+        valid = make_synthetic_keypoints(count, random_state)
+
+        legacy_time, legacy_result = time_function(legacy_get_pickable_embryos, valid, repeats)
+        numpy_time, numpy_result = time_function(numpy_get_pickable_embryos, valid, repeats)
+
+        matched = legacy_result == numpy_result
+        all_matched = all_matched and matched
+
+        print("%8d %14.3f %14.3f %9.1fx %10d %8s" % (count, legacy_time * 1000, numpy_time * 1000,
+                                                    legacy_time / max(numpy_time, 1e-9), len(numpy_result),
+                                                    "Yes" if matched else "NO"))
+
+    return all_matched
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pickable embryo filter.")
+    parser.add_argument("-c", "--counts", type=int, nargs="+", default=KEYPOINT_COUNTS,
+                        help="Numbers of synthetic keypoints to test with.")
+    parser.add_argument("-r", "--repeats", type=int, default=3, help="Runs per count. The fastest is reported.")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Random seed for the synthetic keypoints.")
+    args = parser.parse_args()
+
+    sys.exit(0 if run_benchmark(args.counts, args.repeats, args.seed) else 1)
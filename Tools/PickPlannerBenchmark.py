@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+
+"""
+    Offline comparison of the XY travel needed to plate embryos from a directory of saved camera frames, using the
+    pick planner versus picking at random the way the cycle used to. Each frame is detected once, then embryos are
+    picked from it one after another, each going from the waste container to the embryo, on to the next well, and back
+    to the waste container. Run from the root of the repository with "python Tools/PickPlannerBenchmark.py <directory>".
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+import sys
+import argparse
+from math import sqrt
+from os.path import dirname, abspath
+
+import numpy
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# Custom imports
+from Framework.DetectionCore import DishDetector
+from Framework.PickPlannerCore import PickPlanner
+from Tools.DetectionBenchmark import DEFAULT_IMAGE_DIRECTORY, PROFILES, STAGES, load_settings_snapshot, load_frames, \
+    run_detection
+
+#####################################
+# Global Variables
+#####################################
+CAL_POINT_DIST_MM = 35  # Must match the cycle handler
+
+PLATE_ROWS = 8
+PLATE_COLUMNS = 12
+WELL_SPACING_MM = 9
+
+
+#####################################
+# Benchmark Functions
+#####################################
+def load_calibration(settings):
+    # The same values the cycle handler reads at the start of a run. The pipette size offset is left out, as it moves
+    # everything by the same amount and so can't change any distances.
+    calibration = {}
+
+    for name in ["dish_x_center", "dish_y_center", "a1_x_center", "a1_y_center", "waste_x_center", "waste_y_center"]:
+        calibration[name] = settings.value("system/system_calibration/" + name).toFloat()[0]
+
+    for name in ["crop_x_center", "crop_y_center", "distance_cal_x", "distance_cal_y"]:
+        calibration[name] = settings.value("system/system_calibration/" + name).toInt()[0]
+
+    calibration_distance_px = sqrt(pow(calibration["distance_cal_x"], 2) + pow(calibration["distance_cal_y"], 2))
+    calibration["mm_per_px"] = (CAL_POINT_DIST_MM / calibration_distance_px) if calibration_distance_px else 0
+
+    calibration["plating_order"] = str(settings.value("quick_settings/plating_order").toString())
+
+    return calibration
+
+
+def get_plate_wells(a1_x, a1_y, plating_order):
+    # Same order PickAndPlateCycleHandler.advance_plate_well steps through the plate in
+    wells = []
+
+    if plating_order == "Cols":
+        for column in range(PLATE_COLUMNS):
+            for row in range(PLATE_ROWS):
+                wells.append((a1_x + (row * WELL_SPACING_MM), a1_y + (column * WELL_SPACING_MM)))
+    else:
+        for row in range(PLATE_ROWS):
+            for column in range(PLATE_COLUMNS):
+                wells.append((a1_x + (row * WELL_SPACING_MM), a1_y + (column * WELL_SPACING_MM)))
+
+    return wells
+
+
+def get_distance(start_x, start_y, end_x, end_y):
+    return sqrt(pow(end_x - start_x, 2) + pow(end_y - start_y, 2))
+
+
+def get_pick_travel(waste_x, waste_y, target_x, target_y, well_x, well_y):
+    return (get_distance(waste_x, waste_y, target_x, target_y) + get_distance(target_x, target_y, well_x, well_y) +
+            get_distance(well_x, well_y, waste_x, waste_y))
+
+
+def simulate_planned_picks(planner, calibration, wells, first_well, picks_per_frame):
+    waste_x = calibration["waste_x_center"]
+    waste_y = calibration["waste_y_center"]
+
+    travel = 0.0
+    picks = 0
+
+    while (picks_per_frame is None) or (picks < picks_per_frame):
+        well_x, well_y = wells[(first_well + picks) % len(wells)]
+        pick_target = planner.choose_next_target(waste_x, waste_y, well_x, well_y)
+
+        if pick_target is None:
+            break
+
+        _, _, target_x, target_y = pick_target
+        travel += get_pick_travel(waste_x, waste_y, target_x, target_y, well_x, well_y)
+        picks += 1
+
+    return travel, picks
+
+
+def simulate_random_picks(planner, calibration, wells, first_well, picks_per_frame, random_state):
+    waste_x = calibration["waste_x_center"]
+    waste_y = calibration["waste_y_center"]
+
+    order = random_state.permutation(planner.targets_mm.shape[0])[:picks_per_frame]
+
+    travel = 0.0
+    for pick_number, target_index in enumerate(order):
+        well_x, well_y = wells[(first_well + pick_number) % len(wells)]
+        target_x, target_y = planner.targets_mm[target_index]
+        travel += get_pick_travel(waste_x, waste_y, target_x, target_y, well_x, well_y)
+
+    return travel, len(order)
+
+
+def run_benchmark(image_directory, settings_file, profile_prefix, picks_per_frame, random_trials, seed):
+    frames = load_frames(image_directory)
+    if not frames:
+        print("No png images found in " + image_directory)
+        return False
+
+    settings = load_settings_snapshot(settings_file)
+    calibration = load_calibration(settings)
+    wells = get_plate_wells(calibration["a1_x_center"], calibration["a1_y_center"], calibration["plating_order"])
+
+    profile_name = dict(PROFILES)[profile_prefix]
+    dish_detector = DishDetector()
+    dish_detector.load_settings(settings, profile_name)
+
+    planner = PickPlanner()
+    planner.set_calibration(calibration["dish_x_center"], calibration["dish_y_center"], calibration["crop_x_center"],
+                            calibration["crop_y_center"], calibration["mm_per_px"])
+
+    random_state = numpy.random.RandomState(seed)
+
+    planned_travel = 0.0
+    random_travels = numpy.zeros(random_trials)
+    total_picks = 0
+
+    for frame in frames:
+        embryo_set = run_detection(dish_detector, frame, dict((stage, []) for stage in STAGES))
+
+        for trial in range(random_trials):
+            planner.set_embryo_set(embryo_set)
+            random_travels[trial] += simulate_random_picks(planner, calibration, wells, total_picks, picks_per_frame,
+                                                           random_state)[0]
+
+        planner.set_embryo_set(embryo_set)
+        travel, picks = simulate_planned_picks(planner, calibration, wells, total_picks, picks_per_frame)
+
+        planned_travel += travel
+        total_picks += picks
+
+    print("Loaded %d frames from %s" % (len(frames), image_directory))
+    print("Profile %s (%s), %d picks" % (profile_prefix, profile_name, total_picks))
+
+    if not total_picks:
+        print("No pickable embryos were found, nothing to compare.")
+        return True
+
+    random_mean = random_travels.mean()
+
+    print("%10s%16s%16s" % ("Order", "Total mm", "mm per pick"))
+    print("%10s%16.1f%16.2f" % ("Planned", planned_travel, planned_travel / total_picks))
+    print("%10s%16.1f%16.2f" % ("Random", random_mean, random_mean / total_picks))
+    print("Random total over %d trials: min %.1f  max %.1f" % (random_trials, random_travels.min(),
+                                                                random_travels.max()))
+    print("Planned order travels %.1f%% less than random" % ((1 - (planned_travel / max(random_mean, 1e-9))) * 100))
+
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare pick planner travel against random picking on saved "
+                                                 "camera frames.")
+    parser.add_argument("image_directory", nargs="?", default=DEFAULT_IMAGE_DIRECTORY,
+                        help="Directory of png frames saved from the pick and plate camera.")
+    parser.add_argument("-f", "--settings-file", default=None,
+                        help="Ini settings file to use, such as one copied off the beaglebone. Defaults to the local "
+                             "Pick And Plate settings.")
+    parser.add_argument("-p", "--profile", default=PROFILES[0][0], choices=[prefix for prefix, _ in PROFILES],
+                        help="Detection profile to use.")
+    parser.add_argument("-n", "--picks-per-frame", type=int, default=1,
+                        help="Picks to make from each frame before moving on, 0 for every pickable embryo. Defaults to "
+                             "one, the same as a cycle that takes a new image after every pick.")
+    parser.add_argument("-t", "--random-trials", type=int, default=20,
+                        help="Random orderings to average over for each frame.")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Seed for the random orderings.")
+    args = parser.parse_args()
+
+    sys.exit(0 if run_benchmark(args.image_directory, args.settings_file, args.profile, args.picks_per_frame or None,
+                                args.random_trials, args.seed) else 1)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+"""
+    Offline reader for the cycle telemetry ring file. Prints a summary of each run, with outcome counts and the
+    average time spent between each pair of phases, and can export every record to csv. Safe to run while a cycle is
+    recording. Run from the root of the repository with "python Tools/TelemetryReader.py [telemetry file]".
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+import sys
+import csv
+import time
+import argparse
+from os.path import dirname, abspath
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# Custom imports
+from Framework.TelemetryCore import application_telemetry_full_path, read_records, PHASE_NAMES, OUTCOME_NAMES, \
+    OUTCOME_PLATED, OUTCOME_MISPICK, OUTCOME_DOUBLE_PICK, OUTCOME_UNKNOWN, PHASE_PROGRAM_DONE
+
+#####################################
+# Global Variables
+#####################################
+IMAGE_TYPE_NAMES = ["Full Detection", "Target Verified"]
+
+POSITION_AXES = ["x", "y", "z", "a"]
+
+
+#####################################
+# Reader Functions
+#####################################
+def group_by_run(records):
+    runs = []
+
+    for record in records:
+        if (not runs) or (runs[-1][0].run_start_time != record.run_start_time):
+            runs.append([])
+        runs[-1].append(record)
+
+    return runs
+
+
+def get_phase_duration(record, start_phase, end_phase):
+    start_time = record.phase_times[start_phase]
+    end_time = record.phase_times[end_phase]
+
+    if (not start_time) or (not end_time):
+        return None
+
+    return end_time - start_time
+
+
+def print_run_summary(run_records):
+    start_time = run_records[0].run_start_time
+    outcomes = [record.outcome for record in run_records]
+    verified_picks = len([record for record in run_records if record.image_type])
+
+    print("Run started %s, %d picks (%d from a verified target)" % (time.ctime(start_time), len(run_records),
+                                                                     verified_picks))
+    print("    Plated %d, mispicks %d, double picks %d, not yet known %d" % (
+        outcomes.count(OUTCOME_PLATED), outcomes.count(OUTCOME_MISPICK), outcomes.count(OUTCOME_DOUBLE_PICK),
+        outcomes.count(OUTCOME_UNKNOWN)))
+
+    picks_time = run_records[-1].phase_times[PHASE_PROGRAM_DONE] - start_time
+    if picks_time > 0:
+        print("    %.1f minutes from start to the end of the last pick, %.2f picks per minute" % (
+            picks_time / 60, len(run_records) / (picks_time / 60)))
+
+    for start_phase in range(len(PHASE_NAMES) - 1):
+        end_phase = start_phase + 1
+        durations = [get_phase_duration(record, start_phase, end_phase) for record in run_records]
+        durations = [duration for duration in durations if duration is not None]
+
+        if durations:
+            print("    %-32s mean %8.1f ms  max %8.1f ms" % (
+                PHASE_NAMES[start_phase] + " to " + PHASE_NAMES[end_phase],
+                sum(durations) / len(durations) * 1000, max(durations) * 1000))
+
+
+def export_csv(records, csv_path):
+    header = ["run_start_time", "pick_number", "well_number", "image_type", "outcome", "target_x_px", "target_y_px",
+              "target_x_mm", "target_y_mm", "well_x_mm", "well_y_mm", "embryos_detected", "embryos_pickable",
+              "targets_remaining", "neighbors_before"]
+
+    for phase_name in PHASE_NAMES:
+        header.append(phase_name + " time")
+        header.extend([phase_name + " " + axis for axis in POSITION_AXES])
+
+    with open(csv_path, "wb") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(header)
+
+        for record in records:
+            row = [repr(record.run_start_time), record.pick_number, record.well_number,
+                   IMAGE_TYPE_NAMES[record.image_type], OUTCOME_NAMES[record.outcome], record.target_x_px,
+                   record.target_y_px, record.target_x_mm, record.target_y_mm, record.well_x_mm, record.well_y_mm,
+                   record.embryos_detected, record.embryos_pickable, record.targets_remaining,
+                   record.neighbors_before]
+
+            for phase in range(len(PHASE_NAMES)):
+                row.append(repr(record.phase_times[phase]))
+                row.extend(record.get_phase_position(phase))
+
+            writer.writerow(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize or export Pick And Plate cycle telemetry.")
+    parser.add_argument("telemetry_file", nargs="?", default=application_telemetry_full_path,
+                        help="Telemetry ring file, such as one copied off the beaglebone. Defaults to the local one.")
+    parser.add_argument("-c", "--csv", default=None, help="Also write every record to this csv file.")
+    parser.add_argument("-l", "--last-runs", type=int, default=1,
+                        help="Number of the most recent runs to summarize, 0 for every run still in the file.")
+    args = parser.parse_args()
+
+    try:
+        all_records = read_records(args.telemetry_file)
+    except (IOError, ValueError) as error:
+        print(str(error))
+        sys.exit(1)
+
+    if not all_records:
+        print("No telemetry has been recorded in " + args.telemetry_file)
+        sys.exit(0)
+
+    all_runs = group_by_run(all_records)
+
+    for run in (all_runs[-args.last_runs:] if args.last_runs else all_runs):
+        print_run_summary(run)
+
+    if args.csv:
+        export_csv(all_records, args.csv)
+        print("Wrote %d records to %s" % (len(all_records), args.csv))
@@ -0,0 +1,422 @@
+#!/usr/bin/env python
+
+"""
+    Stand-in for the TinyG motion controller for running the pick and plate software on a machine with no hardware.
+    It opens a pseudo terminal and speaks the subset of the TinyG JSON protocol that SerialHandler relies on, with move
+    timing modeled from the velocity and jerk settings in configurations/tinyg_settings.txt.
+
+    Run from the root of the repository with "python Tools/TinyGSimulator.py -l /tmp/ttyTinyG", then start the
+    program with PICK_AND_PLATE_TINYG_PORT=/tmp/ttyTinyG set so SerialHandler connects to the simulator.
+"""
+
+__author__ = "Corwin Perren"
+__copyright__ = "None"
+__credits__ = [""]
+__license__ = "GPL (GNU General Public License)"
+__version__ = "0.1 Alpha"
+__maintainer__ = "Corwin Perren"
+__email__ = "caperren@caperren.com"
+__status__ = "Development"
+
+# This file is part of "Pick And Plate".
+#
+# "Pick And Plate" is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# "Pick And Plate" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Pick And Plate".  If not, see <http://www.gnu.org/licenses/>.
+
+#####################################
+# Imports
+#####################################
+# Python native imports
+import os
+import re
+import sys
+import tty
+import json
+import math
+import time
+import select
+import argparse
+from collections import deque
+from os.path import dirname, abspath, join
+
+# Custom imports
+
+#####################################
+# Global Variables
+#####################################
+DEFAULT_SETTINGS_PATH = join(dirname(dirname(abspath(__file__))), "configurations", "tinyg_settings.txt")
+
+AXES = ["x", "y", "z", "a"]
+
+PLANNER_BUFFER_SIZE = 28  # Number of planner buffers on a TinyG running firmware 0.97
+
+PROGRAM_STOP_STATE = 3
+MOTION_RUNNING_STATE = 5
+HOMING_STATE = 9
+
+JERK_MULTIPLIER = 1000000.0  # Jerk values in the settings are in millions of mm/min^3
+
+SETTING_LINE_REGEX = re.compile(r"^\[(\w+)\]\s+.*?\s(-?\d+(?:\.\d+)?)(?:\s|$)")
+GCODE_WORD_REGEX = re.compile(r"([A-Z])\s*(-?\d*\.?\d+)")
+
+
+#####################################
+# Motion Timing Functions
+#####################################
+def load_tinyg_settings(path):
+    settings = {}
+
+    with open(path) as settings_file:
+        for line in settings_file:
+            match = SETTING_LINE_REGEX.match(line.strip())
+            if match:
+                settings[match.group(1)] = float(match.group(2))
+
+    return settings
+
+
+def get_move_time(length, velocity, jerk):
+    """
+        Time in seconds for a constant jerk (s-curve) move that starts and ends stopped, as TinyG plans them. Length is
+        in mm, velocity in mm/min and jerk in mm/min^3. Moves too short to reach velocity peak at a lower one.
+    """
+    if length <= 0:
+        return 0.0
+
+    velocity /= 60.0
+    jerk /= 216000.0  # mm/min^3 to mm/sec^3
+
+    accel_time = 2 * math.sqrt(velocity / jerk)
+    accel_length = velocity * accel_time / 2
+
+    if length >= (2 * accel_length):
+        return (2 * accel_time) + ((length - (2 * accel_length)) / velocity)
+
+    peak_velocity = math.pow(length * math.sqrt(jerk) / 2, 2.0 / 3.0)
+    return 4 * math.sqrt(peak_velocity / jerk)
+
+
+#####################################
+# Planner Block Class Definition
+#####################################
+class PlannerBlock(object):
+    """
+        One queued move, dwell, or homing cycle. Positions are interpolated linearly over its duration, which is
+        accurate enough for status reports.
+    """
+
+    def __init__(self, start, end, duration, state, line_number=None):
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.state = state
+        self.line_number = line_number
+
+        self.start_time = None
+
+    def get_position(self, now):
+        if (self.start_time is None) or (self.duration <= 0):
+            return dict(self.start)
+
+        fraction = min(1.0, (now - self.start_time) / self.duration)
+        return dict((axis, self.start[axis] + (self.end[axis] - self.start[axis]) * fraction) for axis in AXES)
+
+    def get_velocity(self):
+        length = math.sqrt(sum([math.pow(self.end[axis] - self.start[axis], 2) for axis in AXES[:3]]))
+        return (length / self.duration) * 60 if self.duration > 0 else 0.0
+
+    def is_done(self, now):
+        return (self.start_time is not None) and ((now - self.start_time) >= self.duration)
+
+
+#####################################
+# TinyGSimulator Class Definition
+#####################################
+class TinyGSimulator(object):
+    def __init__(self, settings_path, time_scale=1.0, link_path=None, verbose=False):
+        self.settings = load_tinyg_settings(settings_path)
+        self.time_scale = time_scale
+        self.link_path = link_path
+        self.verbose = verbose
+
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.slave_path = os.ttyname(self.slave_fd)
+
+        if self.link_path:
+            if os.path.lexists(self.link_path):
+                os.remove(self.link_path)
+            os.symlink(self.slave_path, self.link_path)
+
+        self.in_buffer = ""
+
+        self.position = dict((axis, 0.0) for axis in AXES)
+        self.planned_position = dict(self.position)
+        self.absolute_mode = int(self.settings.get("gdi", 0)) == 0
+        self.feedrate = None
+
+        self.planner_queue = deque()
+        self.current_block = None
+        self.line_number = 0
+        self.machine_state = PROGRAM_STOP_STATE
+
+        self.last_status = {}
+        self.last_status_time = 0
+
+    # ######### Main Loop ##########
+    def run(self):
+        print("TinyG simulator listening on " + (self.link_path or self.slave_path))
+
+        try:
+            while True:
+                readable, _, _ = select.select([self.master_fd], [], [], 0.01)
+
+                if readable:
+                    data = os.read(self.master_fd, 1024)
+                    if not isinstance(data, str):
+                        data = data.decode("ascii", "ignore")
+                    self.in_buffer += data
+
+                    while "\n" in self.in_buffer:
+                        line, self.in_buffer = self.in_buffer.split("\n", 1)
+                        self.process_line(line.strip())
+
+                self.update_motion()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.link_path and os.path.lexists(self.link_path):
+                os.remove(self.link_path)
+
+    def send(self, response):
+        line = json.dumps(response, separators=(",", ":")) + "\n"
+
+        if self.verbose:
+            sys.stdout.write("<- " + line)
+
+        try:
+            os.write(self.master_fd, line.encode("ascii"))
+        except OSError:
+            pass
+
+    def send_response(self, body, line):
+        self.send({"r": body, "f": [1, 0, len(line) + 1, sum(bytearray(line.encode("ascii"))) % 10000]})
+
+    # ######### Command Processing ##########
+    def process_line(self, line):
+        if not line:
+            return
+
+        if self.verbose:
+            sys.stdout.write("-> " + line + "\n")
+
+        if (line == "^x") or (line == "\x18"):
+            self.reset()
+            return
+
+        try:
+            command = json.loads(line)
+        except ValueError:
+            command = {"gc": line}
+
+        if not isinstance(command, dict):
+            return
+
+        body = {}
+        for key, value in command.items():
+            if key == "gc":
+                body.update(self.process_gcode(value))
+            elif key == "sr":
+                body["sr"] = self.get_status_report(full=True)
+            elif key == "qr":
+                body["qr"] = self.get_queue_available()
+            elif key in ["me", "md"]:
+                body[key] = ""
+            elif value is None:
+                body[key] = self.get_setting_group(key)
+            else:
+                self.settings[key] = float(value)
+                body[key] = value
+
+        self.send_response(body, line)
+
+    def process_gcode(self, gcode):
+        body = {"gc": gcode}
+
+        words = [(letter, float(value)) for letter, value in GCODE_WORD_REGEX.findall(gcode.upper())]
+        line_number = None
+        motion = None
+        targets = {}
+        dwell = None
+
+        for letter, value in words:
+            if letter == "N":
+                line_number = int(value)
+                body["n"] = line_number
+            elif letter == "G":
+                if value == 90:
+                    self.absolute_mode = True
+                elif value == 91:
+                    self.absolute_mode = False
+                elif value in [0, 1, 28.2, 4]:
+                    motion = value
+            elif letter == "F":
+                self.feedrate = value
+            elif letter == "P":
+                dwell = value
+            elif letter.lower() in AXES:
+                targets[letter.lower()] = value
+
+        if motion in [0, 1] and targets:
+            self.queue_move(targets, motion == 1, line_number)
+        elif motion == 28.2:
+            self.queue_homing(targets.keys(), line_number)
+        elif (motion == 4) and dwell:
+            self.queue_block(PlannerBlock(self.planned_position, self.planned_position, dwell, MOTION_RUNNING_STATE,
+                                          line_number))
+
+        return body
+
+    def queue_move(self, targets, use_feedrate, line_number):
+        start = dict(self.planned_position)
+        end = dict(start)
+
+        for axis, value in targets.items():
+            end[axis] = value if self.absolute_mode else start[axis] + value
+
+        deltas = dict((axis, abs(end[axis] - start[axis])) for axis in AXES)
+        length = math.sqrt(sum([math.pow(deltas[axis], 2) for axis in AXES]))
+
+        if length == 0:
+            return
+
+        # Limit the vector velocity and jerk so that no single axis goes past its own limits
+        velocity = None
+        jerk = None
+        for axis in AXES:
+            if deltas[axis] > 0:
+                scale = length / deltas[axis]
+                axis_velocity = self.settings[axis + ("fr" if use_feedrate else "vm")] * scale
+                axis_jerk = self.settings[axis + "jm"] * JERK_MULTIPLIER * scale
+
+                velocity = axis_velocity if velocity is None else min(velocity, axis_velocity)
+                jerk = axis_jerk if jerk is None else min(jerk, axis_jerk)
+
+        if use_feedrate and self.feedrate:
+            velocity = min(velocity, self.feedrate)
+
+        duration = get_move_time(length, velocity, jerk)
+        self.queue_block(PlannerBlock(start, end, duration, MOTION_RUNNING_STATE, line_number))
+
+    def queue_homing(self, axes, line_number):
+        start = dict(self.planned_position)
+        end = dict(start)
+        duration = 0.0
+
+        for axis in axes:
+            # Homing to a max switch ends at the travel maximum, a min switch at the travel minimum
+            if self.settings.get(axis + "sx", 0) in [1, 3]:
+                end[axis] = self.settings[axis + "tm"]
+            else:
+                end[axis] = self.settings[axis + "tn"]
+
+            search_time = abs(end[axis] - start[axis]) / self.settings[axis + "sv"] * 60
+            latch_time = self.settings[axis + "lb"] / self.settings[axis + "lv"] * 60
+            duration = max(duration, search_time + latch_time)
+
+        self.queue_block(PlannerBlock(start, end, duration, HOMING_STATE, line_number))
+
+    def queue_block(self, block):
+        self.planner_queue.append(block)
+        self.planned_position = dict(block.end)
+        self.send({"qr": self.get_queue_available()})
+
+    def reset(self):
+        self.planner_queue.clear()
+        self.current_block = None
+        self.planned_position = dict(self.position)
+        self.machine_state = PROGRAM_STOP_STATE
+
+        self.send({"r": {"fv": self.settings.get("fv", 0.97), "fb": self.settings.get("fb", 440.20),
+                         "hp": 1, "hv": 8, "msg": "SYSTEM READY"}, "f": [1, 0, 1, 0]})
+
+    # ######### Motion Simulation ##########
+    def update_motion(self):
+        now = time.time() * self.time_scale
+
+        if self.current_block and self.current_block.is_done(now):
+            self.position = dict(self.current_block.end)
+            self.current_block = None
+            self.send({"qr": self.get_queue_available()})
+
+        if (self.current_block is None) and self.planner_queue:
+            self.current_block = self.planner_queue.popleft()
+            self.current_block.start_time = now
+
+            if self.current_block.line_number is not None:
+                self.line_number = self.current_block.line_number
+
+        previous_state = self.machine_state
+
+        if self.current_block:
+            self.position = self.current_block.get_position(now)
+            self.machine_state = self.current_block.state
+        else:
+            self.machine_state = PROGRAM_STOP_STATE
+
+        # Reports go out every status interval while moving, and right away whenever the machine state changes
+        status_interval = self.settings.get("si", 250) / 1000.0
+        if (self.machine_state != previous_state) or ((time.time() - self.last_status_time) >= status_interval):
+            status = self.get_status_report(full=False)
+            if status:
+                self.send({"sr": status})
+            self.last_status_time = time.time()
+
+    def get_status_report(self, full):
+        status = {
+            "line": self.line_number,
+            "posx": round(self.position["x"], 3),
+            "posy": round(self.position["y"], 3),
+            "posz": round(self.position["z"], 3),
+            "posa": round(self.position["a"], 3),
+            "vel": round(self.current_block.get_velocity(), 2) if self.current_block else 0,
+            "stat": self.machine_state
+        }
+
+        if full:
+            self.last_status = dict(status)
+            return status
+
+        # Filtered status reports only carry what changed since the last one
+        changed = dict((key, value) for key, value in status.items() if self.last_status.get(key) != value)
+        self.last_status = dict(status)
+        return changed
+
+    def get_queue_available(self):
+        return PLANNER_BUFFER_SIZE - len(self.planner_queue) - (1 if self.current_block else 0)
+
+    def get_setting_group(self, group):
+        return dict((key[len(group):], value) for key, value in self.settings.items()
+                    if key.startswith(group) and (len(key) > len(group)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated TinyG for running pick and plate without hardware.")
+    parser.add_argument("-s", "--settings", default=DEFAULT_SETTINGS_PATH, help="TinyG settings dump to load.")
+    parser.add_argument("-l", "--link", default=None, help="Make a symlink to the pseudo terminal at this path.")
+    parser.add_argument("-t", "--time-scale", type=float, default=1.0,
+                        help="Speed up simulated motion by this factor. Leave at 1 when measuring cycle times.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print everything sent and received.")
+    args = parser.parse_args()
+
+    TinyGSimulator(args.settings, args.time_scale, args.link, args.verbose).run()